@@ -671,6 +671,189 @@ ATTRIBUTE_CONFIGS = {
     )
 }
 
+# Résultats de la simulation (section "results" de l'état, écrits sans validation)
+RESULT_CONFIGS = {
+    'production_pv': AttributeConfig(
+        default=0.0,
+        type=float,
+        user_label="Production PV (serre)",
+        description="Production annuelle des panneaux de la serre",
+        unit="kWh",
+        category="Résultats",
+        i18n={
+            'en': "PV Production (greenhouse)",
+            'fr': "Production PV (serre)"
+        }
+    ),
+    'production_au_sol': AttributeConfig(
+        default=0.0,
+        type=float,
+        user_label="Production PV (au sol)",
+        description="Production annuelle des panneaux au sol",
+        unit="kWh",
+        category="Résultats",
+        i18n={
+            'en': "PV Production (ground)",
+            'fr': "Production PV (au sol)"
+        }
+    ),
+    'autoconsommation': AttributeConfig(
+        default=0.0,
+        type=float,
+        user_label="Autoconsommation",
+        description="Énergie consommée sur place",
+        unit="kWh",
+        category="Résultats",
+        i18n={
+            'en': "Self-consumption",
+            'fr': "Autoconsommation"
+        }
+    ),
+    'revente': AttributeConfig(
+        default=0.0,
+        type=float,
+        user_label="Revente",
+        description="Énergie revendue au réseau",
+        unit="kWh",
+        category="Résultats",
+        i18n={
+            'en': "Grid sale",
+            'fr': "Revente"
+        }
+    ),
+    'revenu_pv': AttributeConfig(
+        default=0.0,
+        type=float,
+        user_label="Revenu PV",
+        description="Revenu annuel de l'électricité",
+        unit="€",
+        category="Résultats",
+        i18n={
+            'en': "PV Revenue",
+            'fr': "Revenu PV"
+        }
+    ),
+    'revenu_rhum': AttributeConfig(
+        default=0.0,
+        type=float,
+        user_label="Revenu Rhum",
+        description="Revenu annuel du rhum",
+        unit="€",
+        category="Résultats",
+        i18n={
+            'en': "Rum Revenue",
+            'fr': "Revenu Rhum"
+        }
+    ),
+    'cout_pv': AttributeConfig(
+        default=0.0,
+        type=float,
+        user_label="Coût PV",
+        description="Coût d'installation du système PV",
+        unit="€",
+        category="Résultats",
+        i18n={
+            'en': "PV Cost",
+            'fr': "Coût PV"
+        }
+    ),
+    'cout_serre': AttributeConfig(
+        default=0.0,
+        type=float,
+        user_label="Coût serre",
+        description="Coût de construction de la serre",
+        unit="€",
+        category="Résultats",
+        i18n={
+            'en': "Greenhouse Cost",
+            'fr': "Coût serre"
+        }
+    ),
+    'cout_total': AttributeConfig(
+        default=0.0,
+        type=float,
+        user_label="Coût total",
+        description="Investissement initial total",
+        unit="€",
+        category="Résultats",
+        i18n={
+            'en': "Total Cost",
+            'fr': "Coût total"
+        }
+    ),
+    'couts_annuels': AttributeConfig(
+        default={},
+        type=dict,
+        user_label="Coûts annuels",
+        description="Coûts annuels de maintenance, d'assurance et de production",
+        unit="€",
+        category="Résultats",
+        i18n={
+            'en': "Annual Costs",
+            'fr': "Coûts annuels"
+        }
+    ),
+    'benefice_net': AttributeConfig(
+        default=0.0,
+        type=float,
+        user_label="Bénéfice net",
+        description="Bénéfice annuel net",
+        unit="€",
+        category="Résultats",
+        i18n={
+            'en': "Net Profit",
+            'fr': "Bénéfice net"
+        }
+    ),
+    'roi': AttributeConfig(
+        default=0.0,
+        type=float,
+        user_label="ROI",
+        description="Retour sur investissement",
+        unit="%",
+        category="Résultats",
+        i18n={
+            'en': "ROI",
+            'fr': "ROI"
+        }
+    ),
+    'temps_retour': AttributeConfig(
+        default=0.0,
+        type=float,
+        user_label="Temps retour",
+        description="Temps de retour sur investissement",
+        unit="ans",
+        category="Résultats",
+        i18n={
+            'en': "Payback Time",
+            'fr': "Temps retour"
+        }
+    ),
+    'monthly_production': AttributeConfig(
+        default={},
+        type=dict,
+        user_label="Production mensuelle",
+        description="Production PV par mois",
+        unit="kWh",
+        category="Résultats",
+        i18n={
+            'en': "Monthly Production",
+            'fr': "Production mensuelle"
+        }
+    ),
+    'scenarios': AttributeConfig(
+        default=[],
+        type=list,
+        user_label="Scénarios",
+        description="Scénarios financiers simulés",
+        category="Résultats",
+        i18n={
+            'en': "Scenarios",
+            'fr': "Scénarios"
+        }
+    )
+}
+
 # Nouvelle fonction pour valider et normaliser les paramètres d'entrée
 def validate_parameters(input_params: dict) -> dict:
     validated = {}
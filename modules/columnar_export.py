@@ -0,0 +1,282 @@
+# modules/columnar_export.py
+# Export et import colonnaires (Parquet, Arrow IPC) des grands jeux de résultats :
+# scénarios (Monte Carlo, balayages), production mensuelle et séries horaires.
+# pyarrow est importé à la demande : il n'est requis que pour ces formats.
+
+import json
+import os
+import tempfile
+import zipfile
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, Optional, Tuple
+
+# Tables exportées, dans l'ordre : clé des résultats -> nom de la table
+TABLES = {
+    "scenarios": "scenarios",
+    "monthly_production": "monthly",
+    "hourly_production": "hourly",
+}
+
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+# Clé des métadonnées de schéma portant le contexte de la simulation
+METADATA_KEY = b"rhuma"
+
+ROW_GROUP_SIZE = 1_000_000
+
+def _pyarrow():
+    """Importe pyarrow, avec un message explicite s'il n'est pas installé"""
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError("L'export Parquet/Arrow nécessite le paquet pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+def _to_table(value: Any):
+    """Convertit des résultats (table, DataFrame, colonnes ou liste d'enregistrements) en table Arrow"""
+    pa = _pyarrow()
+    if isinstance(value, pa.Table):
+        return value
+    if hasattr(value, "to_records") and hasattr(value, "columns"):
+        return pa.Table.from_pandas(value, preserve_index=False)
+    if isinstance(value, dict):
+        return pa.table(dict(value))
+    return pa.Table.from_pylist(list(value))
+
+def result_tables(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Tables Arrow des résultats présents (sans copie pour les tableaux NumPy)
+
+    Args:
+        data (dict): Résultats de la simulation
+
+    Returns:
+        dict: Nom de table -> pyarrow.Table
+    """
+    pa = _pyarrow()
+    tables = {}
+    for key, name in TABLES.items():
+        value = data.get(key)
+        if value is None or len(value) == 0:
+            continue
+        if key == "monthly_production" and isinstance(value, dict):
+            tables[name] = pa.table({
+                "month": pa.array(list(value.keys()), pa.string()),
+                "production": pa.array([float(v) for v in value.values()], pa.float64()),
+            })
+        else:
+            tables[name] = _to_table(value)
+    return tables
+
+def _context(data: Dict[str, Any]) -> bytes:
+    """Contexte de la simulation (métadonnées, configuration, résultats scalaires) en JSON"""
+    from modules.export_schema import RESULT_FIELDS, SCHEMA_VERSION, result_value
+    from modules.state_manager import state_manager
+    context = {
+        "metadata": {**state_manager.get_metadata(), "export_timestamp": datetime.now().isoformat(),
+                     "schema_version": SCHEMA_VERSION},
+        "configuration": state_manager.get_configuration(),
+        "calculs": {field.key: result_value(data, field.key) for field in RESULT_FIELDS},
+    }
+    return json.dumps(context, ensure_ascii=False, default=lambda v: v.item() if hasattr(v, "item") else str(v)).encode("utf-8")
+
+def _path(directory: str, filename_prefix: str, name: str, fmt: str) -> str:
+    return os.path.join(directory, f"{filename_prefix}.{name}{FORMATS[fmt]}")
+
+def _prepared_tables(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Tables de résultats portant le contexte de la simulation dans leurs métadonnées"""
+    context = _context(data)
+    return {name: table.replace_schema_metadata({**(table.schema.metadata or {}), METADATA_KEY: context})
+            for name, table in result_tables(data).items()}
+
+def _write_table(table: Any, sink: Any, fmt: str, compression: Optional[str]) -> None:
+    """Écrit une table dans un chemin ou un fichier binaire"""
+    pa = _pyarrow()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        pq.write_table(table, sink, compression=compression or "zstd",
+                       write_statistics=True, row_group_size=ROW_GROUP_SIZE)
+    else:
+        options = pa.ipc.IpcWriteOptions(compression=compression)
+        with pa.ipc.new_file(sink, table.schema, options=options) as writer:
+            writer.write_table(table, max_chunksize=ROW_GROUP_SIZE)
+
+def export_columnar(data: Dict[str, Any], fmt: str = "parquet", filename_prefix: str = "simulation_rhum",
+                    directory: str = ".", compression: Optional[str] = None) -> Dict[str, str]:
+    """Exporte chaque table de résultats dans son propre fichier Parquet ou Arrow IPC
+
+    Args:
+        data (dict): Résultats de la simulation
+        fmt (str): "parquet" ou "arrow"
+        filename_prefix (str): Préfixe des fichiers ({prefix}.{table}.parquet)
+        directory (str): Dossier de destination
+        compression (str): Codec ; par défaut zstd pour Parquet et aucun pour Arrow,
+            afin que la relecture par memory map reste sans copie
+
+    Returns:
+        dict: Nom de table -> chemin du fichier écrit
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Format inconnu : {fmt} (attendu : {', '.join(FORMATS)})")
+    pa = _pyarrow()
+    written = {}
+    for name, table in _prepared_tables(data).items():
+        path = _path(directory, filename_prefix, name, fmt)
+        with pa.OSFile(path, "wb") as sink:
+            _write_table(table, sink, fmt, compression)
+        written[name] = path
+    return written
+
+def build_columnar_archive(data: Dict[str, Any], fmt: str = "parquet", filename_prefix: str = "simulation_rhum",
+                           compression: Optional[str] = None) -> BinaryIO:
+    """Archive ZIP des fichiers Parquet ou Arrow IPC, construite en mémoire (pour téléchargement)
+
+    Les tables sont écrites directement dans l'archive, sans compression ZIP
+    supplémentaire, sous les mêmes noms que export_columnar.
+
+    Returns:
+        Fichier binaire positionné au début, à fermer par l'appelant
+    """
+    from modules.export_pipeline import SPOOL_MAX_SIZE
+    if fmt not in FORMATS:
+        raise ValueError(f"Format inconnu : {fmt} (attendu : {', '.join(FORMATS)})")
+    archive = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_STORED) as zipf:
+        for name, table in _prepared_tables(data).items():
+            with zipf.open(_path("", filename_prefix, name, fmt), "w") as sink:
+                _write_table(table, sink, fmt, compression)
+    archive.seek(0)
+    return archive
+
+def export_to_parquet(data, filename_prefix="simulation_rhum", directory=".", compression="zstd"):
+    """Exporte les résultats au format Parquet (compressé, avec statistiques de colonnes)"""
+    return export_columnar(data, "parquet", filename_prefix, directory, compression)
+
+def export_to_arrow(data, filename_prefix="simulation_rhum", directory=".", compression=None):
+    """Exporte les résultats au format Arrow IPC (relisible par memory map)"""
+    return export_columnar(data, "arrow", filename_prefix, directory, compression)
+
+def _read_table(path: str, fmt: str):
+    """Relit une table : Arrow IPC par memory map (sans copie), Parquet décodé entièrement"""
+    pa = _pyarrow()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        return pq.read_table(path, memory_map=True)
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+def _read_buffer(raw: bytes, fmt: str):
+    """Relit une table depuis son contenu en mémoire (fichier d'une archive ZIP)"""
+    pa = _pyarrow()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        return pq.read_table(pa.BufferReader(raw))
+    return pa.ipc.open_file(pa.BufferReader(raw)).read_all()
+
+def _imported(tables: Dict[str, Any], missing: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Données importées à partir des tables relues (nom de table -> pyarrow.Table)"""
+    data = {}
+    context = None
+    for key, name in TABLES.items():
+        table = tables.get(name)
+        if table is None:
+            continue
+        if context is None and table.schema.metadata and METADATA_KEY in table.schema.metadata:
+            context = json.loads(table.schema.metadata[METADATA_KEY])
+        if key == "monthly_production":
+            columns = table.to_pydict()
+            data[key] = dict(zip(columns["month"], columns["production"]))
+        else:
+            data[key] = table
+    if not data:
+        return None, missing
+    if context is None:
+        return None, "Les fichiers ne contiennent pas le contexte de la simulation"
+    for key in TABLES:
+        data.setdefault(key, None)
+    return {**context, **data}, None
+
+def import_columnar(filename_prefix: str, fmt: str = "parquet",
+                    directory: str = ".") -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Importe un export Parquet ou Arrow IPC
+
+    Les tables restent au format Arrow (scénarios et séries horaires non convertis) ;
+    la production mensuelle est rendue sous forme de dictionnaire comme dans l'export JSON.
+
+    Args:
+        filename_prefix (str): Préfixe utilisé à l'export
+        fmt (str): "parquet" ou "arrow"
+        directory (str): Dossier des fichiers
+
+    Returns:
+        dict: Données importées (metadata, configuration, calculs et tables)
+        str: Message d'erreur si l'import échoue
+    """
+    try:
+        if fmt not in FORMATS:
+            return None, f"Format inconnu : {fmt}"
+        tables = {}
+        for name in TABLES.values():
+            path = _path(directory, filename_prefix, name, fmt)
+            if os.path.exists(path):
+                tables[name] = _read_table(path, fmt)
+        return _imported(tables, f"Aucun fichier {FORMATS[fmt]} trouvé pour {filename_prefix}")
+    except ImportError as e:
+        return None, str(e)
+    except Exception as e:
+        return None, f"Erreur lors de l'import : {str(e)}"
+
+def import_columnar_archive(source: Any) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Importe l'archive ZIP produite par build_columnar_archive (bouton Parquet ou Arrow)
+
+    Le format est reconnu à l'extension des fichiers de l'archive.
+
+    Args:
+        source: Chemin ou fichier binaire (par exemple le fichier d'un st.file_uploader)
+
+    Returns:
+        dict: Données importées (voir import_columnar)
+        str: Message d'erreur si l'import échoue
+    """
+    try:
+        tables = {}
+        with zipfile.ZipFile(source) as zipf:
+            for member in zipf.namelist():
+                stem, extension = os.path.splitext(member)
+                fmt = next((fmt for fmt, suffix in FORMATS.items() if suffix == extension), None)
+                name = stem.rsplit(".", 1)[-1]
+                if fmt is not None and name in TABLES.values():
+                    tables[name] = _read_buffer(zipf.read(member), fmt)
+        return _imported(tables, "L'archive ne contient aucun fichier Parquet ou Arrow")
+    except zipfile.BadZipFile:
+        return None, "Le fichier n'est pas une archive ZIP valide"
+    except ImportError as e:
+        return None, str(e)
+    except Exception as e:
+        return None, f"Erreur lors de l'import : {str(e)}"
+
+def import_from_parquet(filename_prefix, directory="."):
+    """Importe un export Parquet (voir import_columnar)"""
+    return import_columnar(filename_prefix, "parquet", directory)
+
+def import_from_arrow(filename_prefix, directory="."):
+    """Importe un export Arrow IPC par memory map (voir import_columnar)"""
+    return import_columnar(filename_prefix, "arrow", directory)
+
+def column_statistics(path: str) -> Dict[str, Dict[str, Any]]:
+    """Statistiques par colonne d'un fichier Parquet (min, max, valeurs nulles), lues dans le pied de fichier"""
+    import pyarrow.parquet as pq
+    metadata = pq.ParquetFile(path).metadata
+    stats: Dict[str, Dict[str, Any]] = {}
+    for group in range(metadata.num_row_groups):
+        row_group = metadata.row_group(group)
+        for index in range(row_group.num_columns):
+            column = row_group.column(index)
+            if column.statistics is None or not column.statistics.has_min_max:
+                continue
+            entry = stats.setdefault(column.path_in_schema, {"min": column.statistics.min,
+                                                             "max": column.statistics.max, "null_count": 0})
+            entry["min"] = min(entry["min"], column.statistics.min)
+            entry["max"] = max(entry["max"], column.statistics.max)
+            entry["null_count"] += column.statistics.null_count
+    return stats
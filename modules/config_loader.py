@@ -0,0 +1,113 @@
+from typing import Dict, Any, Optional, Mapping, List
+from dataclasses import dataclass
+from types import MappingProxyType
+import os
+import threading
+import time
+from dotenv import dotenv_values, find_dotenv
+from modules.attributes import ATTRIBUTE_CONFIGS, AttributeConfig
+from modules.state_fingerprint import StateFingerprint
+
+# Anciens noms de variables d'environnement encore présents dans les fichiers .env
+ENV_ALIASES = {
+    'autoconsommation_fixe': ['RHUMA_AUTOCONSOOMMATION_FIXE'],
+    'autoconsommation_tracking': ['RHUMA_AUTOCONSOOMMATION_TRACKING'],
+}
+
+_TRUE_VALUES = ('1', 'true', 'yes', 'oui', 'on')
+
+@dataclass(frozen=True)
+class ConfigDefaults:
+    """Couche de valeurs par défaut immuable, partagée par toutes les sessions"""
+    configuration: Mapping[str, Any]
+    metadata: Mapping[str, Any]
+    env: Mapping[str, str]
+    fingerprint: StateFingerprint
+    timings: Mapping[str, float]
+    warnings: tuple
+
+def env_name(key: str) -> str:
+    """Nom de la variable d'environnement d'un attribut (ex. pv_serre -> RHUMA_PV_SERRE)"""
+    return f"RHUMA_{key.upper()}"
+
+def _convert(raw: str, config: AttributeConfig) -> Any:
+    """Convertit une valeur texte vers le type de l'attribut et applique ses bornes"""
+    if config.type is bool:
+        value = raw.strip().lower() in _TRUE_VALUES
+    elif config.type is int:
+        value = int(float(raw))
+    else:
+        value = config.type(raw)
+    if config.min is not None and value < config.min:
+        value = config.min
+    if config.max is not None and value > config.max:
+        value = config.max
+    return value
+
+def load_configuration(dotenv_path: Optional[str] = None) -> ConfigDefaults:
+    """Lit l'environnement et le fichier .env une seule fois et les résout contre ATTRIBUTE_CONFIGS
+
+    Les variables du fichier .env absentes de l'environnement y sont ajoutées, comme le
+    faisait load_dotenv(), pour les modules qui lisent encore os.environ directement.
+
+    Args:
+        dotenv_path (str): Chemin du fichier .env (recherché depuis le répertoire courant par défaut)
+
+    Returns:
+        ConfigDefaults: Valeurs par défaut figées et durées de chargement (ms)
+    """
+    start = time.perf_counter()
+
+    # 1. Variables d'environnement (.env puis environnement du processus, qui est prioritaire)
+    path = dotenv_path if dotenv_path is not None else find_dotenv(usecwd=True)
+    file_values = {k: v for k, v in dotenv_values(path).items() if v is not None} if path else {}
+    for name, value in file_values.items():
+        os.environ.setdefault(name, value)
+    env = {**file_values, **os.environ}
+    env_done = time.perf_counter()
+
+    # 2. Résolution contre le schéma des attributs
+    configuration: Dict[str, Any] = {}
+    warnings: List[str] = []
+    for key, config in ATTRIBUTE_CONFIGS.items():
+        value = config.default
+        for name in [env_name(key)] + ENV_ALIASES.get(key, []):
+            if name in env:
+                try:
+                    value = _convert(env[name], config)
+                except (TypeError, ValueError):
+                    warnings.append(f"{name}={env[name]!r} ignorée : type attendu {config.type.__name__}")
+                break
+        configuration[key] = value
+    metadata = {"language": env.get('RHUMA_LANGUAGE', 'fr')}
+    fingerprint = StateFingerprint(configuration, {key: config.category for key, config in ATTRIBUTE_CONFIGS.items()})
+    resolve_done = time.perf_counter()
+
+    return ConfigDefaults(
+        configuration=MappingProxyType(configuration),
+        metadata=MappingProxyType(metadata),
+        env=MappingProxyType(env),
+        fingerprint=fingerprint,
+        timings=MappingProxyType({
+            "env_ms": (env_done - start) * 1000,
+            "resolve_ms": (resolve_done - env_done) * 1000,
+            "total_ms": (resolve_done - start) * 1000
+        }),
+        warnings=tuple(warnings)
+    )
+
+_defaults: Optional[ConfigDefaults] = None
+_defaults_lock = threading.Lock()
+
+def get_defaults() -> ConfigDefaults:
+    """Retourne la couche de valeurs par défaut, chargée au premier appel du processus"""
+    global _defaults
+    if _defaults is None:
+        with _defaults_lock:
+            if _defaults is None:
+                _defaults = load_configuration()
+    return _defaults
+
+def get_env(name: str, default: Any = None) -> Any:
+    """Lit une variable d'environnement depuis la couche chargée (sans relire le .env)"""
+    return get_defaults().env.get(name, default)
@@ -0,0 +1,99 @@
+# modules/documentation.py
+# Onglets de documentation : fichiers Markdown lus une fois par processus,
+# relus seulement si le fichier a changé, et rendus à la demande.
+
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+import streamlit as st
+
+DOCS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "docs")
+
+# Onglets affichés : libellé -> fichier Markdown (None pour la simulation 3D)
+DOCUMENTATION_TABS = {
+    "Crowdfunding": "crowdfunding.md",
+    "Documentation technique": "ARCHITECTURE.md",
+    "Guide utilisateur": "user_guide.md",
+    "Simulation 3D du Tracker": None,
+}
+
+HIDDEN_TAB = "Masquer"
+
+@dataclass(frozen=True)
+class MarkdownDocument:
+    """Contenu d'un fichier Markdown et son rendu HTML (si le paquet markdown est installé)"""
+    text: str
+    html: Optional[str]
+
+_cache: Dict[str, Tuple[Tuple[float, int], MarkdownDocument]] = {}
+_cache_lock = threading.Lock()
+
+def _render_html(text: str) -> Optional[str]:
+    """Pré-rend le Markdown en HTML, None si le paquet markdown n'est pas installé"""
+    try:
+        import markdown
+    except ImportError:
+        return None
+    return markdown.markdown(text, extensions=['tables', 'fenced_code'])
+
+def load_markdown(markdown_file: str) -> MarkdownDocument:
+    """Lit un fichier Markdown via le cache du processus (invalidé par mtime et taille)
+
+    Args:
+        markdown_file (str): Chemin du fichier
+
+    Returns:
+        MarkdownDocument: Texte et HTML pré-rendu, ou message d'erreur si la lecture échoue
+    """
+    try:
+        stat = os.stat(markdown_file)
+    except OSError as e:
+        return MarkdownDocument(f"Erreur lors de la lecture du fichier: {str(e)}", None)
+    version = (stat.st_mtime, stat.st_size)
+    cached = _cache.get(markdown_file)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    with _cache_lock:
+        cached = _cache.get(markdown_file)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        try:
+            with open(markdown_file, 'r', encoding='utf-8') as f:
+                text = f.read()
+        except Exception as e:
+            return MarkdownDocument(f"Erreur lors de la lecture du fichier: {str(e)}", None)
+        document = MarkdownDocument(text, _render_html(text))
+        _cache[markdown_file] = (version, document)
+        return document
+
+def read_markdown_file(markdown_file: str) -> str:
+    """Lire et retourner le contenu d'un fichier Markdown."""
+    return load_markdown(markdown_file).text
+
+def render_markdown(markdown_file: str) -> None:
+    """Affiche un fichier Markdown, en HTML pré-rendu quand il est disponible"""
+    document = load_markdown(markdown_file)
+    if document.html is not None:
+        st.markdown(document.html, unsafe_allow_html=True)
+    else:
+        st.markdown(document.text)
+
+def documentation_section(docs_dir: str = DOCS_DIR) -> None:
+    """Affiche le sélecteur de documentation ; seul l'onglet choisi est lu et rendu"""
+    choice = st.radio(
+        "Documentation",
+        [HIDDEN_TAB] + list(DOCUMENTATION_TABS),
+        horizontal=True,
+        label_visibility="collapsed",
+        key="documentation_tab"
+    )
+    if choice == HIDDEN_TAB:
+        return
+    filename = DOCUMENTATION_TABS[choice]
+    if filename is None:
+        # Import différé : le modèle 3D n'est chargé que si l'onglet est ouvert
+        from modules.solar_tracker_3d import solar_tracker_3d_section
+        solar_tracker_3d_section()
+    else:
+        render_markdown(os.path.join(docs_dir, filename))
@@ -0,0 +1,224 @@
+# modules/export_index.py
+# Index SQLite des exports de simulation archivés (.zip / .json) : les fichiers sont
+# analysés en parallèle (pool de processus), l'index n'est mis à jour que pour les
+# fichiers nouveaux ou modifiés (mtime, taille) et se consulte par critères.
+
+import fnmatch
+import json
+import os
+import sqlite3
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from modules.export_schema import CONFIGURATION_FIELDS, RESULT_FIELDS, migrate
+
+DEFAULT_PATTERNS = ("*.zip", "*.json")
+
+# En dessous de ce nombre de fichiers à analyser, le pool de processus coûte plus qu'il ne rapporte
+POOL_THRESHOLD = 16
+
+METADATA_COLUMNS = ("id", "label", "version", "timestamp", "schema_version")
+
+# Colonnes numériques : configuration et résultats du schéma d'export
+NUMERIC_COLUMNS = tuple(
+    field.key for field in CONFIGURATION_FIELDS + RESULT_FIELDS
+    if set(field.types) <= {int, float}
+)
+
+COLUMNS = ("path", "mtime", "size", "error") + METADATA_COLUMNS + NUMERIC_COLUMNS
+
+# Colonnes indexées (critères de recherche usuels)
+INDEXED_COLUMNS = ("pv_serre", "pv_sol", "surface_canne", "roi", "benefice_net", "production_totale", "timestamp")
+
+_OPERATORS = {
+    "eq": "= ?",
+    "ne": "!= ?",
+    "gt": "> ?",
+    "gte": ">= ?",
+    "lt": "< ?",
+    "lte": "<= ?",
+    "contains": "LIKE '%' || ? || '%'",
+    "isnull": None,
+    "in": None,
+}
+
+def _read_export(path: str) -> Dict[str, Any]:
+    """Lit le JSON d'un export (directement ou dans l'archive ZIP)"""
+    if path.endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            names = [name for name in archive.namelist() if name.endswith(".json") and "/" not in name]
+            if not names:
+                raise ValueError("Aucun fichier JSON dans l'archive")
+            with archive.open(names[0]) as f:
+                return json.load(f)
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return value
+
+def scan_file(path: str) -> Dict[str, Any]:
+    """
+    Extrait la ligne d'index d'un export (exécuté dans les processus du pool)
+
+    Returns:
+        dict: Colonnes de l'index ; "error" renseigné si le fichier n'a pas pu être lu
+    """
+    stat = os.stat(path)
+    row: Dict[str, Any] = {"path": path, "mtime": stat.st_mtime, "size": stat.st_size, "error": None}
+    try:
+        data = migrate(_read_export(path))
+        metadata = data.get("metadata") or {}
+        configuration = data.get("configuration") or {}
+        results = data.get("calculs") or {}
+        for column in METADATA_COLUMNS:
+            value = metadata.get(column)
+            row[column] = value if value is None or isinstance(value, (int, float)) else str(value)
+        for column in NUMERIC_COLUMNS:
+            value = configuration.get(column, results.get(column))
+            row[column] = _number(value)
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+    return row
+
+class ExportIndex:
+    """Index des exports d'une ou plusieurs archives, persistant dans une base SQLite"""
+
+    def __init__(self, db_path: str = "exports_index.sqlite"):
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path)
+        self.connection.row_factory = sqlite3.Row
+        self._create_schema()
+
+    def _create_schema(self) -> None:
+        """Crée la table (ou ajoute les colonnes apparues dans le schéma d'export)"""
+        numeric = ", ".join(f'"{column}" REAL' for column in NUMERIC_COLUMNS)
+        with self.connection:
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS runs (path TEXT PRIMARY KEY, mtime REAL, size INTEGER, error TEXT, '
+                f'id TEXT, label TEXT, version TEXT, timestamp TEXT, schema_version INTEGER, {numeric})'
+            )
+            existing = {row["name"] for row in self.connection.execute("PRAGMA table_info(runs)")}
+            for column in NUMERIC_COLUMNS:
+                if column not in existing:
+                    self.connection.execute(f'ALTER TABLE runs ADD COLUMN "{column}" REAL')
+            for column in INDEXED_COLUMNS:
+                self.connection.execute(f'CREATE INDEX IF NOT EXISTS "runs_{column}" ON runs ("{column}")')
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> "ExportIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @staticmethod
+    def _list_files(directory: str, patterns: Iterable[str], recursive: bool) -> Dict[str, Tuple[float, int]]:
+        files = {}
+        patterns = tuple(patterns)
+        for root, dirs, names in os.walk(directory):
+            for name in names:
+                if any(fnmatch.fnmatch(name, pattern) for pattern in patterns):
+                    path = os.path.join(root, name)
+                    stat = os.stat(path)
+                    files[path] = (stat.st_mtime, stat.st_size)
+            if not recursive:
+                break
+        return files
+
+    def update(self, directory: str, patterns: Iterable[str] = DEFAULT_PATTERNS, recursive: bool = False,
+               workers: Optional[int] = None) -> Dict[str, int]:
+        """
+        Met à jour l'index : seuls les fichiers nouveaux ou modifiés sont relus
+
+        Args:
+            directory (str): Dossier des exports
+            patterns (tuple): Motifs des fichiers à indexer
+            recursive (bool): Parcourir aussi les sous-dossiers
+            workers (int): Nombre de processus (par défaut, le nombre de cœurs)
+
+        Returns:
+            dict: Nombre de fichiers ajoutés, mis à jour, supprimés, inchangés et en erreur
+        """
+        directory = os.path.abspath(directory)
+        files = self._list_files(directory, patterns, recursive)
+        prefix = os.path.join(directory, "")
+        known = {row["path"]: (row["mtime"], row["size"]) for row in self.connection.execute(
+            "SELECT path, mtime, size FROM runs WHERE substr(path, 1, ?) = ?", (len(prefix), prefix))}
+        if not recursive:
+            known = {path: version for path, version in known.items() if os.path.dirname(path) == directory}
+
+        changed = sorted(path for path, version in files.items() if known.get(path) != version)
+        removed = [path for path in known if path not in files]
+
+        if len(changed) >= POOL_THRESHOLD:
+            processes = workers or os.cpu_count() or 1
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                rows = list(pool.map(scan_file, changed, chunksize=max(1, len(changed) // (4 * processes))))
+        else:
+            rows = [scan_file(path) for path in changed]
+
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        columns = ", ".join(f'"{column}"' for column in COLUMNS)
+        with self.connection:
+            self.connection.executemany("DELETE FROM runs WHERE path = ?", ((path,) for path in removed))
+            self.connection.executemany(f"INSERT OR REPLACE INTO runs ({columns}) VALUES ({placeholders})",
+                                        ([row.get(column) for column in COLUMNS] for row in rows))
+        return {
+            "added": sum(1 for path in changed if path not in known),
+            "updated": sum(1 for path in changed if path in known),
+            "removed": len(removed),
+            "unchanged": len(files) - len(changed),
+            "errors": sum(1 for row in rows if row["error"]),
+        }
+
+    def query(self, order_by: Optional[str] = None, limit: Optional[int] = None,
+              include_errors: bool = False, **filters: Any) -> List[Dict[str, Any]]:
+        """
+        Recherche des exécutions par critères, ex. query(pv_serre__gt=300, roi__gt=10)
+
+        Opérateurs : eq (par défaut), ne, gt, gte, lt, lte, contains, in, isnull.
+        order_by accepte un préfixe "-" pour l'ordre décroissant.
+
+        Returns:
+            list: Lignes de l'index (dictionnaires)
+        """
+        clauses, params = [], []
+        if not include_errors:
+            clauses.append("error IS NULL")
+        for name, value in filters.items():
+            column, _, operator = name.partition("__")
+            operator = operator or "eq"
+            if column not in COLUMNS:
+                raise KeyError(f"Colonne inconnue : {column}")
+            if operator not in _OPERATORS:
+                raise ValueError(f"Opérateur inconnu : {operator}")
+            if operator == "in":
+                values = list(value)
+                clauses.append(f'"{column}" IN ({", ".join("?" for _ in values)})' if values else "0")
+                params.extend(values)
+            elif operator == "isnull":
+                clauses.append(f'"{column}" IS {"" if value else "NOT "}NULL')
+            else:
+                clauses.append(f'"{column}" {_OPERATORS[operator]}')
+                params.append(value)
+        sql = "SELECT * FROM runs"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        if order_by:
+            column = order_by.lstrip("-")
+            if column not in COLUMNS:
+                raise KeyError(f"Colonne inconnue : {column}")
+            sql += f' ORDER BY "{column}" {"DESC" if order_by.startswith("-") else "ASC"}'
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return [dict(row) for row in self.connection.execute(sql, params)]
+
+    def count(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
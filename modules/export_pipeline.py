@@ -0,0 +1,270 @@
+# modules/export_pipeline.py
+# Export complet en une seule passe : les données sont parcourues une fois et chaque
+# ligne alimente en même temps les écritures JSON, CSV, Excel et .env, directement
+# dans une archive ZIP en mémoire (sans fichier ni dossier temporaire).
+
+import csv
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from modules.export_schema import (CONFIGURATION_FIELDS, METADATA_FIELDS, RESULT_FIELDS, SCHEMA_VERSION,
+                                   result_value)
+from modules.state_manager import rhuma
+
+# Au-delà de cette taille, les tampons débordent dans un fichier anonyme (supprimé à la fermeture)
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+# Formats produits dans l'archive
+FORMATS = ("json", "csv", "xlsx", "env")
+
+@dataclass(frozen=True)
+class ExportSection:
+    """Bloc de l'export : une clé JSON, un fichier CSV et une feuille Excel"""
+    name: str                   # clé dans le JSON
+    filename: str               # suffixe du fichier CSV
+    title: str                  # nom de la feuille Excel
+    fields: Tuple[str, ...]     # colonnes (CSV, Excel, objets JSON)
+    headers: Tuple[str, ...]    # en-têtes affichés
+    rows: Iterable[tuple]       # lignes produites à la demande
+    keyed: bool = True          # JSON : objet {ligne[0]: ligne[-1]} plutôt que liste d'objets
+
+def _scalar(value: Any) -> Any:
+    """Convertit les scalaires NumPy en types Python natifs"""
+    return value.item() if hasattr(value, 'item') else value
+
+def _cell(value: Any) -> Any:
+    """Valeur acceptée par une cellule Excel (les structures sont converties en texte)"""
+    value = _scalar(value)
+    return value if value is None or isinstance(value, (bool, int, float, str)) else str(value)
+
+def iter_sections(data: Dict[str, Any]) -> Iterator[ExportSection]:
+    """Parcourt les données à exporter, section par section, sans les copier"""
+    generated = {"export_timestamp": datetime.now().isoformat(), "schema_version": SCHEMA_VERSION}
+    yield ExportSection("metadata", "configuration", "Configuration",
+                        ("key", "label", "value"), ("Clé", "Paramètre", "Valeur"),
+                        ((field.key, field.label, generated[field.key] if field.key in generated else rhuma(field.key))
+                         for field in METADATA_FIELDS))
+    yield ExportSection("configuration", "parameters", "Paramètres",
+                        ("key", "label", "value"), ("Clé", "Paramètre", "Valeur"),
+                        ((field.key, field.label, rhuma(field.key)) for field in CONFIGURATION_FIELDS))
+    yield ExportSection("calculs", "results", "Résultats",
+                        ("key", "label", "value"), ("Clé", "Résultat", "Valeur"),
+                        ((field.key, field.label, result_value(data, field.key)) for field in RESULT_FIELDS))
+    yield ExportSection("monthly_production", "monthly_production", "Production mensuelle",
+                        ("month", "production"), ("Mois", "Production (kWh)"),
+                        data.get("monthly_production", {}).items())
+    yield ExportSection("scenarios", "scenarios", "Scénarios",
+                        ("id", "name", "description", "value"), ("N°", "Scénario", "Description", "Valeur"),
+                        ((idx + 1, scenario.get("nom", ""), scenario.get("description", ""), scenario.get("valeur"))
+                         for idx, scenario in enumerate(data.get("scenarios", []))),
+                        keyed=False)
+
+class _JsonWriter:
+    """Écrit le JSON au fil des lignes (indentation de 4 espaces, une ligne par enregistrement)"""
+
+    def __init__(self, target: Optional[BinaryIO] = None):
+        self.buffer = target if target is not None else tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        self.out = io.TextIOWrapper(self.buffer, encoding='utf-8', newline='\n')
+        self.out.write("{")
+        self.first_section = True
+        self.first_row = True
+
+    @staticmethod
+    def _dump(value: Any) -> str:
+        return json.dumps(value, ensure_ascii=False, default=_scalar)
+
+    def begin(self, section: ExportSection) -> None:
+        self.out.write(("\n" if self.first_section else ",\n") + f"    {self._dump(section.name)}: ")
+        self.out.write("{" if section.keyed else "[")
+        self.first_section = False
+        self.first_row = True
+
+    def row(self, section: ExportSection, values: tuple) -> None:
+        self.out.write("\n" if self.first_row else ",\n")
+        self.first_row = False
+        if section.keyed:
+            self.out.write(f"        {self._dump(str(values[0]))}: {self._dump(values[-1])}")
+        else:
+            self.out.write(f"        {self._dump(dict(zip(section.fields, values)))}")
+
+    def end(self, section: ExportSection) -> None:
+        closing = "}" if section.keyed else "]"
+        self.out.write(closing if self.first_row else f"\n    {closing}")
+
+    def finish(self) -> BinaryIO:
+        self.out.write("\n}\n")
+        self.out.flush()
+        self.out.detach()
+        return self.buffer
+
+class _CsvWriter:
+    """Écrit chaque section directement dans son entrée CSV de l'archive"""
+
+    def __init__(self, zipf: zipfile.ZipFile, filename_prefix: str):
+        self.zipf = zipf
+        self.filename_prefix = filename_prefix
+        self.entry = None
+        self.writer = None
+
+    def begin(self, section: ExportSection) -> None:
+        name = f"csv/{self.filename_prefix}_{section.filename}.csv"
+        self.entry = io.TextIOWrapper(self.zipf.open(name, 'w'), encoding='utf-8', newline='')
+        self.writer = csv.writer(self.entry)
+        self.writer.writerow(section.headers)
+
+    def row(self, section: ExportSection, values: tuple) -> None:
+        self.writer.writerow(values)
+
+    def end(self, section: ExportSection) -> None:
+        self.entry.close()
+        self.entry = self.writer = None
+
+class _ExcelWriter:
+    """Classeur en écriture seule : une feuille par section, lignes ajoutées en flux"""
+
+    def __init__(self):
+        from modules.xlsx_export import StreamingWorkbook
+        self.book = StreamingWorkbook()
+        self.sheet = None
+
+    def begin(self, section: ExportSection) -> None:
+        self.sheet = self.book.sheet(section.title)
+        self.book.append_header(self.sheet, section.headers)
+
+    def row(self, section: ExportSection, values: tuple) -> None:
+        self.sheet.append([_cell(value) for value in values])
+
+    def end(self, section: ExportSection) -> None:
+        self.sheet = None
+
+    def finish(self) -> BinaryIO:
+        buffer = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        self.book.save(buffer)
+        return buffer
+
+class _EnvWriter:
+    """Fichier .env (sans les secrets) : identifiants et paramètres numériques"""
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def begin(self, section: ExportSection) -> None:
+        pass
+
+    def row(self, section: ExportSection, values: tuple) -> None:
+        key, value = values[0], _scalar(values[-1])
+        if section.name == "metadata" and key in ("id", "label", "version"):
+            self.lines.append(f"RHUMA_{key.upper()}={value}\n")
+        elif section.name == "configuration" and isinstance(value, (int, float)):
+            self.lines.append(f"RHUMA_{key.upper()}={value}\n")
+
+    def end(self, section: ExportSection) -> None:
+        pass
+
+    def finish(self) -> str:
+        return "".join(self.lines)
+
+def _copy_entry(zipf: zipfile.ZipFile, name: str, buffer: BinaryIO) -> None:
+    """Copie un tampon dans une entrée de l'archive, par blocs"""
+    buffer.seek(0)
+    with zipf.open(name, 'w') as entry:
+        shutil.copyfileobj(buffer, entry)
+    buffer.close()
+
+def _walk(data: Dict[str, Any], writers: tuple) -> None:
+    """Parcours unique des données : chaque ligne est transmise à tous les écrivains"""
+    for section in iter_sections(data):
+        for writer in writers:
+            writer.begin(section)
+        for values in section.rows:
+            for writer in writers:
+                writer.row(section, values)
+        for writer in writers:
+            writer.end(section)
+
+def write_export_json(data: Dict[str, Any], fileobj: BinaryIO) -> None:
+    """Écrit l'export JSON seul dans un fichier binaire ouvert"""
+    writer = _JsonWriter(fileobj)
+    _walk(data, (writer,))
+    writer.finish()
+
+def write_export_archive(data: Dict[str, Any], fileobj: BinaryIO,
+                         filename_prefix: str = "simulation_rhum", formats: Tuple[str, ...] = FORMATS) -> None:
+    """Écrit l'archive ZIP (JSON, Excel, CSV, .env) dans un fichier ouvert
+
+    Args:
+        data (dict): Résultats de la simulation
+        fileobj: Fichier binaire ouvert en écriture (BytesIO, fichier temporaire, réponse HTTP...)
+        filename_prefix (str): Préfixe des entrées de l'archive
+        formats (tuple): Formats à inclure, parmi FORMATS
+    """
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        raise ValueError(f"Formats inconnus : {', '.join(sorted(unknown))}")
+    with zipfile.ZipFile(fileobj, 'w', compression=zipfile.ZIP_DEFLATED) as zipf:
+        json_writer = _JsonWriter() if "json" in formats else None
+        excel_writer = _ExcelWriter() if "xlsx" in formats else None
+        env_writer = _EnvWriter() if "env" in formats else None
+        csv_writer = _CsvWriter(zipf, filename_prefix) if "csv" in formats else None
+        _walk(data, tuple(w for w in (json_writer, csv_writer, excel_writer, env_writer) if w is not None))
+        if json_writer is not None:
+            _copy_entry(zipf, f"{filename_prefix}.json", json_writer.finish())
+        if excel_writer is not None:
+            _copy_entry(zipf, f"{filename_prefix}.xlsx", excel_writer.finish())
+        if env_writer is not None:
+            zipf.writestr(f"{filename_prefix}.env", env_writer.finish())
+
+def build_export_archive(data: Dict[str, Any], filename_prefix: str = "simulation_rhum",
+                         max_size: Optional[int] = SPOOL_MAX_SIZE, formats: Tuple[str, ...] = FORMATS) -> BinaryIO:
+    """Construit l'archive d'export dans un fichier en mémoire (débordant sur disque au-delà de max_size)
+
+    Returns:
+        Fichier binaire positionné au début, à fermer par l'appelant
+    """
+    archive = tempfile.SpooledTemporaryFile(max_size=max_size or 0)
+    write_export_archive(data, archive, filename_prefix, formats)
+    archive.seek(0)
+    return archive
+
+class SpooledReader(io.RawIOBase):
+    """Vue en lecture seule d'un fichier binaire, par ses seules méthodes publiques seek/read
+
+    st.download_button accepte un io.RawIOBase (qu'il relit depuis le début) mais pas
+    un SpooledTemporaryFile : cette vue lui transmet l'archive sans la copier d'abord
+    en bytes, qu'elle soit encore en mémoire ou débordée sur disque.
+    """
+
+    def __init__(self, archive: BinaryIO):
+        super().__init__()
+        self.archive = archive
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self.archive.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self.archive.tell()
+
+    def readinto(self, buffer) -> int:
+        data = self.archive.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def readall(self) -> bytes:
+        return self.archive.read()
+
+def download_file(archive: BinaryIO) -> BinaryIO:
+    """Archive positionnée au début, à passer telle quelle à st.download_button (voir SpooledReader)"""
+    archive.seek(0)
+    return SpooledReader(archive)
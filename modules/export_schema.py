@@ -0,0 +1,253 @@
+# modules/export_schema.py
+# Schéma d'export déclaratif, généré à partir d'ATTRIBUTE_CONFIGS et RESULT_CONFIGS :
+# sections et champs exportés, version du schéma, migrations chaînées des anciens
+# exports et validation en une seule passe.
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from modules.attributes import ATTRIBUTE_CONFIGS, RESULT_CONFIGS, AttributeConfig
+
+# Version courante du schéma (metadata.schema_version)
+SCHEMA_VERSION = 3
+
+# Exports antérieurs au champ schema_version : metadata.version -> version du schéma
+LEGACY_VERSIONS = {"0.1.0": 0, "0.2.0": 1, "1.0.0": 2}
+
+@dataclass(frozen=True)
+class SchemaField:
+    """Champ exporté : clé, libellé affiché et types acceptés"""
+    key: str
+    label: str
+    types: Tuple[type, ...]
+
+def _types(expected: type) -> Tuple[type, ...]:
+    """Types acceptés pour un attribut (un entier est accepté pour un réel)"""
+    return (int, float) if expected is float else (expected,)
+
+def _label(config: AttributeConfig) -> str:
+    return f"{config.user_label} ({config.unit})" if config.unit else config.user_label
+
+METADATA_FIELDS = tuple(
+    SchemaField(key, config.user_label, _types(config.type))
+    for key, config in ATTRIBUTE_CONFIGS.items() if config.category == "Métadonnées"
+) + (
+    SchemaField("timestamp", "Timestamp", (str,)),
+    SchemaField("export_timestamp", "Export", (str,)),
+    SchemaField("schema_version", "Version du schéma", (int,)),
+)
+
+CONFIGURATION_FIELDS = tuple(
+    SchemaField(key, _label(config), _types(config.type))
+    for key, config in ATTRIBUTE_CONFIGS.items() if config.category != "Métadonnées"
+)
+
+# Résultats dérivés, insérés après le résultat dont ils dépendent
+_DERIVED_RESULTS = {
+    "production_au_sol": (SchemaField("production_totale", "Production totale (kWh)", (int, float)),),
+    "revenu_rhum": (SchemaField("revenu_total", "Revenu total (€)", (int, float)),),
+}
+
+# Résultats structurés exportés comme un champ par sous-clé
+_EXPANDED_RESULTS = {
+    "couts_annuels": ("maintenance", "assurance", "production"),
+}
+
+def _result_fields() -> Tuple[SchemaField, ...]:
+    fields: List[SchemaField] = []
+    for key, config in RESULT_CONFIGS.items():
+        if key in _EXPANDED_RESULTS:
+            fields.extend(SchemaField(f"cout_annuel_{part}", f"Coût annuel {part} ({config.unit})", (int, float))
+                          for part in _EXPANDED_RESULTS[key])
+        elif config.type is float:
+            fields.append(SchemaField(key, _label(config), _types(config.type)))
+            fields.extend(_DERIVED_RESULTS.get(key, ()))
+    return tuple(fields)
+
+RESULT_FIELDS = _result_fields()
+
+def result_value(data: Dict[str, Any], key: str) -> Any:
+    """Valeur d'un champ de résultat, y compris les totaux et coûts annuels dérivés"""
+    if key == "production_totale":
+        return data.get("production_pv", 0) + data.get("production_au_sol", 0)
+    if key == "revenu_total":
+        return data.get("revenu_pv", 0) + data.get("revenu_rhum", 0)
+    if key.startswith("cout_annuel_"):
+        return (data.get("couts_annuels") or {}).get(key[len("cout_annuel_"):], 0)
+    return data.get(key, 0)
+
+# Sections de l'export : nom -> type attendu
+SECTIONS = {
+    "metadata": dict,
+    "configuration": dict,
+    "calculs": dict,
+    "monthly_production": dict,
+    "scenarios": list,
+}
+
+# Types attendus par champ, précalculés pour la validation
+_FIELD_TYPES: Dict[str, Dict[str, Tuple[type, ...]]] = {
+    "metadata": {field.key: field.types for field in METADATA_FIELDS},
+    "configuration": {field.key: field.types for field in CONFIGURATION_FIELDS},
+    "calculs": {field.key: field.types for field in RESULT_FIELDS},
+}
+
+def _matches(value: Any, types: Tuple[type, ...]) -> bool:
+    # bool est une sous-classe d'int : il n'est accepté que si le champ est booléen
+    if isinstance(value, bool):
+        return bool in types
+    return isinstance(value, types)
+
+def validate(data: Any) -> List[str]:
+    """
+    Vérifie un export en une seule passe sur ses sections et ses champs
+
+    Les champs inconnus sont tolérés (exports produits par une version plus récente
+    des attributs) ; les valeurs nulles sont acceptées.
+
+    Returns:
+        list: Messages d'erreur (vide si l'export est valide)
+    """
+    if not isinstance(data, dict):
+        return ["L'export doit être un objet JSON"]
+    errors = []
+    for section, expected in SECTIONS.items():
+        if section not in data:
+            errors.append(f"Section manquante : {section}")
+            continue
+        content = data[section]
+        if not isinstance(content, expected):
+            errors.append(f"La section {section} doit être de type {expected.__name__}")
+            continue
+        types = _FIELD_TYPES.get(section)
+        if types is not None:
+            for key, value in content.items():
+                field_types = types.get(key)
+                if field_types is not None and value is not None and not _matches(value, field_types):
+                    errors.append(f"{section}.{key} : type {type(value).__name__} invalide")
+        elif section == "monthly_production":
+            for month, value in content.items():
+                if not _matches(value, (int, float)):
+                    errors.append(f"monthly_production.{month} : valeur non numérique")
+        else:
+            for index, scenario in enumerate(content):
+                if not isinstance(scenario, dict):
+                    errors.append(f"scenarios[{index}] : objet attendu")
+    return errors
+
+def adapt_from_v0_1_0(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Adapte les données de la version 0.1.0 à la version 0.2.0"""
+    if 'old_parameter' in data:
+        data['new_parameter'] = data.pop('old_parameter')
+    return data
+
+def adapt_from_v0_2_0(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Adapte les données de la version 0.2.0 à la version 1.0.0 (structure inchangée)"""
+    return data
+
+# Anciens résultats imbriqués (export JSON "results" ou export CSV "calculs") -> champ du schéma
+_NESTED_RESULTS = {
+    ("production", "pv_serre"): "production_pv",
+    ("production", "pv_sol"): "production_au_sol",
+    ("production", "total"): "production_totale",
+    ("production", "autoconsommation"): "autoconsommation",
+    ("production", "revente"): "revente",
+    ("revenus", "pv"): "revenu_pv",
+    ("revenus", "rhum"): "revenu_rhum",
+    ("revenus", "total"): "revenu_total",
+    ("costs", "initial", "pv"): "cout_pv",
+    ("costs", "initial", "serre"): "cout_serre",
+    ("costs", "initial", "total"): "cout_total",
+    ("costs", "annual", "maintenance"): "cout_annuel_maintenance",
+    ("costs", "annual", "insurance"): "cout_annuel_assurance",
+    ("costs", "annual", "production"): "cout_annuel_production",
+    ("couts", "initiaux", "pv"): "cout_pv",
+    ("couts", "initiaux", "serre"): "cout_serre",
+    ("couts", "initiaux", "total"): "cout_total",
+    ("couts", "annuels", "maintenance"): "cout_annuel_maintenance",
+    ("couts", "annuels", "assurance"): "cout_annuel_assurance",
+    ("couts", "annuels", "production"): "cout_annuel_production",
+    ("benefits", "net"): "benefice_net",
+    ("benefits", "roi"): "roi",
+    ("benefits", "return_time"): "temps_retour",
+    ("benefices", "net"): "benefice_net",
+    ("benefices", "roi"): "roi",
+    ("benefices", "temps_retour"): "temps_retour",
+}
+
+def _flatten_results(nested: Dict[str, Any], path: Tuple[str, ...] = ()) -> Dict[str, Any]:
+    flat = {}
+    for key, value in nested.items():
+        if isinstance(value, dict):
+            flat.update(_flatten_results(value, path + (key,)))
+        elif path + (key,) in _NESTED_RESULTS:
+            flat[_NESTED_RESULTS[path + (key,)]] = value
+        elif not path:
+            flat[key] = value
+    return flat
+
+def adapt_from_v1_0_0(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Adapte un export 1.0.0 (résultats imbriqués) au schéma à sections plates"""
+    nested = data.pop("results", None) or data.get("calculs") or {}
+    data["calculs"] = _flatten_results(nested)
+    monthly = data.get("monthly_production")
+    if isinstance(monthly, dict) and isinstance(monthly.get("data"), list):
+        data["monthly_production"] = {entry.get("month"): entry.get("production") for entry in monthly["data"]}
+    scenarios = data.get("scenarios") or []
+    for index, scenario in enumerate(scenarios):
+        if isinstance(scenario, dict) and "nom" in scenario:
+            scenario.setdefault("id", index + 1)
+            scenario["name"] = scenario.pop("nom")
+            scenario.setdefault("description", "")
+            scenario["value"] = scenario.pop("valeur", None)
+    data["scenarios"] = scenarios
+    return data
+
+# Migration d'une version du schéma vers la suivante
+MIGRATIONS: Dict[int, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    0: adapt_from_v0_1_0,
+    1: adapt_from_v0_2_0,
+    2: adapt_from_v1_0_0,
+}
+
+# Chaînes précompilées : version de départ -> migrations à appliquer dans l'ordre
+_CHAINS = {start: tuple(MIGRATIONS[version] for version in range(start, SCHEMA_VERSION))
+           for start in range(SCHEMA_VERSION)}
+
+def schema_version(data: Dict[str, Any]) -> int:
+    """Version du schéma d'un export (déduite de metadata.version pour les anciens exports)"""
+    metadata = data.get("metadata") or {}
+    version = metadata.get("schema_version")
+    if version is None:
+        version = LEGACY_VERSIONS.get(metadata.get("version", "1.0.0"), LEGACY_VERSIONS["1.0.0"])
+    return int(version)
+
+def migrate(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Applique les migrations nécessaires pour amener un export à la version courante"""
+    version = schema_version(data)
+    if version > SCHEMA_VERSION:
+        raise ValueError(f"Export en version de schéma {version}, plus récente que celle de l'application ({SCHEMA_VERSION})")
+    for migration in _CHAINS.get(version, ()):
+        data = migration(data)
+    if isinstance(data.get("metadata"), dict):
+        data["metadata"]["schema_version"] = SCHEMA_VERSION
+    return data
+
+def load_export(data: Any) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Migre puis valide un export décodé
+
+    Returns:
+        dict: Données à la version courante du schéma
+        str: Message d'erreur si l'export n'est pas valide
+    """
+    if not isinstance(data, dict):
+        return None, "Les données importées ne sont pas valides"
+    try:
+        data = migrate(data)
+    except (TypeError, ValueError) as e:
+        return None, str(e)
+    errors = validate(data)
+    if errors:
+        return None, "Les données importées ne sont pas valides : " + "; ".join(errors[:5])
+    return data, None
@@ -1,215 +1,931 @@
-from typing import Dict, Any, Optional, List
-from dataclasses import dataclass
+import calendar
+import heapq
+from bisect import insort
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from itertools import islice
+from typing import Dict, Any, Iterable, Iterator, Optional, List, Sequence, Tuple
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from statistics import mean
+from modules.kudos.kudos_store import AccountLog, TransactionStore
 from modules.state_manager import state_manager
 
-@dataclass
+# Événements appliqués entre deux points de reprise du journal
+CHECKPOINT_EVERY = 10_000
+
+# Fenêtre de calcul de la réputation et score par défaut (aucune note récente)
+REPUTATION_WINDOW = timedelta(days=180)
+DEFAULT_REPUTATION = 3.0
+
+# Secondes par jour (clés de l'index des expirations)
+DAY = 86_400
+
+# Reliquat en dessous duquel un lot de Kudos est considéré comme épuisé
+EPSILON = 1e-9
+
+# Mois conservés dans les compteurs mensuels d'émission et de dépense : le mois courant
+# et les 12 précédents (attributions rétroactives sur l'horizon d'expiration par défaut)
+MONTHS_KEPT = 13
+
+# Compte émetteur : débité de chaque Kudo créé, son solde est l'opposé de la masse en circulation
+SYSTEM_ID = "SYSTEM"
+
+@dataclass(frozen=True, slots=True)
 class KudosRating:
-    """Représente une notation entre usagers"""
+    """Représente une notation entre usagers (horodatage en secondes depuis l'epoch)"""
     rater_id: str
     rated_id: str
     score: float
-    timestamp: datetime
+    timestamp: int
     comment: Optional[str] = None
 
+    @property
+    def date(self) -> datetime:
+        return datetime.fromtimestamp(self.timestamp)
+
 class KudosError(Exception):
     """Exception spécifique au système Kudos"""
     pass
 
-@dataclass
+def month_key(date: datetime) -> int:
+    """Numéro du mois calendaire (année * 12 + mois - 1)"""
+    return date.year * 12 + date.month - 1
+
+def add_months(date: datetime, months: int) -> datetime:
+    """Ajoute des mois calendaires (le jour est ramené au dernier jour du mois si besoin : 31/01 + 1 -> 28/02)"""
+    index = date.month - 1 + months
+    year, month = date.year + index // 12, index % 12 + 1
+    return date.replace(year=year, month=month, day=min(date.day, calendar.monthrange(year, month)[1]))
+
+class ReputationWindow:
+    """
+    Moyenne glissante des notes reçues sur une fenêtre de temps
+
+    Les notes sont gardées dans l'ordre chronologique avec leur somme et leur poids
+    cumulés : l'ajout est en O(1) et l'expiration en O(1) amorti (chaque note sort
+    une seule fois de la fenêtre). Avec une demi-vie, chaque note est pondérée par
+    2^(-âge / demi-vie) ; le facteur commun à toutes les notes se simplifiant dans
+    la moyenne, les poids sont calculés par rapport à une date de référence fixe.
+    """
+
+    __slots__ = ("window", "half_life", "default", "_entries", "_sum", "_weight", "_reference")
+
+    # Au-delà de cet exposant, la date de référence est avancée (évite le dépassement de capacité)
+    _MAX_EXPONENT = 500.0
+
+    def __init__(self, window: timedelta = REPUTATION_WINDOW, half_life: Optional[timedelta] = None,
+                 default: float = DEFAULT_REPUTATION):
+        self.window = window.total_seconds()
+        self.half_life = half_life.total_seconds() if half_life else None
+        self.default = default
+        self._entries: deque = deque()  # (horodatage, note, poids)
+        self._sum = 0.0
+        self._weight = 0.0
+        self._reference: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _weight_at(self, timestamp: float) -> float:
+        if self.half_life is None:
+            return 1.0
+        if self._reference is None:
+            self._reference = timestamp
+        exponent = (timestamp - self._reference) / self.half_life * math.log(2)
+        if exponent > self._MAX_EXPONENT:
+            self._rebase(timestamp)
+            exponent = 0.0
+        return math.exp(exponent)
+
+    def _rebase(self, reference: float) -> None:
+        """Recalcule les poids par rapport à une nouvelle date de référence (rare)"""
+        factor = math.exp(-(reference - self._reference) / self.half_life * math.log(2))
+        self._entries = deque((ts, score, weight * factor) for ts, score, weight in self._entries)
+        self._sum *= factor
+        self._weight *= factor
+        self._reference = reference
+
+    def add(self, timestamp: float, score: float) -> None:
+        """Ajoute une note (horodatage en secondes depuis l'epoch)"""
+        weight = self._weight_at(timestamp)
+        entry = (timestamp, score, weight)
+        if not self._entries or self._entries[-1][0] <= timestamp:
+            self._entries.append(entry)
+        else:
+            # Note arrivée en retard : insertion à sa place chronologique (cas rare)
+            index = len(self._entries)
+            while index > 0 and self._entries[index - 1][0] > timestamp:
+                index -= 1
+            self._entries.insert(index, entry)
+        self._sum += score * weight
+        self._weight += weight
+
+    def expire(self, now: float) -> int:
+        """Retire les notes sorties de la fenêtre ; retourne leur nombre"""
+        limit = now - self.window
+        removed = 0
+        entries = self._entries
+        while entries and entries[0][0] <= limit:
+            _, score, weight = entries.popleft()
+            self._sum -= score * weight
+            self._weight -= weight
+            removed += 1
+        if not entries:
+            # Repart de zéro : pas d'erreur d'arrondi accumulée
+            self._sum = self._weight = 0.0
+        return removed
+
+    def score(self, now: float) -> float:
+        """Moyenne (pondérée) des notes de la fenêtre, ou le score par défaut"""
+        self.expire(now)
+        if not self._entries or self._weight <= 0:
+            return self.default
+        return self._sum / self._weight
+
+@dataclass(frozen=True, slots=True)
 class KudosTransaction:
-    """Représente une transaction Kudos"""
+    """
+    Représente une transaction Kudos (virement de sender vers receiver, montant positif)
+
+    Enregistrement immuable construit à la demande depuis le TransactionStore ;
+    l'horodatage est en secondes depuis l'epoch.
+    """
     sender: str
     receiver: str
     amount: float
-    timestamp: datetime
+    timestamp: int
     description: str
     rating: Optional[KudosRating] = None
 
-@dataclass
+    @property
+    def date(self) -> datetime:
+        return datetime.fromtimestamp(self.timestamp)
+
+@dataclass(slots=True)
 class KudosAccount:
-    """Compte Kudos d'un usager"""
+    """Compte Kudos d'un usager
+
+    Le journal du compte (AccountLog) ne contient que les identifiants de ses
+    transactions, tenues une seule fois dans le TransactionStore partagé ; les Kudos
+    reçus forment des lots datés, consommés du plus ancien au plus récent, qui
+    expirent individuellement : le solde d'un usager est la somme de ses lots.
+    """
     user_id: str
     balance: float
     monthly_limit: float
-    last_update: datetime
-    transactions: List[KudosTransaction]
+    last_update: int  # Secondes depuis l'epoch
     ratings: List[KudosRating]
     reputation_score: float
+    version: int = 0  # Nombre d'écritures passées sur le compte
+    reputation: ReputationWindow = field(default_factory=ReputationWindow, repr=False)
+    log: AccountLog = field(default_factory=AccountLog, repr=False)
+    lots: deque = field(default_factory=deque, repr=False)  # [date d'expiration, reste], par date croissante
+    monthly: Dict[int, List[float]] = field(default_factory=dict, repr=False)  # mois -> [émis, dépensés]
+    spend_limit: Optional[float] = None  # Plafond mensuel de dépense (aucun par défaut)
+    debt: float = 0.0  # Débit non couvert par les lots, imputé sur les crédits suivants (lots de virements)
+
+    @property
+    def transactions(self) -> List[KudosTransaction]:
+        """Historique des transactions (construit à la demande depuis le stock de transactions)"""
+        return self.transactions_between()
+
+    def transactions_between(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                             offset: int = 0, limit: Optional[int] = None) -> List[KudosTransaction]:
+        """Transactions d'une période [start, end), paginées : seule la page demandée est construite"""
+        rows = self.log.rows(start.timestamp() if start else None, end.timestamp() if end else None)
+        return [
+            KudosTransaction(sender=sender, receiver=receiver, amount=amount, timestamp=timestamp,
+                             description=description)
+            for timestamp, sender, receiver, amount, description
+            in islice(rows, offset, None if limit is None else offset + limit)
+        ]
+
+    def post(self, tx_id: int, timestamp: int, amount: float, counterparty: str, month: int,
+             expiry: Optional[int] = None) -> None:
+        """
+        Passe l'écriture d'une transaction du stock sur le compte (débit ou crédit)
+
+        Args:
+            tx_id (int): Identifiant de la transaction
+            timestamp (int): Date de la transaction (epoch)
+            amount (float): Montant signé pour ce compte : débit négatif, crédit positif
+            counterparty (str): Autre compte du virement
+            month (int): Mois de la transaction (month_key)
+            expiry (int): Date d'expiration (epoch) du lot créé par un crédit ; sans date, pas de lot
+        """
+        self.log.append(tx_id, timestamp)
+        self.balance += amount
+        if counterparty == SYSTEM_ID and amount > 0:
+            self._count(month, amount, 0.0)
+        elif amount < 0 and counterparty != SYSTEM_ID:
+            self._count(month, 0.0, -amount)
+        if amount > 0 and expiry is not None:
+            self._add_lot(expiry, amount)
+        elif amount < 0 and self.user_id != SYSTEM_ID:
+            self._consume(-amount)
+        self.version += 1
+        self.last_update = timestamp
+
+    def _add_lot(self, expiry: int, amount: float) -> None:
+        """
+        Crée le lot d'un crédit, après imputation du débit non couvert
+
+        Le lot est inséré à sa place dans l'ordre des dates d'expiration : un crédit
+        antidaté (production d'une période passée) expire avant les lots plus récents.
+        """
+        if self.debt > EPSILON:
+            covered = min(self.debt, amount)
+            self.debt -= covered
+            amount -= covered
+        if amount > EPSILON:
+            if not self.lots or self.lots[-1][0] <= expiry:
+                self.lots.append([expiry, amount])
+            else:
+                insort(self.lots, [expiry, amount], key=lambda lot: lot[0])
 
-    def add_transaction(self, transaction: KudosTransaction) -> None:
-        """Ajoute une transaction au compte"""
-        self.transactions.append(transaction)
-        self.balance += transaction.amount
-        self.last_update = transaction.timestamp
+    def _consume(self, amount: float) -> None:
+        """
+        Débite les lots du plus ancien au plus récent (premier entré, premier sorti)
+
+        Dans un lot de virements, un débit peut précéder le crédit qui le couvre (seul
+        le solde net est vérifié) : le reste est gardé en dette jusqu'au crédit.
+        """
+        lots = self.lots
+        while amount > EPSILON and lots:
+            lot = lots[0]
+            used = min(lot[1], amount)
+            lot[1] -= used
+            amount -= used
+            if lot[1] <= EPSILON:
+                lots.popleft()
+        if amount > EPSILON:
+            self.debt += amount
+
+    def expired_amount(self, now: float) -> float:
+        """Kudos des lots arrivés à expiration (en tête de file : les lots sont triés par date)"""
+        total = 0.0
+        for expiry, remaining in self.lots:
+            if expiry > now:
+                break
+            total += remaining
+        return total
+
+    def next_expiry(self) -> Optional[float]:
+        return self.lots[0][0] if self.lots else None
+
+    def _count(self, month: int, issued: float, spent: float) -> None:
+        """
+        Cumule l'émission et la dépense du mois
+
+        Seuls les MONTHS_KEPT mois précédant le plus récent sont gardés ; le mois écrit
+        n'est jamais retiré (KudosSystem refuse d'attribuer hors de cette fenêtre).
+        """
+        entry = self.monthly.get(month)
+        if entry is None:
+            entry = self.monthly[month] = [0.0, 0.0]
+            oldest = max(self.monthly) - MONTHS_KEPT + 1
+            for stale in [key for key in self.monthly if key < oldest and key != month]:
+                del self.monthly[stale]
+        entry[0] += issued
+        entry[1] += spent
+
+    def month_totals(self, month: int) -> Tuple[float, float]:
+        """Kudos émis vers le compte et dépensés par lui pendant un mois (numéro de month_key)"""
+        entry = self.monthly.get(month)
+        return (entry[0], entry[1]) if entry else (0.0, 0.0)
+
+    def can_issue(self, amount: float, month: int) -> bool:
+        """Le plafond mensuel limite l'émission de Kudos vers le compte, pas son solde"""
+        return self.month_totals(month)[0] + amount <= self.monthly_limit + EPSILON
+
+    def can_spend(self, amount: float, month: int) -> bool:
+        if self.spend_limit is None or self.user_id == SYSTEM_ID:
+            return True
+        return self.month_totals(month)[1] + amount <= self.spend_limit + EPSILON
 
     def validate_transaction(self, amount: float) -> bool:
-        """Valide une transaction"""
-        if self.balance < amount:
-            return False
-        if self.balance + amount > self.monthly_limit:
-            return False
-        return True
+        """Valide un mouvement signé : un débit ne peut excéder le solde (le compte SYSTEM n'a pas de limite)"""
+        if self.user_id == SYSTEM_ID or amount >= 0:
+            return True
+        return self.balance + amount >= -EPSILON
 
     def add_rating(self, rating: KudosRating) -> None:
-        """Ajoute une notation et met à jour le score de réputation"""
+        """Ajoute une notation et met à jour le score de réputation (temps constant)"""
         self.ratings.append(rating)
-        self.update_reputation_score()
-
-    def update_reputation_score(self) -> None:
-        """Met à jour le score de réputation"""
-        if not self.ratings:
-            self.reputation_score = 3.0  # Score par défaut
-            return
-
-        # Calculer la moyenne des notes des 6 derniers mois
-        recent_ratings = [
-            r for r in self.ratings
-            if r.timestamp > datetime.now() - timedelta(days=180)
-        ]
-        
-        if recent_ratings:
-            scores = [r.score for r in recent_ratings]
-            self.reputation_score = mean(scores)
-        else:
-            self.reputation_score = 3.0
+        self.reputation.add(rating.timestamp, rating.score)
+        self.update_reputation_score(rating.timestamp)
+
+    def update_reputation_score(self, now: Optional[float] = None) -> None:
+        """Met à jour le score de réputation : moyenne des notes des 6 derniers mois (now en epoch)"""
+        self.reputation_score = self.reputation.score(time.time() if now is None else now)
 
 class KudosSystem:
-    """Système de gestion des Kudos"""
-    
-    def __init__(self):
+    """Système de gestion des Kudos
+
+    Chaque opération est appliquée sous forme d'événement (voir _apply_event). Avec un
+    journal (KudosLedger), les événements y sont enregistrés et l'état est reconstruit
+    au démarrage depuis le dernier point de reprise.
+
+    Les contrôles (solde, plafonds) portent sur la projection locale : un journal ne
+    doit avoir qu'un seul processus qui écrit. Les autres processus le lisent et
+    appellent sync() avant de consulter les soldes ; deux écrivains sur le même journal
+    pourraient chacun valider un débit et mettre un compte à découvert.
+
+    Les virements sont en partie double (débit de l'émetteur, crédit du destinataire) ;
+    les Kudos créés sont débités du compte SYSTEM, si bien que la somme des soldes est
+    toujours nulle. Chaque compte a son verrou, pris dans l'ordre des identifiants.
+
+    Chaque transaction est enregistrée une seule fois dans le stock partagé (store),
+    les journaux des deux comptes n'en gardent que l'identifiant.
+    """
+
+    def __init__(self, ledger=None, checkpoint_every: int = CHECKPOINT_EVERY):
         self.accounts: Dict[str, KudosAccount] = {}
+        self.store = TransactionStore()
         self.kudos_value = state_manager.get('kudos_value', 1.0)  # 1 Kudo = 1 kWh
         self.monthly_limit = state_manager.get('kudos_monthly_limit', 5000.0)
         self.expiration_months = state_manager.get('kudos_expiration_months', 12)
         self.min_rating = state_manager.get('kudos_notation_min', 3.0)
-        
-    def create_account(self, user_id: str) -> None:
-        """Crée un compte Kudos pour un usager"""
-        if user_id in self.accounts:
-            raise KudosError(f"Compte déjà existant pour l'usager {user_id}")
-        
-        self.accounts[user_id] = KudosAccount(
+        self.spend_limit = state_manager.get('kudos_monthly_spend_limit', None)
+        # Demi-vie (jours) de la pondération des notes ; aucune pondération par défaut
+        half_life = state_manager.get('kudos_reputation_half_life', None)
+        self.reputation_half_life = timedelta(days=half_life) if half_life else None
+        self.ledger = ledger
+        self.checkpoint_every = checkpoint_every
+        self._applied_seq = 0
+        self._since_checkpoint = 0
+        self._locks: Dict[str, threading.Lock] = {}
+        self._accounts_lock = threading.Lock()
+        # Index des expirations : jour -> comptes ayant un lot ou une notation qui expire ce jour-là
+        self._expiry_index: Dict[int, set] = defaultdict(set)
+        self._expiry_days: List[int] = []
+        self._expiry_lock = threading.Lock()
+        # Périodes de production déjà attribuées (attributions idempotentes)
+        self.issued_periods: set = set()
+        if ledger is not None:
+            self._restore()
+        self._new_account(SYSTEM_ID, int(time.time()))
+
+    # --- Verrous ---
+
+    @contextmanager
+    def _locked(self, user_ids: Iterable[str]) -> Iterator[None]:
+        """Verrouille des comptes dans l'ordre de leurs identifiants (pas d'interblocage)"""
+        locks = [self._locks[user_id] for user_id in sorted(set(user_ids))]
+        for lock in locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        """Verrouille la création de comptes et tous les comptes (opérations globales)"""
+        with self._accounts_lock, self._locked(list(self.accounts)):
+            yield
+
+    # --- Événements ---
+
+    def _record(self, kind: str, **payload: Any) -> Any:
+        """Applique un événement puis l'ajoute au journal (s'il y en a un)"""
+        payload.setdefault("timestamp", time.time())
+        result = self._apply_event(kind, payload)
+        if self.ledger is not None:
+            self.ledger.append(kind, payload, payload["timestamp"])
+            self._since_checkpoint += 1
+        return result
+
+    def _maybe_checkpoint(self) -> None:
+        """Point de reprise périodique (appelé hors des verrous de comptes)"""
+        if self.ledger is not None and self._since_checkpoint >= self.checkpoint_every:
+            self.checkpoint()
+
+    def _transaction(self, sender: str, receiver: str, amount: float, description: str,
+                     timestamp: int, month: int, expiry: int) -> int:
+        """
+        Enregistre un virement dans le stock et passe ses deux écritures : débit de
+        l'émetteur, crédit du destinataire (lot expirant à la date expiry)
+
+        Returns:
+            int: Identifiant de la transaction
+        """
+        tx_id = self.store.append(timestamp, sender, receiver, amount, description)
+        self._new_account(sender, timestamp).post(tx_id, timestamp, -amount, receiver, month)
+        if receiver == SYSTEM_ID:
+            self._new_account(receiver, timestamp).post(tx_id, timestamp, amount, sender, month)
+        else:
+            self._new_account(receiver, timestamp).post(tx_id, timestamp, amount, sender, month, expiry)
+            self._schedule_expiry(receiver, expiry)
+        return tx_id
+
+    def _materialize(self, tx_id: int) -> KudosTransaction:
+        """Enregistrement KudosTransaction d'une transaction du stock"""
+        timestamp, sender, receiver, amount, description = self.store.row(tx_id)
+        return KudosTransaction(sender=sender, receiver=receiver, amount=amount, timestamp=timestamp,
+                                description=description)
+
+    def _schedule_expiry(self, user_id: str, expiry: float) -> None:
+        """Inscrit le compte dans l'index des expirations du jour correspondant"""
+        day = int(expiry // DAY)
+        with self._expiry_lock:
+            bucket = self._expiry_index.get(day)
+            if bucket is None:
+                bucket = self._expiry_index[day] = set()
+                heapq.heappush(self._expiry_days, day)
+            bucket.add(user_id)
+
+    def _due_accounts(self, now: float) -> set:
+        """Retire de l'index les jours échus ; retourne les comptes à visiter"""
+        today = int(now // DAY)
+        due = set()
+        with self._expiry_lock:
+            while self._expiry_days and self._expiry_days[0] <= today:
+                due |= self._expiry_index.pop(heapq.heappop(self._expiry_days), set())
+        return due
+
+    def _apply_event(self, kind: str, payload: Dict[str, Any]) -> Any:
+        """
+        Applique un événement à la projection en mémoire (sans validation : l'événement est acquis)
+
+        Les virements retournent les identifiants de leurs transactions dans le stock.
+        """
+        timestamp = int(payload["timestamp"])
+        if kind == "account_created":
+            return self._new_account(payload["user_id"], timestamp)
+        if kind in ("transfer", "transfer_batch"):
+            # Mois et date d'expiration calculés une fois pour tout l'événement
+            when = datetime.fromtimestamp(timestamp)
+            month = month_key(when)
+            expiry = int(add_months(when, self.expiration_months).timestamp())
+            if kind == "transfer":
+                return self._transaction(payload["sender"], payload["receiver"], payload["amount"],
+                                         payload["description"], timestamp, month, expiry)
+            if payload.get("period"):
+                self.issued_periods.add(payload["period"])
+            return [self._transaction(sender, receiver, amount, description, timestamp, month, expiry)
+                    for sender, receiver, amount, description in payload["transfers"]]
+        if kind == "rating_added":
+            rating = KudosRating(
+                rater_id=payload["rater_id"],
+                rated_id=payload["rated_id"],
+                score=payload["score"],
+                timestamp=timestamp,
+                comment=payload.get("comment")
+            )
+            self.accounts[payload["rated_id"]].add_rating(rating)
+            self._schedule_expiry(payload["rated_id"], timestamp + REPUTATION_WINDOW.total_seconds())
+            return rating
+        if kind == "expired_cleanup":
+            return self._cleanup_expired(timestamp, payload.get("accounts"))
+        raise KudosError(f"Événement inconnu: {kind}")
+
+    def _new_account(self, user_id: str, timestamp: int) -> KudosAccount:
+        account = self.accounts.get(user_id)
+        if account is None:
+            self._locks.setdefault(user_id, threading.Lock())
+            account = self.accounts[user_id] = KudosAccount(
+                user_id=user_id,
+                balance=0.0,
+                monthly_limit=self.monthly_limit,
+                last_update=timestamp,
+                ratings=[],
+                reputation_score=DEFAULT_REPUTATION,  # Score initial
+                reputation=self._reputation_window(),
+                log=AccountLog(self.store),
+                spend_limit=self.spend_limit
+            )
+        return account
+
+    def _reputation_window(self, ratings: Iterable[KudosRating] = ()) -> ReputationWindow:
+        window = ReputationWindow(half_life=self.reputation_half_life)
+        for rating in ratings:
+            window.add(rating.timestamp, rating.score)
+        return window
+
+    # --- Journal : reprise, synchronisation, points de reprise ---
+
+    def _state(self) -> Dict[str, Any]:
+        """Copie sérialisable de la projection (comptes, transactions, notations et périodes attribuées)"""
+        accounts = {
+            user_id: {
+                "balance": account.balance,
+                "monthly_limit": account.monthly_limit,
+                "last_update": account.last_update,
+                "reputation_score": account.reputation_score,
+                "version": account.version,
+                "log": account.log.to_state(),
+                "lots": list(map(tuple, account.lots)),
+                "debt": account.debt,
+                "monthly": [[month, issued, spent] for month, (issued, spent) in account.monthly.items()],
+                "ratings": [[r.rater_id, r.rated_id, r.score, r.timestamp, r.comment]
+                            for r in account.ratings],
+            }
+            for user_id, account in self.accounts.items()
+        }
+        return {"store": self.store.to_state(), "accounts": accounts, "periods": sorted(self.issued_periods)}
+
+    def _load_state(self, state: Dict[str, Any]) -> None:
+        self.store = TransactionStore.from_state(state["store"]) if "store" in state else TransactionStore()
+        self.accounts = {
+            user_id: self._loaded_account(user_id, entry)
+            for user_id, entry in state.get("accounts", {}).items()
+        }
+        self.issued_periods = set(state.get("periods", ()))
+        self._locks = {user_id: threading.Lock() for user_id in self.accounts}
+        self._expiry_index = defaultdict(set)
+        self._expiry_days = []
+        for user_id, account in self.accounts.items():
+            for expiry, _ in account.lots:
+                self._schedule_expiry(user_id, expiry)
+            for rating in account.ratings:
+                self._schedule_expiry(user_id, rating.timestamp + REPUTATION_WINDOW.total_seconds())
+
+    def _loaded_account(self, user_id: str, entry: Dict[str, Any]) -> KudosAccount:
+        ratings = [KudosRating(rater, rated, score, int(ts), comment)
+                   for rater, rated, score, ts, comment in entry["ratings"]]
+        return KudosAccount(
             user_id=user_id,
-            balance=0.0,
-            monthly_limit=self.monthly_limit,
-            last_update=datetime.now(),
-            transactions=[],
-            ratings=[],
-            reputation_score=3.0  # Score initial
-        )
-    
-    def add_kudos(self, user_id: str, amount: float, description: str = "Production d'énergie") -> None:
-        """Ajoute des Kudos à un compte"""
-        if user_id not in self.accounts:
-            self.create_account(user_id)
-        
-        account = self.accounts[user_id]
-        if not account.validate_transaction(amount):
-            raise KudosError("Transaction invalide: dépassement du plafond mensuel")
-            
-        transaction = KudosTransaction(
-            sender="SYSTEM",
-            receiver=user_id,
-            amount=amount,
-            timestamp=datetime.now(),
-            description=description
+            balance=entry["balance"],
+            monthly_limit=entry["monthly_limit"],
+            last_update=int(entry["last_update"]),
+            ratings=ratings,
+            reputation_score=entry["reputation_score"],
+            version=entry.get("version", 0),
+            reputation=self._reputation_window(ratings),
+            log=AccountLog.from_state(entry["log"], self.store),
+            lots=deque(sorted(([expiry, remaining] for expiry, remaining in entry["lots"]),
+                              key=lambda lot: lot[0])),
+            monthly={month: [issued, spent] for month, issued, spent in entry.get("monthly", [])},
+            spend_limit=self.spend_limit,
+            debt=entry.get("debt", 0.0)
         )
-        
-        account.add_transaction(transaction)
-        
-    def use_kudos(self, sender_id: str, receiver_id: str, amount: float, description: str = "Échange d'énergie") -> KudosTransaction:
-        """Utilise des Kudos pour un échange d'énergie"""
+
+    def _restore(self) -> None:
+        """Recharge le dernier point de reprise puis rejoue les événements suivants"""
+        seq, state = self.ledger.latest_checkpoint()
+        if state is not None and "store" not in state:
+            # Point de reprise d'un format antérieur au stock de transactions : tout rejouer
+            seq, state = 0, None
+        self.accounts = {}
+        if state is not None:
+            self._load_state(state)
+        self._applied_seq = seq
+        for seq, kind, payload in self.ledger.events(after_seq=seq):
+            self._apply_event(kind, payload)
+            self._applied_seq = seq
+            self._since_checkpoint += 1
+
+    def _sync(self) -> int:
+        self.ledger.flush()
+        target = self.ledger.last_seq()
+        applied = 0
+        for seq, kind, payload in self.ledger.events(after_seq=self._applied_seq, exclude_origin=self.ledger.origin,
+                                                     until_seq=target):
+            self._apply_event(kind, payload)
+            applied += 1
+        self._applied_seq = target
+        return applied
+
+    def sync(self) -> int:
+        """
+        Valide les événements en attente et applique ceux écrits par les autres processus
+
+        Returns:
+            int: Nombre d'événements externes appliqués
+        """
+        if self.ledger is None:
+            return 0
+        with self._exclusive():
+            return self._sync()
+
+    def checkpoint(self) -> None:
+        """Enregistre un point de reprise de la projection courante"""
+        if self.ledger is None:
+            raise KudosError("Aucun journal configuré")
+        # Copie de la projection sous verrou, sérialisation et écriture une fois libéré
+        with self._exclusive():
+            self._sync()
+            seq, state = self._applied_seq, self._state()
+            self._since_checkpoint = 0
+        self.ledger.write_checkpoint(seq, state)
+
+    def rebuild(self) -> None:
+        """Reconstruit la projection en rejouant tout le journal (sans point de reprise)"""
+        if self.ledger is None:
+            raise KudosError("Aucun journal configuré")
+        with self._exclusive():
+            self.ledger.flush()
+            self._load_state({})
+            self._applied_seq = 0
+            self._new_account(SYSTEM_ID, int(time.time()))
+            for seq, kind, payload in self.ledger.events():
+                self._apply_event(kind, payload)
+                self._applied_seq = seq
+
+    # --- Opérations ---
+
+    def create_account(self, user_id: str) -> None:
+        """Crée un compte Kudos pour un usager"""
+        with self._accounts_lock:
+            if user_id in self.accounts:
+                raise KudosError(f"Compte déjà existant pour l'usager {user_id}")
+            self._record("account_created", user_id=user_id)
+
+    def _ensure_account(self, user_id: str) -> None:
+        with self._accounts_lock:
+            if user_id not in self.accounts:
+                self._record("account_created", user_id=user_id)
+
+    def _ensure_accounts(self, user_ids: Iterable[str]) -> None:
+        with self._accounts_lock:
+            for user_id in user_ids:
+                if user_id not in self.accounts:
+                    self._record("account_created", user_id=user_id)
+
+    def _check_transfer(self, sender_id: str, receiver_id: str, amount: float) -> None:
         if sender_id not in self.accounts:
             raise KudosError(f"Compte source non trouvé: {sender_id}")
         if receiver_id not in self.accounts:
             raise KudosError(f"Compte destination non trouvé: {receiver_id}")
-        
-        sender_account = self.accounts[sender_id]
-        receiver_account = self.accounts[receiver_id]
-        
-        if not sender_account.validate_transaction(-amount):
-            raise KudosError("Solde insuffisant")
-            
-        # Créer la transaction
-        transaction = KudosTransaction(
-            sender=sender_id,
-            receiver=receiver_id,
-            amount=amount,
-            timestamp=datetime.now(),
-            description=description
-        )
-        
-        # Mettre à jour les comptes
-        sender_account.add_transaction(transaction)
-        receiver_account.add_transaction(transaction)
-        
+        if sender_id == receiver_id:
+            raise KudosError("Virement d'un compte vers lui-même")
+        if not amount > 0:
+            raise KudosError("Montant invalide: doit être positif")
+
+    def add_kudos(self, user_id: str, amount: float, description: str = "Production d'énergie") -> KudosTransaction:
+        """Ajoute des Kudos à un compte (virement depuis le compte SYSTEM)"""
+        if user_id not in self.accounts:
+            self._ensure_account(user_id)
+        self._check_transfer(SYSTEM_ID, user_id, amount)
+
+        now = time.time()
+        month = month_key(datetime.fromtimestamp(now))
+        with self._locked((SYSTEM_ID, user_id)):
+            if not self.accounts[user_id].can_issue(amount, month):
+                raise KudosError("Transaction invalide: dépassement du plafond mensuel")
+            tx_id = self._record("transfer", sender=SYSTEM_ID, receiver=user_id, amount=amount,
+                                 description=description, timestamp=now)
+            transaction = self._materialize(tx_id)
+        self._maybe_checkpoint()
         return transaction
-    
+
+    def transfer(self, sender_id: str, receiver_id: str, amount: float,
+                 description: str = "Échange d'énergie") -> KudosTransaction:
+        """
+        Virement en partie double, atomique : débit et crédit sont passés ensemble,
+        sous les verrous des deux comptes, ou pas du tout
+        """
+        self._check_transfer(sender_id, receiver_id, amount)
+        now = time.time()
+        month = month_key(datetime.fromtimestamp(now))
+        with self._locked((sender_id, receiver_id)):
+            sender = self.accounts[sender_id]
+            if not sender.validate_transaction(-amount):
+                raise KudosError("Solde insuffisant")
+            if sender_id == SYSTEM_ID and not self.accounts[receiver_id].can_issue(amount, month):
+                raise KudosError("Transaction invalide: dépassement du plafond mensuel")
+            if receiver_id != SYSTEM_ID and not sender.can_spend(amount, month):
+                raise KudosError("Plafond mensuel de dépense atteint")
+            tx_id = self._record("transfer", sender=sender_id, receiver=receiver_id, amount=amount,
+                                 description=description, timestamp=now)
+            transaction = self._materialize(tx_id)
+        self._maybe_checkpoint()
+        return transaction
+
+    def transfer_batch(self, transfers: Iterable[Sequence[Any]]) -> List[KudosTransaction]:
+        """
+        Passe un lot de virements en une seule écriture atomique
+
+        Les soldes sont vérifiés sur la position nette de chaque compte à l'issue du lot,
+        les plafonds mensuels sur les montants émis et dépensés : soit tous les virements
+        sont passés, soit aucun.
+
+        Args:
+            transfers: (émetteur, destinataire, montant[, description])
+
+        Returns:
+            list: Transactions créées, dans l'ordre du lot
+        """
+        batch = []
+        for transfer in transfers:
+            sender_id, receiver_id, amount = transfer[0], transfer[1], float(transfer[2])
+            description = transfer[3] if len(transfer) > 3 else "Échange d'énergie"
+            self._check_transfer(sender_id, receiver_id, amount)
+            batch.append([sender_id, receiver_id, amount, description])
+        if not batch:
+            return []
+
+        net: Dict[str, float] = defaultdict(float)
+        issued: Dict[str, float] = defaultdict(float)
+        spent: Dict[str, float] = defaultdict(float)
+        for sender_id, receiver_id, amount, _ in batch:
+            net[sender_id] -= amount
+            net[receiver_id] += amount
+            if sender_id == SYSTEM_ID:
+                issued[receiver_id] += amount
+            elif receiver_id != SYSTEM_ID:
+                spent[sender_id] += amount
+        now = time.time()
+        month = month_key(datetime.fromtimestamp(now))
+        with self._locked(net):
+            for user_id, delta in net.items():
+                if delta < 0 and not self.accounts[user_id].validate_transaction(delta):
+                    raise KudosError(f"Solde insuffisant: {user_id}")
+            for user_id, amount in issued.items():
+                if not self.accounts[user_id].can_issue(amount, month):
+                    raise KudosError(f"Transaction invalide: dépassement du plafond mensuel: {user_id}")
+            for user_id, amount in spent.items():
+                if not self.accounts[user_id].can_spend(amount, month):
+                    raise KudosError(f"Plafond mensuel de dépense atteint: {user_id}")
+            tx_ids = self._record("transfer_batch", transfers=batch, timestamp=now)
+            transactions = [self._materialize(tx_id) for tx_id in tx_ids]
+        self._maybe_checkpoint()
+        return transactions
+
+    def can_issue_month(self, when: datetime) -> bool:
+        """
+        Des Kudos peuvent être attribués à cette date : mois courant ou l'un des
+        MONTHS_KEPT - 1 précédents (les compteurs des plafonds couvrent cette fenêtre)
+        """
+        current = month_key(datetime.now())
+        return current - MONTHS_KEPT < month_key(when) <= current
+
+    def issue_production_credits(self, member_ids: Sequence[str], production: Any,
+                                 timestamp: Optional[datetime] = None, description: str = "Production d'énergie",
+                                 clip: bool = False, period: Optional[str] = None) -> Dict[str, float]:
+        """
+        Attribue en un seul lot les Kudos de production d'un mois pour tous les membres
+
+        Les montants (kWh * kudos_value) sont validés ensemble contre le reliquat du
+        plafond mensuel de chaque membre, puis passés en une seule écriture.
+
+        Args:
+            member_ids (list): Membres, dans l'ordre des lignes de production
+            production: kWh par membre (1 dimension) ou relevés membre x intervalle (2 dimensions)
+            timestamp (datetime): Date des crédits (par défaut, maintenant) ; le plafond est celui de son mois
+                (mois courant ou récent, voir can_issue_month)
+            description (str): Libellé des crédits
+            clip (bool): Ramener les montants au reliquat du plafond au lieu de refuser le lot
+            period (str): Clé de la période attribuée, enregistrée dans la même écriture que
+                les crédits ; une période déjà attribuée est refusée
+
+        Returns:
+            dict: Membre -> Kudos attribués (membres sans production omis)
+        """
+        import numpy as np
+        member_ids = list(member_ids)
+        kwh = np.asarray(production, dtype=float)
+        if kwh.ndim == 2:
+            kwh = np.nansum(kwh, axis=1)
+        if kwh.shape != (len(member_ids),):
+            raise KudosError(f"Production attendue pour {len(member_ids)} membres, reçu {kwh.shape}")
+        if len(set(member_ids)) != len(member_ids):
+            raise KudosError("Membres en double dans le lot")
+        if SYSTEM_ID in member_ids:
+            raise KudosError("Le compte SYSTEM ne peut pas recevoir de crédits de production")
+        if np.isnan(kwh).any() or (kwh < 0).any():
+            raise KudosError("Production invalide: valeurs négatives ou manquantes")
+        amounts = kwh * self.kudos_value
+
+        when = timestamp or datetime.now()
+        month = month_key(when)
+        if not self.can_issue_month(when):
+            raise KudosError(f"Mois hors de la fenêtre des plafonds mensuels ({MONTHS_KEPT} derniers mois): "
+                             f"{when:%Y-%m}")
+        self._ensure_accounts(member_ids)
+        with self._locked([SYSTEM_ID] + member_ids):
+            if period is not None and period in self.issued_periods:
+                raise KudosError(f"Période déjà attribuée: {period}")
+            accounts = [self.accounts[user_id] for user_id in member_ids]
+            issued = np.fromiter((account.month_totals(month)[0] for account in accounts), float, len(accounts))
+            limits = np.fromiter((account.monthly_limit for account in accounts), float, len(accounts))
+            allowance = np.maximum(limits - issued, 0.0)
+            over = amounts > allowance + EPSILON
+            if over.any():
+                if not clip:
+                    names = ", ".join(member_ids[index] for index in np.flatnonzero(over)[:5])
+                    raise KudosError(f"Transaction invalide: dépassement du plafond mensuel pour "
+                                     f"{int(over.sum())} membre(s) ({names})")
+                amounts = np.minimum(amounts, allowance)
+            credited = np.flatnonzero(amounts > EPSILON)
+            batch = [[SYSTEM_ID, member_ids[index], float(amounts[index]), description] for index in credited]
+            if batch or period is not None:
+                self._record("transfer_batch", transfers=batch, timestamp=when.timestamp(), period=period)
+        self._maybe_checkpoint()
+        return {receiver: amount for _, receiver, amount, _ in batch}
+
+    def use_kudos(self, sender_id: str, receiver_id: str, amount: float, description: str = "Échange d'énergie") -> KudosTransaction:
+        """Utilise des Kudos pour un échange d'énergie"""
+        return self.transfer(sender_id, receiver_id, amount, description)
+
     def add_rating(self, rater_id: str, rated_id: str, score: float, comment: Optional[str] = None) -> None:
         """Ajoute une notation entre usagers"""
         if rater_id not in self.accounts:
             raise KudosError(f"Compte évaluateur non trouvé: {rater_id}")
         if rated_id not in self.accounts:
             raise KudosError(f"Compte évalué non trouvé: {rated_id}")
-        
+
         if not (0 <= score <= 5):
             raise KudosError("Score invalide: doit être entre 0 et 5")
-        
-        rating = KudosRating(
-            rater_id=rater_id,
-            rated_id=rated_id,
-            score=score,
-            timestamp=datetime.now(),
-            comment=comment
-        )
-        
-        self.accounts[rated_id].add_rating(rating)
-    
+
+        with self._locked((rated_id,)):
+            self._record("rating_added", rater_id=rater_id, rated_id=rated_id, score=score, comment=comment)
+        self._maybe_checkpoint()
+
     def get_balance(self, user_id: str) -> float:
         """Obtient le solde Kudos d'un usager"""
         if user_id not in self.accounts:
             raise KudosError(f"Compte non trouvé: {user_id}")
         return self.accounts[user_id].balance
-    
+
     def get_reputation_score(self, user_id: str) -> float:
         """Obtient le score de réputation d'un usager"""
         if user_id not in self.accounts:
             raise KudosError(f"Compte non trouvé: {user_id}")
         return self.accounts[user_id].reputation_score
-    
-    def get_transactions(self, user_id: str) -> List[KudosTransaction]:
-        """Obtient l'historique des transactions d'un usager"""
+
+    def get_transactions(self, user_id: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                         offset: int = 0, limit: Optional[int] = None) -> List[KudosTransaction]:
+        """
+        Obtient l'historique des transactions d'un usager
+
+        Pour les tableaux de bord, préférer kudos_queries (DataFrame construits sur les colonnes).
+
+        Args:
+            start, end (datetime): Période [start, end) (par défaut, tout l'historique)
+            offset, limit (int): Pagination
+        """
         if user_id not in self.accounts:
             raise KudosError(f"Compte non trouvé: {user_id}")
-        return self.accounts[user_id].transactions
-    
+        return self.accounts[user_id].transactions_between(start, end, offset, limit)
+
     def get_ratings(self, user_id: str) -> List[KudosRating]:
         """Obtient l'historique des notations reçues par un usager"""
         if user_id not in self.accounts:
             raise KudosError(f"Compte non trouvé: {user_id}")
         return self.accounts[user_id].ratings
-    
-    def cleanup_expired(self) -> None:
-        """Supprime les Kudos et notations expirés"""
-        current_time = datetime.now()
-        for account in self.accounts.values():
-            # Supprimer les transactions expirées
-            account.transactions = [
-                t for t in account.transactions
-                if t.timestamp + timedelta(months=self.expiration_months) > current_time
-            ]
-            
-            # Supprimer les notations anciennes (plus de 6 mois)
-            account.ratings = [
-                r for r in account.ratings
-                if r.timestamp > current_time - timedelta(days=180)
-            ]
-            
-            # Recalculer le solde et le score de réputation
-            account.balance = sum(t.amount for t in account.transactions)
-            account.update_reputation_score()
+
+    def cleanup_expired(self, now: Optional[datetime] = None) -> int:
+        """
+        Fait expirer les Kudos et notations arrivés à échéance (traitement quotidien)
+
+        Seuls les comptes inscrits dans l'index des expirations pour les jours échus sont
+        visités, sous leurs seuls verrous et celui du compte SYSTEM : les lots expirés
+        retournent au compte SYSTEM, les écritures de plus de expiration_months mois et
+        les notations de plus de 6 mois sont supprimées. Les comptes visités sont
+        enregistrés dans l'événement, qui est rejoué à l'identique.
+
+        Returns:
+            int: Nombre de comptes visités
+        """
+        timestamp = now.timestamp() if now else time.time()
+        due = self._due_accounts(timestamp)
+        with self._locked(due | {SYSTEM_ID}):
+            touched = self._record("expired_cleanup", timestamp=timestamp, accounts=sorted(due))
+        self._maybe_checkpoint()
+        return touched
+
+    def _cleanup_expired(self, now: int, accounts: Optional[Iterable[str]] = None) -> int:
+        # Sans liste de comptes (événements antérieurs), les jours échus sont lus dans l'index
+        touched = self._due_accounts(now) if accounts is None else set(accounts)
+
+        current_time = datetime.fromtimestamp(now)
+        history_cutoff = int(add_months(current_time, -self.expiration_months).timestamp())
+        rating_cutoff = now - REPUTATION_WINDOW.total_seconds()
+        month = month_key(current_time)
+        for user_id in sorted(touched):
+            account = self.accounts.get(user_id)
+            if account is None:
+                continue
+            # Les lots expirés retournent au compte émetteur (écriture en partie double)
+            expired = account.expired_amount(now)
+            if expired > EPSILON:
+                self._transaction(user_id, SYSTEM_ID, expired, "Expiration", now, month, now)
+
+            # Supprimer les écritures et les notations anciennes
+            account.log.truncate(history_cutoff)
+            index = 0
+            while index < len(account.ratings) and account.ratings[index].timestamp <= rating_cutoff:
+                index += 1
+            del account.ratings[:index]
+            account.update_reputation_score(now)
+
+            # Lots et notations restants : prochaine échéance
+            if account.lots:
+                self._schedule_expiry(user_id, account.lots[0][0])
+            if account.ratings:
+                self._schedule_expiry(user_id, account.ratings[0].timestamp + REPUTATION_WINDOW.total_seconds())
+
+        # Le compte SYSTEM, contrepartie de toutes les émissions, puis le stock partagé
+        if touched:
+            self.accounts[SYSTEM_ID].log.truncate(history_cutoff)
+            self.store.truncate(history_cutoff)
+        return len(touched)
 
 # Instance unique du système Kudos
 kudos_system = KudosSystem()
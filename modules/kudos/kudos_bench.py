@@ -0,0 +1,238 @@
+# modules/kudos/kudos_bench.py
+# Essai de charge du moteur de virements Kudos : plusieurs fils d'exécution passent
+# des virements (unitaires et par lots) entre comptes tirés au hasard, puis on vérifie
+# les invariants de la partie double. Mesure aussi l'empreinte mémoire par transaction.
+#
+#   python -m modules.kudos.kudos_bench --accounts 1000 --threads 8 --transfers 20000
+#   python -m modules.kudos.kudos_bench --memory 1000000
+
+import argparse
+import gc
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from modules.kudos.kudos import SYSTEM_ID, KudosError, KudosSystem
+
+def check_invariants(system: KudosSystem) -> List[str]:
+    """
+    Vérifie la cohérence des comptes après un essai
+
+    - la somme des soldes (compte SYSTEM compris) est nulle ;
+    - aucun compte d'usager n'est à découvert ;
+    - le solde de chaque usager est égal à la somme de ses lots de Kudos, moins sa dette.
+
+    Returns:
+        list: Anomalies constatées (vide si tout est cohérent)
+    """
+    errors = []
+    total = sum(account.balance for account in system.accounts.values())
+    if abs(total) > 1e-6:
+        errors.append(f"Somme des soldes non nulle : {total}")
+    for user_id, account in system.accounts.items():
+        if user_id == SYSTEM_ID:
+            continue
+        if account.balance < -1e-9:
+            errors.append(f"Compte à découvert : {user_id} ({account.balance})")
+        lots = sum(remaining for _, remaining in account.lots) - account.debt
+        if abs(lots - account.balance) > 1e-6:
+            errors.append(f"Solde incohérent : {user_id} ({account.balance} != {lots})")
+    return errors
+
+def stress_transfers(system: KudosSystem, accounts: int = 1000, threads: int = 8, transfers: int = 20_000,
+                     batch_size: int = 50, initial: float = 100.0, seed: int = 0) -> Dict[str, Any]:
+    """
+    Essai de charge : virements concurrents entre comptes, un quart passés par lots
+
+    Args:
+        system (KudosSystem): Système à éprouver
+        accounts (int): Nombre de comptes
+        threads (int): Nombre de fils d'exécution
+        transfers (int): Nombre de virements par fil
+        batch_size (int): Taille des lots (transfer_batch)
+        initial (float): Kudos attribués à chaque compte avant l'essai
+        seed (int): Graine du tirage aléatoire
+
+    Returns:
+        dict: Virements passés, refusés, débit (virements/s) et anomalies constatées
+    """
+    user_ids = [f"membre_{index:05d}" for index in range(accounts)]
+    for user_id in user_ids:
+        system.add_kudos(user_id, initial)
+
+    done = [0] * threads
+    rejected = [0] * threads
+
+    def worker(index: int) -> None:
+        rng = random.Random(seed + index)
+        remaining = transfers
+        while remaining > 0:
+            try:
+                if rng.random() < 0.25:
+                    size = min(batch_size, remaining)
+                    batch = []
+                    for _ in range(size):
+                        sender, receiver = rng.sample(user_ids, 2)
+                        batch.append((sender, receiver, rng.uniform(0.1, 5.0)))
+                    system.transfer_batch(batch)
+                else:
+                    size = 1
+                    sender, receiver = rng.sample(user_ids, 2)
+                    system.transfer(sender, receiver, rng.uniform(0.1, 20.0))
+                done[index] += size
+            except KudosError:
+                rejected[index] += size
+            remaining -= size
+
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "accounts": accounts,
+        "threads": threads,
+        "transfers": sum(done),
+        "rejected": sum(rejected),
+        "seconds": elapsed,
+        "transfers_per_second": (sum(done) + sum(rejected)) / elapsed if elapsed else 0.0,
+        "errors": check_invariants(system),
+    }
+
+@dataclass
+class _LegacyTransaction:
+    """Transaction telle qu'elle était tenue avant le stock partagé (référence de comparaison)"""
+    sender: str
+    receiver: str
+    amount: float
+    timestamp: datetime
+    description: str
+    rating: Optional[Any] = None
+
+def _traced(build: Callable[[], Any]) -> Tuple[int, Any]:
+    """Mémoire allouée (tracemalloc) et conservée par build ; retourne aussi son résultat"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        gc.collect()
+        return tracemalloc.get_traced_memory()[0] - before, result
+    finally:
+        tracemalloc.stop()
+
+def memory_footprint(transactions: int = 1_000_000, accounts: int = 1000, labels: int = 50,
+                     seed: int = 0) -> Dict[str, Any]:
+    """
+    Empreinte mémoire par transaction, avant et après le stock de transactions partagé
+
+    - legacy : une dataclass par transaction (datetime, libellé), ajoutée aux listes
+      des deux comptes ;
+    - store : stock de transactions et journaux des comptes (identifiants) ;
+    - system : KudosSystem complet (stock, journaux, lots, compteurs mensuels).
+
+    Les libellés sont des textes saisis (un objet par transaction, labels textes
+    distincts) ; les virements sont appliqués directement comme événements, sans
+    validation, à des dates réparties sur 30 jours.
+
+    Returns:
+        dict: Octets par transaction (legacy, store, system) et gain
+    """
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    user_ids = [f"membre_{index:05d}" for index in range(accounts)]
+    senders = rng.integers(0, accounts, transactions)
+    receivers = (senders + rng.integers(1, accounts, transactions)) % accounts
+    amounts = rng.uniform(0.1, 20.0, transactions)
+    texts = rng.integers(0, labels, transactions)
+    timestamps = time.time() - 30 * 86_400 + np.sort(rng.uniform(0, 30 * 86_400, transactions))
+
+    def legacy() -> Dict[str, List[_LegacyTransaction]]:
+        history: Dict[str, List[_LegacyTransaction]] = {user_id: [] for user_id in user_ids}
+        for index in range(transactions):
+            transaction = _LegacyTransaction(
+                sender=user_ids[senders[index]],
+                receiver=user_ids[receivers[index]],
+                amount=float(amounts[index]),
+                timestamp=datetime.fromtimestamp(timestamps[index]),
+                description=f"Échange d'énergie n°{texts[index]}"
+            )
+            history[transaction.sender].append(transaction)
+            history[transaction.receiver].append(transaction)
+        return history
+
+    def shared() -> KudosSystem:
+        system = KudosSystem()
+        for index in range(transactions):
+            system._apply_event("transfer", {
+                "sender": user_ids[senders[index]],
+                "receiver": user_ids[receivers[index]],
+                "amount": float(amounts[index]),
+                "description": f"Échange d'énergie n°{texts[index]}",
+                "timestamp": float(timestamps[index]),
+            })
+        return system
+
+    legacy_bytes, history = _traced(legacy)
+    del history
+    system_bytes, system = _traced(shared)
+    store = system.store
+    store_bytes = (sum(sys.getsizeof(column) for column in
+                       (store.timestamps, store.senders, store.receivers, store.amounts, store.descriptions))
+                   + sum(sys.getsizeof(account.log.ids) for account in system.accounts.values()))
+    return {
+        "transactions": transactions,
+        "legacy": legacy_bytes / transactions,
+        "store": store_bytes / transactions,
+        "system": system_bytes / transactions,
+        "ratio": legacy_bytes / system_bytes if system_bytes else 0.0,
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Essai de charge des virements Kudos")
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--transfers", type=int, default=20_000, help="Virements par fil")
+    parser.add_argument("--ledger", help="Base SQLite du journal (par défaut, en mémoire seulement)")
+    parser.add_argument("--memory", type=int, metavar="N",
+                        help="Mesurer l'empreinte mémoire de N transactions (au lieu de l'essai de charge)")
+    args = parser.parse_args(argv)
+
+    if args.memory:
+        footprint = memory_footprint(args.memory)
+        print(f"{footprint['transactions']} transactions : {footprint['legacy']:.0f} octets/transaction avant, "
+              f"{footprint['system']:.0f} après (dont stock et journaux : {footprint['store']:.0f}), "
+              f"soit {footprint['ratio']:.1f} fois moins")
+        return 0
+
+    ledger = None
+    if args.ledger:
+        from modules.kudos.kudos_ledger import KudosLedger
+        ledger = KudosLedger(args.ledger)
+    system = KudosSystem(ledger=ledger)
+    report = stress_transfers(system, args.accounts, args.threads, args.transfers)
+    print(f"{report['transfers']} virements passés, {report['rejected']} refusés "
+          f"en {report['seconds']:.2f} s ({report['transfers_per_second']:.0f} virements/s)")
+
+    if ledger is not None:
+        # Le journal doit redonner exactement les mêmes soldes
+        balances = {user_id: account.balance for user_id, account in system.accounts.items()}
+        system.rebuild()
+        if any(abs(system.accounts[user_id].balance - balance) > 1e-6 for user_id, balance in balances.items()):
+            report["errors"].append("Les soldes reconstruits depuis le journal diffèrent")
+        ledger.close()
+
+    for error in report["errors"]:
+        print(f"ERREUR : {error}")
+    return 1 if report["errors"] else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
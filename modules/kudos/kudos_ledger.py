@@ -0,0 +1,183 @@
+# modules/kudos/kudos_ledger.py
+# Journal durable des Kudos : chaque opération est un événement ajouté (jamais modifié)
+# dans une base SQLite en mode WAL, avec des validations groupées. Les soldes sont des
+# projections reconstruites à partir du journal ; des points de reprise (checkpoints)
+# évitent de rejouer tout l'historique au démarrage.
+
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Événements mis en attente avant une validation groupée
+BATCH_SIZE = 500
+
+# Délai maximal (s) avant validation des événements en attente
+FLUSH_INTERVAL = 0.2
+
+# Points de reprise conservés (les plus récents)
+KEEP_CHECKPOINTS = 2
+
+def _to_list(value: Any) -> List[Any]:
+    """Sérialisation JSON des colonnes (tableaux array) d'un point de reprise"""
+    return value.tolist()
+
+class KudosLedger:
+    """Journal d'événements Kudos en ajout seul, persistant dans une base SQLite (WAL)"""
+
+    def __init__(self, db_path: str = "kudos_ledger.sqlite", batch_size: int = BATCH_SIZE,
+                 flush_interval: float = FLUSH_INTERVAL):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # Identifiant de ce processus : permet d'ignorer ses propres événements lors d'une synchronisation
+        self.origin = uuid.uuid4().hex
+        self.connection = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("PRAGMA busy_timeout=5000")
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[float, str, str, str]] = []
+        self._last_flush = time.monotonic()
+        self._closed = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._create_schema()
+
+    def _create_schema(self) -> None:
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS events (seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "timestamp REAL NOT NULL, kind TEXT NOT NULL, origin TEXT NOT NULL, payload TEXT NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoints (seq INTEGER PRIMARY KEY, timestamp REAL NOT NULL, state TEXT NOT NULL)"
+        )
+
+    def close(self) -> None:
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+        self.connection.close()
+
+    def __enter__(self) -> "KudosLedger":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def append(self, kind: str, payload: Dict[str, Any], timestamp: Optional[float] = None) -> None:
+        """
+        Ajoute un événement au journal
+
+        L'événement est validé avec les suivants, par lots de batch_size ou au plus
+        tard flush_interval secondes après son ajout (fil de validation en tâche de
+        fond, même sans autre opération) ; flush() force la validation. Un arrêt
+        brutal ne perd que les événements de ce dernier délai.
+        """
+        event = (timestamp or time.time(), kind, self.origin, json.dumps(payload, separators=(",", ":")))
+        with self._lock:
+            if self._flusher is None and not self._closed.is_set():
+                self._flusher = threading.Thread(target=self._flush_loop, name="kudos-ledger-flush", daemon=True)
+                self._flusher.start()
+            self._pending.append(event)
+            due = (len(self._pending) >= self.batch_size
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def _flush_loop(self) -> None:
+        """Valide périodiquement les événements en attente, jusqu'à la fermeture du journal"""
+        while not self._closed.wait(self.flush_interval):
+            if self._pending:
+                try:
+                    self.flush()
+                except sqlite3.Error:
+                    # Base occupée ou verrouillée : nouvelle tentative au prochain passage
+                    pass
+
+    def flush(self) -> int:
+        """
+        Valide les événements en attente en une seule transaction
+
+        Returns:
+            int: Nombre d'événements écrits
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._last_flush = time.monotonic()
+            if not pending:
+                return 0
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                self.connection.executemany(
+                    "INSERT INTO events (timestamp, kind, origin, payload) VALUES (?, ?, ?, ?)", pending)
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                self._pending = pending + self._pending
+                raise
+            self.connection.execute("COMMIT")
+            return len(pending)
+
+    @property
+    def pending(self) -> int:
+        """Nombre d'événements non encore validés"""
+        return len(self._pending)
+
+    def last_seq(self) -> int:
+        """Numéro du dernier événement validé"""
+        return self.connection.execute("SELECT COALESCE(MAX(seq), 0) FROM events").fetchone()[0]
+
+    def events(self, after_seq: int = 0, exclude_origin: Optional[str] = None,
+               until_seq: Optional[int] = None, chunk_size: int = 10_000) -> Iterator[Tuple[int, str, Dict[str, Any]]]:
+        """
+        Parcourt les événements validés après un numéro donné, par blocs
+
+        Args:
+            after_seq (int): Dernier événement déjà appliqué
+            exclude_origin (str): Origine à ignorer (événements déjà appliqués localement)
+            until_seq (int): Dernier événement à lire (par défaut, jusqu'à la fin du journal)
+            chunk_size (int): Nombre d'événements lus par requête
+
+        Yields:
+            tuple: (seq, kind, payload)
+        """
+        if until_seq is None:
+            until_seq = 2 ** 63 - 1
+        while True:
+            rows = self.connection.execute(
+                "SELECT seq, kind, origin, payload FROM events WHERE seq > ? AND seq <= ? ORDER BY seq LIMIT ?",
+                (after_seq, until_seq, chunk_size)).fetchall()
+            if not rows:
+                return
+            for seq, kind, origin, payload in rows:
+                if origin != exclude_origin:
+                    yield seq, kind, json.loads(payload)
+            after_seq = rows[-1][0]
+
+    def write_checkpoint(self, seq: int, state: Dict[str, Any], keep: int = KEEP_CHECKPOINTS) -> None:
+        """Enregistre la projection à jour jusqu'à l'événement seq et purge les anciens points de reprise"""
+        # Sérialisation hors verrou : les ajouts d'événements ne l'attendent pas
+        payload = json.dumps(state, separators=(",", ":"), default=_to_list)
+        with self._lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            self.connection.execute("INSERT OR REPLACE INTO checkpoints (seq, timestamp, state) VALUES (?, ?, ?)",
+                                    (seq, time.time(), payload))
+            self.connection.execute(
+                "DELETE FROM checkpoints WHERE seq NOT IN (SELECT seq FROM checkpoints ORDER BY seq DESC LIMIT ?)",
+                (keep,))
+            self.connection.execute("COMMIT")
+
+    def latest_checkpoint(self) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """
+        Dernier point de reprise
+
+        Returns:
+            int: Numéro du dernier événement inclus (0 si aucun point de reprise)
+            dict: Projection sauvegardée (None si aucun point de reprise)
+        """
+        row = self.connection.execute("SELECT seq, state FROM checkpoints ORDER BY seq DESC LIMIT 1").fetchone()
+        if row is None:
+            return 0, None
+        return row[0], json.loads(row[1])
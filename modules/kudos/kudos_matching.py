@@ -0,0 +1,147 @@
+# modules/kudos/kudos_matching.py
+# Appariement des surplus de production et des besoins de consommation des membres de
+# l'autoconsommation collective, intervalle par intervalle (pas de 15 min sur un an :
+# 35 040 intervalles). Le calcul est vectorisé sur tous les membres et tous les
+# intervalles d'un bloc ; les flux producteur -> consommateur cumulés sont ensuite
+# réglés en Kudos par un seul lot de virements.
+
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence, Tuple
+
+from modules.kudos.kudos import KudosSystem
+
+RULES = ("pro_rata", "priority")
+
+# Intervalles traités par bloc (borne la mémoire des tableaux intermédiaires)
+BLOCK_INTERVALS = 4096
+
+@dataclass
+class MatchingResult:
+    """Résultat d'un appariement (énergies en kWh, membres dans l'ordre de member_ids)"""
+    member_ids: List[str]
+    flows: Any             # Matrice membres x membres : énergie fournie par i à j
+    supplied: Any          # Énergie fournie à la collectivité par membre
+    received: Any          # Énergie reçue de la collectivité par membre
+    surplus: Any           # Surplus non apparié par membre (injecté sur le réseau)
+    deficit: Any           # Besoin non couvert par membre (soutiré au réseau)
+    matched: Any           # Énergie appariée par intervalle
+
+    def transfers(self, kudos_value: float = 1.0, min_amount: float = 1e-6,
+                  description: str = "Échange d'énergie (autoconsommation collective)") -> List[Tuple[str, str, float, str]]:
+        """
+        Virements Kudos correspondant aux flux : chaque consommateur rétribue ses producteurs
+
+        Returns:
+            list: (consommateur, producteur, montant, description), pour transfer_batch
+        """
+        import numpy as np
+        amounts = self.flows * kudos_value
+        producers, consumers = np.nonzero(amounts > min_amount)
+        return [(self.member_ids[consumer], self.member_ids[producer], float(amounts[producer, consumer]), description)
+                for producer, consumer in zip(producers, consumers)]
+
+def _allocate(needs: Any, available: Any, tiers: Optional[Any]) -> Any:
+    """
+    Répartit l'énergie disponible de chaque intervalle entre les besoins
+
+    Pro rata des besoins ; avec des rangs de priorité, les rangs sont servis dans
+    l'ordre croissant, au prorata à l'intérieur d'un rang.
+
+    Args:
+        needs: Besoins membres x intervalles
+        available: Énergie disponible par intervalle
+        tiers: Rang de priorité par membre (None : pro rata sur tous les membres)
+    """
+    import numpy as np
+    allocation = np.zeros_like(needs)
+    groups = [slice(None)] if tiers is None else [tiers == tier for tier in np.unique(tiers)]
+    remaining = available.copy()
+    for group in groups:
+        group_needs = needs[group]
+        total = group_needs.sum(axis=0)
+        served = np.minimum(remaining, total)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = np.where(total > 0, served / total, 0.0)
+        allocation[group] = group_needs * ratio
+        remaining -= served
+    return allocation
+
+def match_intervals(member_ids: Sequence[str], production: Any, consumption: Any, rule: str = "pro_rata",
+                    priorities: Optional[Sequence[int]] = None, block: int = BLOCK_INTERVALS) -> MatchingResult:
+    """
+    Apparie producteurs et consommateurs à chaque intervalle
+
+    Chaque membre consomme d'abord sa propre production ; les surplus d'un intervalle
+    couvrent les besoins des autres membres dans la limite du plus petit des deux
+    totaux. Chaque producteur fournit au prorata de son surplus, chaque consommateur
+    reçoit selon la règle : au prorata de son besoin ("pro_rata") ou par rang de
+    priorité croissant ("priority", pro rata au sein d'un rang).
+
+    Args:
+        member_ids (list): Membres, dans l'ordre des lignes
+        production: Production membres x intervalles (kWh)
+        consumption: Consommation membres x intervalles (kWh)
+        rule (str): "pro_rata" ou "priority"
+        priorities (list): Rang de priorité de chaque membre (règle "priority" ; 0 = servi en premier)
+        block (int): Nombre d'intervalles traités à la fois
+
+    Returns:
+        MatchingResult: Flux cumulés et bilans par membre
+    """
+    import numpy as np
+    if rule not in RULES:
+        raise ValueError(f"Règle inconnue : {rule} (attendu : {', '.join(RULES)})")
+    production = np.asarray(production, dtype=float)
+    consumption = np.asarray(consumption, dtype=float)
+    members = len(member_ids)
+    if production.shape != consumption.shape or production.ndim != 2 or production.shape[0] != members:
+        raise ValueError(f"Production et consommation doivent être de forme ({members}, intervalles)")
+    tiers = None
+    if rule == "priority":
+        if priorities is None or len(priorities) != members:
+            raise ValueError("La règle priority nécessite un rang de priorité par membre")
+        tiers = np.asarray(priorities)
+
+    intervals = production.shape[1]
+    flows = np.zeros((members, members))
+    supplied = np.zeros(members)
+    received = np.zeros(members)
+    surplus_left = np.zeros(members)
+    deficit_left = np.zeros(members)
+    matched = np.zeros(intervals)
+
+    for start in range(0, intervals, block):
+        stop = min(start + block, intervals)
+        net = production[:, start:stop] - consumption[:, start:stop]
+        surplus = np.maximum(net, 0.0)
+        deficit = np.maximum(-net, 0.0)
+        total_surplus = surplus.sum(axis=0)
+        total_deficit = deficit.sum(axis=0)
+        exchanged = np.minimum(total_surplus, total_deficit)
+
+        # Réception selon la règle, fourniture au prorata des surplus
+        reception = _allocate(deficit, exchanged, tiers)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            supply_ratio = np.where(total_surplus > 0, exchanged / total_surplus, 0.0)
+            inverse = np.where(exchanged > 0, 1.0 / exchanged, 0.0)
+        supply = surplus * supply_ratio
+
+        # flux[i, j] = somme sur t de fourniture[i, t] * réception[j, t] / échangé[t]
+        flows += (supply * inverse) @ reception.T
+        supplied += supply.sum(axis=1)
+        received += reception.sum(axis=1)
+        surplus_left += (surplus - supply).sum(axis=1)
+        deficit_left += (deficit - reception).sum(axis=1)
+        matched[start:stop] = exchanged
+
+    return MatchingResult(list(member_ids), flows, supplied, received, surplus_left, deficit_left, matched)
+
+def settle_matching(system: KudosSystem, result: MatchingResult, min_amount: float = 1e-6,
+                    description: str = "Échange d'énergie (autoconsommation collective)") -> list:
+    """
+    Règle un appariement en Kudos par un seul lot de virements atomique (transfer_batch)
+
+    Returns:
+        list: Transactions créées
+    """
+    return system.transfer_batch(result.transfers(system.kudos_value, min_amount, description))
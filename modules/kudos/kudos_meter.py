@@ -0,0 +1,146 @@
+# modules/kudos/kudos_meter.py
+# Attribution des Kudos de production à partir des relevés de compteurs (pas de 15 min,
+# CSV ou Parquet) : lecture par blocs, agrégation vectorisée par membre et par période,
+# puis une écriture groupée par période. Chaque période attribuée est marquée dans le
+# journal avec ses crédits : relancer l'ingestion après une interruption ne crédite
+# jamais deux fois la même période.
+
+from dataclasses import dataclass, field
+from typing import Any, Iterator, List, Optional, Sequence
+
+from modules.kudos.kudos import KudosSystem
+
+# Lignes lues par bloc
+CHUNK_ROWS = 500_000
+
+@dataclass
+class MeterColumns:
+    """Colonnes des relevés : membre, horodatage et énergie produite sur l'intervalle (kWh)"""
+    member: str = "member_id"
+    timestamp: str = "timestamp"
+    energy: str = "kwh"
+
+@dataclass
+class IngestionReport:
+    """Bilan d'une ingestion"""
+    rows: int = 0
+    issued: List[str] = field(default_factory=list)   # Périodes attribuées
+    skipped: List[str] = field(default_factory=list)  # Périodes déjà attribuées
+    rejected: List[str] = field(default_factory=list)  # Périodes trop anciennes (hors des plafonds mensuels)
+    kudos: float = 0.0
+    members: int = 0
+
+def read_meter_chunks(path: str, columns: MeterColumns = MeterColumns(),
+                      chunk_rows: int = CHUNK_ROWS) -> Iterator[Any]:
+    """
+    Lit un fichier de relevés par blocs (DataFrame pandas), sans le charger en entier
+
+    Args:
+        path (str): Fichier .csv ou .parquet
+        columns (MeterColumns): Noms des colonnes
+        chunk_rows (int): Nombre de lignes par bloc
+    """
+    import pandas as pd
+    names = [columns.member, columns.timestamp, columns.energy]
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=names):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=names, chunksize=chunk_rows,
+                               dtype={columns.member: str, columns.energy: "float64"})
+
+def aggregate_chunk(chunk: Any, columns: MeterColumns = MeterColumns(), freq: str = "M") -> Any:
+    """
+    Production d'un bloc par période et par membre (group-by vectorisé)
+
+    Returns:
+        Series: kWh indexés par (période, membre)
+    """
+    import pandas as pd
+    timestamps = pd.to_datetime(chunk[columns.timestamp])
+    if getattr(timestamps.dt, "tz", None) is not None:
+        timestamps = timestamps.dt.tz_localize(None)
+    periods = timestamps.dt.to_period(freq).rename("period")
+    return chunk[columns.energy].groupby([periods, chunk[columns.member].rename("member")]).sum()
+
+def period_key(name: str, period: Any) -> str:
+    """Clé du marqueur de période dans le journal (ex. "production:2024-03")"""
+    return f"{name}:{period}"
+
+def _issue_period(system: KudosSystem, name: str, period: Any, production: Any, clip: bool,
+                  report: IngestionReport) -> None:
+    key = period_key(name, period)
+    if key in system.issued_periods:
+        report.skipped.append(key)
+        return
+    if not system.can_issue_month(period.start_time.to_pydatetime()):
+        report.rejected.append(key)
+        return
+    credited = system.issue_production_credits(
+        list(production.index), production.to_numpy(), timestamp=period.start_time.to_pydatetime(),
+        description=f"Production d'énergie {period}", clip=clip, period=key)
+    report.issued.append(key)
+    report.kudos += sum(credited.values())
+    if system.ledger is not None:
+        # La période est durable avant de passer à la suivante (reprise après interruption)
+        system.ledger.flush()
+
+def ingest_meter_data(system: KudosSystem, path: str, name: str = "production", freq: str = "M",
+                      columns: MeterColumns = MeterColumns(), chunk_rows: int = CHUNK_ROWS,
+                      ordered: bool = False, clip: bool = True) -> IngestionReport:
+    """
+    Attribue les Kudos de production d'un fichier de relevés, période par période
+
+    Les relevés sont agrégés par (période, membre) au fil des blocs. Chaque période est
+    attribuée en une seule écriture (issue_production_credits) portant son marqueur :
+    les périodes déjà attribuées sont ignorées, ce qui rend l'ingestion idempotente
+    et permet de la relancer après une interruption.
+
+    Args:
+        system (KudosSystem): Système Kudos (idéalement adossé à un KudosLedger)
+        path (str): Fichier .csv ou .parquet
+        name (str): Nom du flux de relevés, préfixe des marqueurs de période
+        freq (str): Période d'attribution (pandas : "M" mois, "D" jour...)
+        columns (MeterColumns): Noms des colonnes
+        chunk_rows (int): Nombre de lignes par bloc
+        ordered (bool): Relevés triés par date : chaque période est attribuée dès qu'un bloc
+            la dépasse, sans attendre la fin du fichier
+        clip (bool): Plafonner les crédits au reliquat mensuel de chaque membre (sinon, une
+            période dépassant un plafond est refusée)
+
+    Returns:
+        IngestionReport: Lignes lues, périodes attribuées, ignorées ou refusées, Kudos émis
+    """
+    import pandas as pd
+    report = IngestionReport()
+    totals: Optional[pd.Series] = None
+    members = set()
+
+    for chunk in read_meter_chunks(path, columns, chunk_rows):
+        if chunk.empty:
+            continue
+        report.rows += len(chunk)
+        aggregated = aggregate_chunk(chunk, columns, freq)
+        totals = aggregated if totals is None else totals.add(aggregated, fill_value=0.0)
+        if ordered:
+            # Les périodes antérieures au bloc courant sont complètes
+            current = aggregated.index.get_level_values("period").min()
+            periods = totals.index.get_level_values("period")
+            for period in sorted(periods[periods < current].unique()):
+                production = totals.xs(period, level="period")
+                members.update(production.index)
+                _issue_period(system, name, period, production, clip, report)
+            totals = totals[totals.index.get_level_values("period") >= current]
+
+    if totals is not None and not totals.empty:
+        for period in sorted(totals.index.get_level_values("period").unique()):
+            production = totals.xs(period, level="period")
+            members.update(production.index)
+            _issue_period(system, name, period, production, clip, report)
+    report.members = len(members)
+    return report
+
+def pending_periods(system: KudosSystem, name: str, periods: Sequence[Any]) -> List[str]:
+    """Périodes d'une liste qui n'ont pas encore été attribuées"""
+    return [str(period) for period in periods if period_key(name, period) not in system.issued_periods]
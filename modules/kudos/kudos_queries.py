@@ -0,0 +1,245 @@
+# modules/kudos/kudos_queries.py
+# Requêtes et vues agrégées sur les comptes Kudos pour les tableaux de bord : les
+# tableaux (DataFrame pandas ou Table Arrow) sont construits directement à partir des
+# colonnes du stock de transactions, sans créer d'objet KudosTransaction. Les vues d'un
+# compte partent des identifiants de son journal (recherche dichotomique sur la
+# période) ; les vues collectives lisent le stock en une passe, sans boucle par compte.
+
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+from modules.kudos.kudos import MONTHS_KEPT, SYSTEM_ID, KudosError, KudosSystem, month_key
+
+def _epoch(value: Optional[datetime]) -> Optional[float]:
+    return value.timestamp() if value is not None else None
+
+def _datetimes(timestamps: Any) -> Any:
+    """
+    Horodatages epoch (s) -> datetime64[us] en heure locale, comme datetime.fromtimestamp
+    dans kudos.py : les mois des vues coïncident avec ceux des compteurs mensuels
+
+    Le décalage local (heure d'été comprise) est calculé une fois par heure distincte.
+    """
+    import numpy as np
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    hours, inverse = np.unique(timestamps // 3600, return_inverse=True)
+    offsets = np.fromiter((time.localtime(hour * 3600).tm_gmtoff for hour in hours.tolist()),
+                          np.int64, len(hours))
+    return ((timestamps + offsets[inverse.reshape(-1)]) * 1_000_000).astype("datetime64[us]")
+
+def _output(columns: Dict[str, Any], as_arrow: bool) -> Any:
+    if as_arrow:
+        import pyarrow as pa
+        return pa.table({name: pa.array(values) for name, values in columns.items()})
+    import pandas as pd
+    return pd.DataFrame(columns)
+
+def _columns(system: KudosSystem, user_id: str, start: Optional[datetime] = None,
+             end: Optional[datetime] = None) -> Dict[str, Any]:
+    """Colonnes des écritures d'un compte sur une période (copiées sous le verrou du compte), avec leurs identifiants"""
+    import numpy as np
+    if user_id not in system.accounts:
+        raise KudosError(f"Compte non trouvé: {user_id}")
+    store = system.store
+    with system._locked((user_id,)):
+        log = system.accounts[user_id].log
+        first, last = log.bounds(_epoch(start), _epoch(end))
+        ids = np.frombuffer(log.ids[first:last], dtype=np.int64).copy() if last > first else np.zeros(0, np.int64)
+        rows = store.gather(ids)
+    outgoing = rows["senders"] == store.name_code(user_id)
+    return {
+        "id": ids,
+        "timestamp": rows["timestamps"],
+        "amount": np.where(outgoing, -rows["amounts"], rows["amounts"]),
+        "counterparty": store.name_array()[np.where(outgoing, rows["receivers"], rows["senders"])],
+        "description": store.text_array()[rows["descriptions"]],
+    }
+
+def _page(columns: Dict[str, Any], offset: int, limit: Optional[int]) -> Dict[str, Any]:
+    stop = None if limit is None else offset + limit
+    return {name: values[offset:stop] for name, values in columns.items()}
+
+def account_frame(system: KudosSystem, user_id: str, counterparty: Optional[str] = None,
+                  start: Optional[datetime] = None, end: Optional[datetime] = None,
+                  offset: int = 0, limit: Optional[int] = None, as_arrow: bool = False) -> Any:
+    """
+    Écritures d'un compte, par ordre chronologique
+
+    Args:
+        system (KudosSystem): Système Kudos
+        user_id (str): Compte
+        counterparty (str): Ne garder que les écritures avec ce membre
+        start, end (datetime): Période [start, end)
+        offset, limit (int): Pagination
+        as_arrow (bool): Table Arrow au lieu d'un DataFrame pandas
+
+    Returns:
+        Colonnes timestamp, counterparty, amount (signé : crédit positif), description
+    """
+    columns = _columns(system, user_id, start, end)
+    if counterparty is not None:
+        mask = columns["counterparty"] == counterparty
+        columns = {name: values[mask] for name, values in columns.items()}
+    columns = _page(columns, offset, limit)
+    return _output({
+        "timestamp": _datetimes(columns["timestamp"]),
+        "counterparty": columns["counterparty"],
+        "amount": columns["amount"],
+        "description": columns["description"],
+    }, as_arrow)
+
+def transactions_frame(system: KudosSystem, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                       accounts: Optional[Iterable[str]] = None, offset: int = 0, limit: Optional[int] = None,
+                       as_arrow: bool = False) -> Any:
+    """
+    Transactions de la collectivité sur une période, une ligne par virement
+
+    Les colonnes sont lues en une passe dans le stock partagé ; seule la page demandée
+    est convertie (noms, libellés, dates). Les lignes sont triées par date puis par
+    identifiant de transaction : l'ordre est stable d'une page à l'autre, même pour
+    des virements de la même seconde.
+
+    Args:
+        accounts (list): Ne garder que les virements reçus par ces comptes (par défaut, tous)
+
+    Returns:
+        Colonnes timestamp, sender, receiver, amount, description
+    """
+    import numpy as np
+    store = system.store
+    rows = store.select(_epoch(start), _epoch(end))
+    if accounts is not None:
+        accounts = list(accounts)
+        for user_id in accounts:
+            if user_id not in system.accounts:
+                raise KudosError(f"Compte non trouvé: {user_id}")
+        keep = np.isin(rows["receivers"], [store.name_code(user_id) for user_id in accounts])
+        rows = {name: values[keep] for name, values in rows.items()}
+    # Les identifiants sont croissants dans le stock : un tri stable par date ordonne par (date, identifiant)
+    order = np.argsort(rows["timestamps"], kind="stable")
+    order = order[offset:None if limit is None else offset + limit]
+    names = store.name_array()
+    return _output({
+        "timestamp": _datetimes(rows["timestamps"][order]),
+        "sender": names[rows["senders"][order]],
+        "receiver": names[rows["receivers"][order]],
+        "amount": rows["amounts"][order],
+        "description": store.text_array()[rows["descriptions"][order]],
+    }, as_arrow)
+
+def ratings_frame(system: KudosSystem, user_id: str, start: Optional[datetime] = None,
+                  end: Optional[datetime] = None, offset: int = 0, limit: Optional[int] = None,
+                  as_arrow: bool = False) -> Any:
+    """Notations reçues par un membre (colonnes timestamp, rater, score, comment)"""
+    if user_id not in system.accounts:
+        raise KudosError(f"Compte non trouvé: {user_id}")
+    ratings = [rating for rating in system.accounts[user_id].ratings
+               if (start is None or rating.timestamp >= start.timestamp())
+               and (end is None or rating.timestamp < end.timestamp())]
+    ratings = ratings[offset:None if limit is None else offset + limit]
+    return _output({
+        "timestamp": _datetimes([rating.timestamp for rating in ratings]),
+        "rater": [rating.rater_id for rating in ratings],
+        "score": [float(rating.score) for rating in ratings],
+        "comment": [rating.comment for rating in ratings],
+    }, as_arrow)
+
+def net_flow(system: KudosSystem, member_a: str, member_b: str, start: Optional[datetime] = None,
+             end: Optional[datetime] = None) -> Dict[str, float]:
+    """
+    Flux de Kudos entre deux membres sur une période
+
+    Returns:
+        dict: a_to_b, b_to_a et net (positif si a a plus donné qu'il n'a reçu)
+    """
+    columns = _columns(system, member_a, start, end)
+    amounts = columns["amount"][columns["counterparty"] == member_b]
+    a_to_b = float(-amounts[amounts < 0].sum())
+    b_to_a = float(amounts[amounts > 0].sum())
+    return {"a_to_b": a_to_b, "b_to_a": b_to_a, "net": a_to_b - b_to_a}
+
+def top_producers(system: KudosSystem, month: Optional[datetime] = None, n: int = 10, as_arrow: bool = False) -> Any:
+    """
+    Membres ayant reçu le plus de Kudos de production (émis par SYSTEM) sur un mois
+
+    Les mois récents sont lus dans les compteurs mensuels des comptes, les plus anciens
+    dans les journaux.
+
+    Returns:
+        Colonnes member, kudos (ordre décroissant)
+    """
+    import numpy as np
+    month = month or datetime.now()
+    key = month_key(month)
+    members = [user_id for user_id in system.accounts if user_id != SYSTEM_ID]
+    if key > month_key(datetime.now()) - MONTHS_KEPT:
+        issued = np.fromiter((system.accounts[user_id].month_totals(key)[0] for user_id in members),
+                             float, len(members))
+    else:
+        start = month.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        end = start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+        issued = np.zeros(len(members))
+        for index, user_id in enumerate(members):
+            columns = _columns(system, user_id, start, end)
+            mask = (columns["counterparty"] == SYSTEM_ID) & (columns["amount"] > 0)
+            issued[index] = columns["amount"][mask].sum()
+    order = np.argsort(-issued, kind="stable")[:n]
+    order = order[issued[order] > 0]
+    return _output({"member": np.array(members, dtype=object)[order], "kudos": issued[order]}, as_arrow)
+
+def balance_history(system: KudosSystem, user_id: str, freq: Optional[str] = None,
+                    start: Optional[datetime] = None, as_arrow: bool = False) -> Any:
+    """
+    Évolution du solde d'un membre
+
+    Le solde après chaque écriture est déduit du solde courant par somme cumulée
+    inverse des montants (l'historique expiré n'est pas nécessaire).
+
+    Args:
+        freq (str): Rééchantillonnage pandas ("D", "W", "MS"...) : solde en fin de période
+        start (datetime): Début de l'historique
+
+    Returns:
+        Colonnes timestamp, balance
+    """
+    import numpy as np
+    columns = _columns(system, user_id)
+    balance = system.accounts[user_id].balance
+    amounts = columns["amount"]
+    # Solde après l'écriture k = solde courant - somme des écritures suivantes
+    after = balance - (np.cumsum(amounts[::-1])[::-1] - amounts)
+    timestamps = columns["timestamp"]
+    if start is not None:
+        keep = timestamps >= start.timestamp()
+        timestamps, after = timestamps[keep], after[keep]
+    if freq is None:
+        return _output({"timestamp": _datetimes(timestamps), "balance": after}, as_arrow)
+    import pandas as pd
+    series = pd.Series(after, index=pd.DatetimeIndex(_datetimes(timestamps))).resample(freq).last().ffill()
+    return _output({"timestamp": series.index.to_numpy(), "balance": series.to_numpy()}, as_arrow)
+
+def monthly_activity(system: KudosSystem, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                     as_arrow: bool = False) -> Any:
+    """
+    Activité mensuelle de la collectivité : Kudos émis, échangés entre membres et expirés
+
+    Calculée en une passe sur les colonnes du stock : les virements sont classés
+    (émis par SYSTEM, rendus à SYSTEM, entre membres) puis sommés par mois.
+
+    Returns:
+        Colonnes month, issued, exchanged, expired, transactions
+    """
+    import numpy as np
+    store = system.store
+    rows = store.select(_epoch(start), _epoch(end))
+    system_code = store.name_code(SYSTEM_ID)
+    expired = rows["receivers"] == system_code
+    issued = (rows["senders"] == system_code) & ~expired
+    exchanged = ~expired & ~issued
+    months, index = np.unique(_datetimes(rows["timestamps"]).astype("datetime64[M]"), return_inverse=True)
+    columns: Dict[str, Any] = {"month": months.astype(str)}
+    for name, mask in (("issued", issued), ("exchanged", exchanged), ("expired", expired)):
+        columns[name] = np.bincount(index[mask], weights=rows["amounts"][mask], minlength=len(months)).astype(float)
+    columns["transactions"] = np.bincount(index, minlength=len(months))
+    return _output(columns, as_arrow)
@@ -0,0 +1,260 @@
+# modules/kudos/kudos_store.py
+# Stockage compact des écritures Kudos : toutes les transactions sont tenues une seule
+# fois, en colonnes (tableaux array, horodatages entiers, noms de comptes et libellés
+# internés sous forme de codes), dans un TransactionStore ; le journal de chaque compte
+# ne contient que les identifiants de ses transactions, triés par date, et se tronque
+# par recherche dichotomique quand les écritures expirent.
+
+import sys
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Horodatage d'une transaction qui n'est plus dans le stock (antérieure à toute date)
+MISSING = -(2 ** 63)
+
+class TransactionStore:
+    """
+    Transactions de tous les comptes en colonnes, référencées par identifiant
+
+    Les identifiants sont attribués dans l'ordre d'ajout et ne changent jamais ; les
+    plus anciennes transactions sont retirées en tête (base = identifiant de la
+    première transaction conservée). Une transaction coûte 28 octets : horodatage
+    (secondes depuis l'epoch) et montant sur 8 octets, émetteur, destinataire et
+    libellé sous forme de codes sur 4 octets.
+    """
+
+    __slots__ = ("base", "timestamps", "senders", "receivers", "amounts", "descriptions",
+                 "names", "texts", "_name_codes", "_text_codes", "_arrays", "_lock")
+
+    def __init__(self):
+        self.base = 0
+        self.timestamps = array("q")
+        self.senders = array("i")       # Codes des comptes (names)
+        self.receivers = array("i")
+        self.amounts = array("d")       # Montants positifs
+        self.descriptions = array("i")  # Codes des libellés (texts)
+        self.names: List[str] = []
+        self.texts: List[str] = []
+        self._name_codes: Dict[str, int] = {}
+        self._text_codes: Dict[str, int] = {}
+        self._arrays: Dict[str, Any] = {}  # Tableaux numpy de names et texts (cache)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def end(self) -> int:
+        """Identifiant de la prochaine transaction"""
+        return self.base + len(self.timestamps)
+
+    def _name_code(self, name: str) -> int:
+        code = self._name_codes.get(name)
+        if code is None:
+            code = self._name_codes[name] = len(self.names)
+            self.names.append(sys.intern(name))
+        return code
+
+    def _text_code(self, text: str) -> int:
+        code = self._text_codes.get(text)
+        if code is None:
+            code = self._text_codes[text] = len(self.texts)
+            self.texts.append(sys.intern(text))
+        return code
+
+    def name_code(self, name: str) -> int:
+        """Code d'un compte (-1 s'il n'a encore aucune transaction)"""
+        return self._name_codes.get(name, -1)
+
+    def append(self, timestamp: int, sender: str, receiver: str, amount: float, description: str) -> int:
+        """Ajoute une transaction ; retourne son identifiant"""
+        with self._lock:
+            self.timestamps.append(timestamp)
+            self.senders.append(self._name_code(sender))
+            self.receivers.append(self._name_code(receiver))
+            self.amounts.append(amount)
+            self.descriptions.append(self._text_code(description))
+            return self.base + len(self.timestamps) - 1
+
+    def timestamp(self, tx_id: int) -> int:
+        """Horodatage d'une transaction (MISSING si elle a été retirée)"""
+        with self._lock:
+            index = tx_id - self.base
+            return self.timestamps[index] if index >= 0 else MISSING
+
+    def row(self, tx_id: int) -> Tuple[int, str, str, float, str]:
+        """Transaction (horodatage, émetteur, destinataire, montant, libellé)"""
+        with self._lock:
+            index = tx_id - self.base
+            if index < 0:
+                raise KeyError(tx_id)
+            return (self.timestamps[index], self.names[self.senders[index]], self.names[self.receivers[index]],
+                    self.amounts[index], self.texts[self.descriptions[index]])
+
+    def truncate(self, cutoff: int) -> int:
+        """
+        Retire les transactions de tête antérieures ou égales à cutoff
+
+        Seul le début du stock est retiré : une transaction antidatée ajoutée plus tard
+        est conservée jusqu'à ce que celles qui la précèdent expirent.
+
+        Returns:
+            int: Nombre de transactions retirées
+        """
+        with self._lock:
+            timestamps = self.timestamps
+            index = 0
+            while index < len(timestamps) and timestamps[index] <= cutoff:
+                index += 1
+            if index:
+                for column in (self.timestamps, self.senders, self.receivers, self.amounts, self.descriptions):
+                    del column[:index]
+                self.base += index
+            return index
+
+    def gather(self, ids: Any) -> Dict[str, Any]:
+        """
+        Colonnes (tableaux numpy) des transactions d'une liste d'identifiants
+
+        Returns:
+            dict: timestamps, senders et receivers (codes), amounts, descriptions (codes)
+        """
+        import numpy as np
+        columns = (("timestamps", np.int64), ("senders", np.int32), ("receivers", np.int32),
+                   ("amounts", np.float64), ("descriptions", np.int32))
+        with self._lock:
+            index = np.asarray(ids, dtype=np.int64) - self.base
+            if not len(self.timestamps) or not len(index):
+                return {name: np.zeros(0, dtype=dtype) for name, dtype in columns}
+            return {name: np.frombuffer(getattr(self, name), dtype=dtype)[index] for name, dtype in columns}
+
+    def select(self, start: Optional[float] = None, end: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Colonnes (tableaux numpy copiés) des transactions conservées de la période [start, end)
+
+        Le stock est parcouru en une passe vectorisée, sans passer par les journaux des
+        comptes ; les lignes restent dans l'ordre des identifiants.
+
+        Returns:
+            dict: ids, timestamps, senders et receivers (codes), amounts, descriptions (codes)
+        """
+        import numpy as np
+        columns = (("timestamps", np.int64), ("senders", np.int32), ("receivers", np.int32),
+                   ("amounts", np.float64), ("descriptions", np.int32))
+        with self._lock:
+            if not len(self.timestamps):
+                selected = {name: np.zeros(0, dtype=dtype) for name, dtype in columns}
+                selected["ids"] = np.zeros(0, dtype=np.int64)
+                return selected
+            timestamps = np.frombuffer(self.timestamps, dtype=np.int64)
+            mask = np.ones(len(timestamps), dtype=bool)
+            if start is not None:
+                mask &= timestamps >= start
+            if end is not None:
+                mask &= timestamps < end
+            index = np.flatnonzero(mask)
+            # Les vues sur les tableaux array doivent être libérées avant tout ajout
+            del timestamps, mask
+            selected = {name: np.frombuffer(getattr(self, name), dtype=dtype)[index] for name, dtype in columns}
+            selected["ids"] = index + self.base
+            return selected
+
+    def _array(self, name: str) -> Any:
+        import numpy as np
+        values = getattr(self, name)
+        cached = self._arrays.get(name)
+        if cached is None or len(cached) != len(values):
+            cached = self._arrays[name] = np.array(values, dtype=object)
+        return cached
+
+    def name_array(self) -> Any:
+        """Noms des comptes indexés par code (tableau numpy d'objets, mis en cache)"""
+        return self._array("names")
+
+    def text_array(self) -> Any:
+        """Libellés indexés par code (tableau numpy d'objets, mis en cache)"""
+        return self._array("texts")
+
+    def to_state(self) -> Dict[str, Any]:
+        """Copie des colonnes (tableaux array, sérialisés en listes par le journal)"""
+        with self._lock:
+            return {
+                "base": self.base,
+                "timestamps": self.timestamps[:],
+                "senders": self.senders[:],
+                "receivers": self.receivers[:],
+                "amounts": self.amounts[:],
+                "descriptions": self.descriptions[:],
+                "names": list(self.names),
+                "texts": list(self.texts),
+            }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "TransactionStore":
+        store = cls()
+        store.base = state["base"]
+        for name in ("timestamps", "senders", "receivers", "amounts", "descriptions"):
+            getattr(store, name).extend(state[name])
+        for name in state["names"]:
+            store._name_code(name)
+        for text in state["texts"]:
+            store._text_code(text)
+        return store
+
+class AccountLog:
+    """Écritures d'un compte : identifiants de ses transactions, dans l'ordre chronologique"""
+
+    __slots__ = ("store", "ids")
+
+    def __init__(self, store: Optional[TransactionStore] = None):
+        self.store = store if store is not None else TransactionStore()
+        self.ids = array("q")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def append(self, tx_id: int, timestamp: int) -> None:
+        """Ajoute une écriture (insérée à sa place si elle est antérieure à la dernière)"""
+        ids = self.ids
+        if not ids or self.store.timestamp(ids[-1]) <= timestamp:
+            ids.append(tx_id)
+            return
+        ids.insert(bisect_right(ids, timestamp, key=self.store.timestamp), tx_id)
+
+    def truncate(self, cutoff: int) -> int:
+        """
+        Supprime les écritures antérieures ou égales à cutoff (recherche dichotomique),
+        ainsi que celles dont la transaction a déjà été retirée du stock
+
+        Returns:
+            int: Nombre d'écritures supprimées
+        """
+        index = bisect_right(self.ids, cutoff, key=self.store.timestamp)
+        if index:
+            del self.ids[:index]
+        return index
+
+    def bounds(self, start: Optional[float] = None, end: Optional[float] = None) -> Tuple[int, int]:
+        """Indices [début, fin) des écritures comprises entre start (inclus) et end (exclu)"""
+        key = self.store.timestamp
+        first = bisect_left(self.ids, MISSING + 1 if start is None else start, key=key)
+        last = len(self.ids) if end is None else bisect_left(self.ids, end, key=key)
+        return first, max(first, last)
+
+    def rows(self, start: Optional[float] = None,
+             end: Optional[float] = None) -> Iterator[Tuple[int, str, str, float, str]]:
+        """Transactions (horodatage, émetteur, destinataire, montant, libellé) d'une période"""
+        first, last = self.bounds(start, end)
+        for index in range(first, last):
+            yield self.store.row(self.ids[index])
+
+    def to_state(self) -> array:
+        return self.ids[:]
+
+    @classmethod
+    def from_state(cls, state: List[int], store: TransactionStore) -> "AccountLog":
+        log = cls(store)
+        log.ids.extend(state)
+        return log
@@ -0,0 +1,306 @@
+# modules/kudos/kudos_workload.py
+# Charge synthétique du système Kudos selon le nombre de membres : génération d'une
+# collectivité (production, activité, notations) avec des distributions réalistes, puis
+# mesure des opérations (débit, latences p50/p99, mémoire). Les résultats sont écrits en
+# JSON et peuvent être comparés à une référence pour détecter les régressions.
+#
+#   python -m modules.kudos.kudos_workload --members 1000 10000 100000 --output kudos_workload.json
+#   python -m modules.kudos.kudos_workload --members 1000 --baseline kudos_workload.json
+
+import argparse
+import gc
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from modules.kudos.kudos import KudosError, KudosSystem, add_months
+
+# Tailles de collectivité mesurées par défaut
+MEMBER_COUNTS = (1_000, 10_000, 100_000)
+
+# Opérations mesurées (méthodes de KudosSystem)
+OPERATIONS = ("add_kudos", "use_kudos", "add_rating", "get_balance", "cleanup_expired")
+
+# Écart toléré par rapport à la référence (débit et latence p99)
+TOLERANCE = 0.25
+
+# Écart absolu (µs par opération) en dessous duquel une variation est du bruit de mesure
+MIN_DELTA_US = 2.0
+
+@dataclass
+class Workload:
+    """Opérations synthétiques sur une collectivité de membres"""
+    members: List[str]
+    production: Any                          # kWh par membre et par mois passé (membres x mois)
+    issuance: List[Tuple[str, float]]        # add_kudos (membre, Kudos)
+    transfers: List[Tuple[str, str, float]]  # use_kudos (payeur, producteur, Kudos)
+    ratings: List[Tuple[str, str, float]]    # add_rating (évaluateur, évalué, note)
+    queries: List[str]                       # get_balance (membre)
+    cleanup_days: int                        # cleanup_expired : un passage par jour
+
+def generate_workload(members: int, operations: int = 10_000, months: int = 12, producer_share: float = 0.3,
+                      cleanup_days: int = 62, seed: int = 0) -> Workload:
+    """
+    Génère la charge d'une collectivité de N membres
+
+    - production mensuelle log-normale, saisonnière ; une part des membres (producer_share)
+      a une installation dix fois plus grande ;
+    - activité des membres selon une loi de Zipf (quelques membres très actifs) :
+      payeurs, évaluateurs et soldes consultés sont tirés selon cette activité ;
+    - les Kudos sont versés aux producteurs au prorata de leur capacité, pour des
+      montants log-normaux ; les notes sont majoritairement bonnes (4 ou 5).
+
+    Args:
+        members (int): Nombre de membres
+        operations (int): Nombre d'opérations par type
+        months (int): Mois de production passés attribués avant la mesure
+        producer_share (float): Part des membres producteurs
+        cleanup_days (int): Jours de traitement quotidien des expirations
+        seed (int): Graine du tirage aléatoire
+    """
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    member_ids = [f"membre_{index:06d}" for index in range(members)]
+
+    capacity = rng.lognormal(np.log(40.0), 0.6, members)
+    capacity[rng.random(members) < producer_share] *= 10.0
+    # Mois passés, du plus ancien au plus récent : production plus forte l'été
+    now = datetime.now()
+    calendar_months = np.array([add_months(now, -offset).month for offset in range(months, 0, -1)])
+    season = 1.0 + 0.5 * np.cos(2 * np.pi * (calendar_months - 7) / 12)
+    production = capacity[:, None] * season[None, :] * rng.lognormal(0.0, 0.2, (members, months))
+
+    activity = 1.0 / np.arange(1, members + 1) ** 1.1
+    activity = activity[rng.permutation(members)]
+    activity /= activity.sum()
+    producer_weights = capacity / capacity.sum()
+
+    def draw(weights: Any) -> Any:
+        return rng.choice(members, size=operations, p=weights)
+
+    payers, producers = draw(activity), draw(producer_weights)
+    producers = np.where(producers == payers, (producers + 1) % members, producers)
+    raters, rated = draw(activity), draw(producer_weights)
+    rated = np.where(rated == raters, (rated + 1) % members, rated)
+    scores = rng.choice([1.0, 2.0, 3.0, 4.0, 5.0], size=operations, p=[0.03, 0.05, 0.12, 0.35, 0.45])
+
+    return Workload(
+        members=member_ids,
+        production=production,
+        issuance=[(member_ids[index], float(amount)) for index, amount
+                  in zip(draw(producer_weights), rng.lognormal(np.log(5.0), 0.8, operations))],
+        transfers=[(member_ids[payer], member_ids[producer], float(amount)) for payer, producer, amount
+                   in zip(payers, producers, rng.lognormal(np.log(2.0), 0.9, operations))],
+        ratings=[(member_ids[rater], member_ids[target], float(score)) for rater, target, score
+                 in zip(raters, rated, scores)],
+        queries=[member_ids[index] for index in draw(activity)],
+        cleanup_days=cleanup_days,
+    )
+
+def _max_rss_mb() -> Optional[float]:
+    """Mémoire résidente maximale du processus (Mo), si la plateforme la fournit"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Ko sous Linux, octets sous macOS
+    return peak / (1024 * 1024) if platform.system() == "Darwin" else peak / 1024
+
+def _measure(call: Callable[[Any], Any], arguments: Sequence[Any], sample: int) -> Dict[str, Any]:
+    """
+    Mesure une opération sur une liste d'arguments
+
+    Les `sample` premiers appels sont faits sous tracemalloc (mémoire conservée par
+    appel), les suivants sont chronométrés un à un ; les refus (KudosError) sont
+    comptés et chronométrés comme les autres appels.
+    """
+    import numpy as np
+    sample = min(sample, max(1, len(arguments) // 10))
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        for argument in arguments[:sample]:
+            try:
+                call(argument)
+            except KudosError:
+                pass
+        retained = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+    timed = arguments[sample:]
+    latencies = np.zeros(len(timed))
+    rejected = 0
+    clock = time.perf_counter
+    start = clock()
+    for index, argument in enumerate(timed):
+        begin = clock()
+        try:
+            call(argument)
+        except KudosError:
+            rejected += 1
+        latencies[index] = clock() - begin
+    elapsed = clock() - start
+    return {
+        "count": len(timed),
+        "rejected": rejected,
+        "seconds": elapsed,
+        "ops_per_second": len(timed) / elapsed if elapsed else 0.0,
+        "p50_us": float(np.percentile(latencies, 50) * 1e6) if len(timed) else 0.0,
+        "p99_us": float(np.percentile(latencies, 99) * 1e6) if len(timed) else 0.0,
+        "bytes_per_op": retained / sample,
+    }
+
+def run_workload(workload: Workload, ledger: Any = None, sample: int = 1000) -> Dict[str, Any]:
+    """
+    Mesure les opérations de KudosSystem sur une charge générée
+
+    Les mois de production passés sont d'abord attribués (issue_production_credits),
+    puis chaque opération est mesurée à son tour ; cleanup_expired est appelé une
+    fois par jour à partir d'aujourd'hui, si bien que les lots du mois le plus
+    ancien arrivent à échéance pendant la mesure.
+
+    Args:
+        workload (Workload): Charge générée
+        ledger (KudosLedger): Journal du système mesuré (par défaut, en mémoire seulement)
+        sample (int): Appels mesurés sous tracemalloc par opération
+
+    Returns:
+        dict: Préparation, transactions, mémoire résidente et mesures par opération
+    """
+    system = KudosSystem(ledger=ledger)
+    months = workload.production.shape[1]
+    start = time.perf_counter()
+    month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    for offset in range(months):
+        system.issue_production_credits(workload.members, workload.production[:, offset],
+                                        timestamp=add_months(month_start, offset - months), clip=True)
+    setup = time.perf_counter() - start
+
+    today = datetime.now()
+    calls: Dict[str, Tuple[Callable[[Any], Any], Sequence[Any]]] = {
+        "add_kudos": (lambda args: system.add_kudos(*args), workload.issuance),
+        "use_kudos": (lambda args: system.use_kudos(*args), workload.transfers),
+        "add_rating": (lambda args: system.add_rating(*args), workload.ratings),
+        "get_balance": (system.get_balance, workload.queries),
+        "cleanup_expired": (lambda day: system.cleanup_expired(today + timedelta(days=day)),
+                            list(range(workload.cleanup_days))),
+    }
+    results = {name: _measure(*calls[name], sample) for name in OPERATIONS}
+    if ledger is not None:
+        ledger.flush()
+    return {
+        "members": len(workload.members),
+        "setup_seconds": setup,
+        "transactions": len(system.store),
+        "max_rss_mb": _max_rss_mb(),
+        "operations": results,
+    }
+
+def run_benchmark(member_counts: Sequence[int] = MEMBER_COUNTS, operations: int = 10_000,
+                  with_ledger: bool = False, seed: int = 0) -> Dict[str, Any]:
+    """
+    Mesure toutes les tailles de collectivité
+
+    Args:
+        member_counts (list): Nombres de membres
+        operations (int): Opérations par type
+        with_ledger (bool): Adosser chaque système à un KudosLedger (fichier temporaire)
+        seed (int): Graine du tirage aléatoire
+
+    Returns:
+        dict: Contexte de la mesure et résultats par taille (sérialisable en JSON)
+    """
+    runs = []
+    for members in member_counts:
+        workload = generate_workload(members, operations, seed=seed)
+        if with_ledger:
+            from modules.kudos.kudos_ledger import KudosLedger
+            with tempfile.TemporaryDirectory() as directory:
+                ledger = KudosLedger(os.path.join(directory, "kudos_ledger.sqlite"))
+                try:
+                    runs.append(run_workload(workload, ledger))
+                finally:
+                    ledger.close()
+        else:
+            runs.append(run_workload(workload))
+    return {
+        "generated": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "ledger": with_ledger,
+        "operations": operations,
+        "seed": seed,
+        "runs": runs,
+    }
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float = TOLERANCE,
+                    min_delta_us: float = MIN_DELTA_US) -> List[str]:
+    """
+    Compare deux mesures : débit en baisse ou latence p99 en hausse de plus de `tolerance`
+
+    Les écarts de moins de min_delta_us par opération (opérations de l'ordre de la
+    microseconde) ne sont pas signalés.
+
+    Returns:
+        list: Régressions constatées (tailles et opérations présentes dans les deux mesures)
+    """
+    previous = {run["members"]: run["operations"] for run in baseline.get("runs", [])}
+    regressions = []
+    for run in current.get("runs", []):
+        for name, measure in run["operations"].items():
+            reference = previous.get(run["members"], {}).get(name)
+            if reference is None:
+                continue
+            label = f"{name} ({run['members']} membres)"
+            mean_us = 1e6 / measure["ops_per_second"] if measure["ops_per_second"] else float("inf")
+            reference_us = 1e6 / reference["ops_per_second"] if reference["ops_per_second"] else float("inf")
+            if (measure["ops_per_second"] < reference["ops_per_second"] * (1 - tolerance)
+                    and mean_us - reference_us > min_delta_us):
+                regressions.append(f"{label} : {measure['ops_per_second']:.0f} op/s "
+                                   f"au lieu de {reference['ops_per_second']:.0f}")
+            if (measure["p99_us"] > reference["p99_us"] * (1 + tolerance)
+                    and measure["p99_us"] - reference["p99_us"] > min_delta_us):
+                regressions.append(f"{label} : p99 {measure['p99_us']:.0f} µs au lieu de {reference['p99_us']:.0f}")
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Mesure des opérations Kudos selon le nombre de membres")
+    parser.add_argument("--members", type=int, nargs="+", default=list(MEMBER_COUNTS))
+    parser.add_argument("--operations", type=int, default=10_000, help="Opérations par type")
+    parser.add_argument("--ledger", action="store_true", help="Adosser le système à un journal SQLite")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="kudos_workload.json", help="Fichier JSON des résultats")
+    parser.add_argument("--baseline", help="Résultats de référence (JSON) à comparer")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.members, args.operations, args.ledger, args.seed)
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+
+    for run in report["runs"]:
+        print(f"{run['members']} membres : préparation {run['setup_seconds']:.1f} s, "
+              f"{run['transactions']} transactions")
+        for name, measure in run["operations"].items():
+            print(f"  {name:16} {measure['ops_per_second']:>10.0f} op/s  p50 {measure['p50_us']:>8.1f} µs  "
+                  f"p99 {measure['p99_us']:>9.1f} µs  {measure['bytes_per_op']:>8.0f} o/op")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            regressions = compare_results(json.load(handle), report, args.tolerance)
+        for regression in regressions:
+            print(f"RÉGRESSION : {regression}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
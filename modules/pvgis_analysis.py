@@ -1,6 +1,4 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
 import subprocess
 import json
 from modules.state_manager import StateManager
@@ -40,6 +38,7 @@ def pvgis_analysis_section():
             
     # Carte interactive
     st.subheader("🗺️ Localisation")
+    import pandas as pd
     location_data = pd.DataFrame({
         'latitude': [latitude],
         'longitude': [longitude]
@@ -0,0 +1,325 @@
+# modules/sheets_sync.py
+# Synchronisation incrémentale vers Google Sheets : une copie locale (shadow) du dernier
+# état envoyé permet de n'envoyer que les cellules modifiées, en un seul values.batchUpdate,
+# avec reprise exponentielle sur les erreurs de quota (429) et d'indisponibilité (5xx).
+
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Feuille -> lignes de valeurs
+SheetValues = Dict[str, List[List[Any]]]
+# Feuille -> {(ligne, colonne): valeur}, indices à partir de 0
+SheetCells = Dict[str, Dict[Tuple[int, int], Any]]
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+class SheetsApiError(Exception):
+    """Erreur HTTP de l'API Sheets (utilisée par le service factice)"""
+
+    def __init__(self, status: int, message: str = ""):
+        super().__init__(message or f"HTTP {status}")
+        self.status = status
+
+def _status(error: Exception) -> Optional[int]:
+    """Code HTTP d'une erreur (googleapiclient.errors.HttpError ou SheetsApiError)"""
+    status = getattr(error, "status", None)
+    if status is None:
+        status = getattr(getattr(error, "resp", None), "status", None)
+    try:
+        return int(status) if status is not None else None
+    except (TypeError, ValueError):
+        return None
+
+def _normalize(value: Any) -> Any:
+    """Valeur telle que la feuille la stocke (scalaires NumPy convertis, None -> cellule vide)"""
+    if hasattr(value, "item"):
+        value = value.item()
+    if value is None:
+        return ""
+    if isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+def column_letter(index: int) -> str:
+    """Lettre de colonne A1 (0 -> A, 26 -> AA)"""
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+def _a1(sheet: str, row: int, first_col: int, last_col: int) -> str:
+    quoted = "'" + sheet.replace("'", "''") + "'"
+    return f"{quoted}!{column_letter(first_col)}{row + 1}:{column_letter(last_col)}{row + 1}"
+
+def to_cells(values: SheetValues) -> SheetCells:
+    """Convertit des lignes de valeurs en cellules indexées (les cellules vides sont omises)"""
+    cells: SheetCells = {}
+    for sheet, rows in values.items():
+        grid = cells.setdefault(sheet, {})
+        for r, row in enumerate(rows):
+            for c, value in enumerate(row):
+                value = _normalize(value)
+                if value != "":
+                    grid[(r, c)] = value
+    return cells
+
+def diff_cells(shadow: SheetCells, target: SheetCells) -> List[Dict[str, Any]]:
+    """
+    Différence minimale entre l'état envoyé et l'état cible
+
+    Les cellules modifiées contiguës d'une même ligne sont regroupées en une plage ;
+    les cellules disparues sont vidées.
+
+    Returns:
+        list: Entrées {"range", "values"} pour values.batchUpdate
+    """
+    data = []
+    for sheet in sorted(set(shadow) | set(target)):
+        before, after = shadow.get(sheet, {}), target.get(sheet, {})
+        changed = sorted(key for key in set(before) | set(after) if before.get(key, "") != after.get(key, ""))
+        run: List[Tuple[int, int]] = []
+        for key in changed + [None]:
+            if run and (key is None or key[0] != run[-1][0] or key[1] != run[-1][1] + 1):
+                row = run[0][0]
+                data.append({
+                    "range": _a1(sheet, row, run[0][1], run[-1][1]),
+                    "values": [[after.get(cell, "") for cell in run]],
+                })
+                run = []
+            if key is not None:
+                run.append(key)
+    return data
+
+@dataclass
+class SyncResult:
+    """Bilan d'une synchronisation"""
+    ranges: int = 0
+    cells: int = 0
+    requests: int = 0
+    retries: int = 0
+    created_sheets: List[str] = field(default_factory=list)
+
+class SheetsSync:
+    """Synchronise un classeur Google Sheets à partir d'un état local (shadow)"""
+
+    def __init__(self, client, spreadsheet_id: str, max_retries: int = 5, base_delay: float = 1.0,
+                 max_delay: float = 32.0, sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            client: Ressource spreadsheets() de googleapiclient (ou FakeSheetsService().spreadsheets())
+            spreadsheet_id (str): Identifiant du classeur
+        """
+        self.client = client
+        self.spreadsheet_id = spreadsheet_id
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = sleep
+        self.url = f"https://docs.google.com/spreadsheets/d/{spreadsheet_id}"
+        self.shadow: SheetCells = {}
+        self.sheets: Optional[set] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, client, title: str, **kwargs) -> "SheetsSync":
+        """Crée un nouveau classeur et retourne sa synchronisation (url dans .url)"""
+        sync = cls(client, "", **kwargs)
+        response = sync._execute(client.create(body={"properties": {"title": title}},
+                                               fields="spreadsheetId,spreadsheetUrl"), SyncResult())
+        sync.spreadsheet_id = response["spreadsheetId"]
+        sync.url = response.get("spreadsheetUrl", "")
+        return sync
+
+    def _execute(self, request, result: SyncResult):
+        """Exécute une requête avec reprise exponentielle (et gigue) sur 429/5xx"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = request.execute()
+                result.requests += 1
+                return response
+            except Exception as e:
+                if _status(e) not in RETRY_STATUSES or attempt == self.max_retries:
+                    raise
+                result.retries += 1
+                delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+                self.sleep(delay + random.uniform(0, delay / 2))
+
+    def _ensure_sheets(self, titles: Iterable[str], result: SyncResult,
+                       formats: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        """Crée en une requête les onglets manquants (et leur format de cellule par défaut)"""
+        if self.sheets is None:
+            response = self._execute(self.client.get(spreadsheetId=self.spreadsheet_id,
+                                                     fields="sheets.properties"), result)
+            self.sheets = {sheet["properties"]["title"] for sheet in response.get("sheets", [])}
+        missing = [title for title in titles if title not in self.sheets]
+        if not missing:
+            return
+        requests = []
+        for title in missing:
+            sheet_id = random.randrange(1, 2 ** 31)
+            requests.append({"addSheet": {"properties": {"title": title, "sheetId": sheet_id}}})
+            if formats and title in formats:
+                requests.append({"repeatCell": {
+                    "range": {"sheetId": sheet_id},
+                    "cell": {"userEnteredFormat": formats[title]},
+                    "fields": "userEnteredFormat",
+                }})
+        self._execute(self.client.batchUpdate(spreadsheetId=self.spreadsheet_id,
+                                              body={"requests": requests}), result)
+        self.sheets.update(missing)
+        result.created_sheets.extend(missing)
+
+    def refresh(self, titles: Iterable[str]) -> None:
+        """Relit l'état réel des onglets (après une modification hors application)"""
+        titles = list(titles)
+        response = self.client.values().batchGet(spreadsheetId=self.spreadsheet_id,
+                                                 ranges=["'" + t.replace("'", "''") + "'" for t in titles]).execute()
+        values = {title: block.get("values", []) for title, block in zip(titles, response.get("valueRanges", []))}
+        with self._lock:
+            self.shadow.update(to_cells(values))
+
+    def push(self, values: SheetValues, formats: Optional[Dict[str, Dict[str, Any]]] = None) -> SyncResult:
+        """
+        Envoie les cellules modifiées depuis la dernière synchronisation
+
+        Args:
+            values (dict): Feuille -> lignes de valeurs (état complet souhaité)
+            formats (dict): Format par défaut des onglets créés (userEnteredFormat)
+
+        Returns:
+            SyncResult: Nombre de plages, cellules et requêtes envoyées
+        """
+        with self._lock:
+            result = SyncResult()
+            target = to_cells(values)
+            self._ensure_sheets(values, result, formats)
+            data = diff_cells(self.shadow, target)
+            if data:
+                body = {"valueInputOption": "USER_ENTERED", "data": data}
+                self._execute(self.client.values().batchUpdate(spreadsheetId=self.spreadsheet_id, body=body), result)
+            # Les onglets absents de values ne sont pas concernés par l'envoi
+            for sheet, cells in target.items():
+                self.shadow[sheet] = cells
+            for sheet in values:
+                self.shadow.setdefault(sheet, {})
+            result.ranges = len(data)
+            result.cells = sum(len(entry["values"][0]) for entry in data)
+            return result
+
+# Un seul fil d'envoi : les synchronisations restent ordonnées et hors du fil Streamlit
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def submit(fn: Callable[..., Any], *args, **kwargs) -> Future:
+    """Exécute fn (typiquement SheetsSync.push) en arrière-plan et retourne son Future"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sheets-sync")
+    return _executor.submit(fn, *args, **kwargs)
+
+class _FakeRequest:
+    """Requête différée, exécutée par execute() comme avec googleapiclient"""
+
+    def __init__(self, service: "FakeSheetsService", method: str, handler: Callable[[], Any]):
+        self.service = service
+        self.method = method
+        self.handler = handler
+
+    def execute(self):
+        self.service.calls.append(self.method)
+        if self.service.failures:
+            status = self.service.failures.pop(0)
+            if status:
+                raise SheetsApiError(status)
+        return self.handler()
+
+class _FakeValues:
+    def __init__(self, service: "FakeSheetsService"):
+        self.service = service
+
+    def batchUpdate(self, spreadsheetId: str, body: Dict[str, Any]):
+        return _FakeRequest(self.service, "values.batchUpdate",
+                            lambda: self.service._update_values(spreadsheetId, body))
+
+    def batchGet(self, spreadsheetId: str, ranges: List[str]):
+        return _FakeRequest(self.service, "values.batchGet",
+                            lambda: self.service._get_values(spreadsheetId, ranges))
+
+class FakeSheetsService:
+    """Service Sheets local (en mémoire) pour essayer la synchronisation sans réseau
+
+    failures: codes HTTP à lever lors des prochains execute() (0 = succès), ex. [429, 503]
+    """
+
+    def __init__(self, failures: Optional[List[int]] = None):
+        self.failures = list(failures or [])
+        self.calls: List[str] = []
+        self.updates: List[Dict[str, Any]] = []
+        self.spreadsheets_data: Dict[str, Dict[str, Dict[Tuple[int, int], Any]]] = {}
+
+    def spreadsheets(self) -> "FakeSheetsService":
+        return self
+
+    def values(self) -> _FakeValues:
+        return _FakeValues(self)
+
+    def create(self, body: Dict[str, Any], fields: str = ""):
+        def handler():
+            spreadsheet_id = f"fake-{len(self.spreadsheets_data) + 1}"
+            self.spreadsheets_data[spreadsheet_id] = {"Feuille 1": {}}
+            return {"spreadsheetId": spreadsheet_id,
+                    "spreadsheetUrl": f"https://docs.google.com/spreadsheets/d/{spreadsheet_id}"}
+        return _FakeRequest(self, "create", handler)
+
+    def get(self, spreadsheetId: str, fields: str = ""):
+        return _FakeRequest(self, "get", lambda: {"sheets": [
+            {"properties": {"title": title}} for title in self.spreadsheets_data[spreadsheetId]]})
+
+    def batchUpdate(self, spreadsheetId: str, body: Dict[str, Any]):
+        def handler():
+            for request in body.get("requests", []):
+                if "addSheet" in request:
+                    self.spreadsheets_data[spreadsheetId][request["addSheet"]["properties"]["title"]] = {}
+            return {"replies": []}
+        return _FakeRequest(self, "batchUpdate", handler)
+
+    @staticmethod
+    def _parse_range(a1: str) -> Tuple[str, int, int]:
+        sheet, cells = a1.rsplit("!", 1)
+        first = cells.split(":")[0]
+        letters = "".join(ch for ch in first if ch.isalpha())
+        col = 0
+        for ch in letters:
+            col = col * 26 + ord(ch) - 64
+        return sheet.strip("'").replace("''", "'"), int(first[len(letters):]) - 1, col - 1
+
+    def _update_values(self, spreadsheet_id: str, body: Dict[str, Any]):
+        self.updates.append(body)
+        sheets = self.spreadsheets_data[spreadsheet_id]
+        for entry in body["data"]:
+            sheet, row, col = self._parse_range(entry["range"])
+            grid = sheets[sheet]
+            for r, values in enumerate(entry["values"]):
+                for c, value in enumerate(values):
+                    if value == "":
+                        grid.pop((row + r, col + c), None)
+                    else:
+                        grid[(row + r, col + c)] = value
+        return {"totalUpdatedCells": sum(len(v) for entry in body["data"] for v in entry["values"])}
+
+    def _get_values(self, spreadsheet_id: str, ranges: List[str]):
+        blocks = []
+        for sheet_range in ranges:
+            grid = self.spreadsheets_data[spreadsheet_id].get(sheet_range.strip("'").replace("''", "'"), {})
+            rows = [[""] * (max(c for (_, c) in grid) + 1) for _ in range(max((r for (r, _) in grid), default=-1) + 1)]
+            for (r, c), value in grid.items():
+                rows[r][c] = value
+            blocks.append({"range": sheet_range, "values": rows})
+        return {"valueRanges": blocks}
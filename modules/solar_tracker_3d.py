@@ -4,7 +4,83 @@
 
 import streamlit as st
 import os
+import re
 import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'solar-tracker-3d-model.html')
+
+_STYLE_RE = re.compile(r'<style\b[^>]*>.*?</style>', re.S | re.I)
+_BODY_RE = re.compile(r'<body\b[^>]*>(.*?)</body>', re.S | re.I)
+_SCRIPT_RE = re.compile(r'<script\b[^>]*>.*?</script>', re.S | re.I)
+
+# Nombre de documents complets gardés en cache (un par combinaison de paramètres)
+PAYLOAD_CACHE_SIZE = 32
+
+@dataclass(frozen=True)
+class TrackerTemplate:
+    """Modèle 3D découpé une fois : seul le script de configuration change entre deux appels"""
+    version: Tuple[float, int]
+    html: str
+    prefix: str
+    suffix: str
+
+_template: Optional[TrackerTemplate] = None
+_template_lock = threading.Lock()
+_payloads: "OrderedDict[str, str]" = OrderedDict()
+
+def parse_tracker_html(html_content: str) -> Tuple[str, str, str]:
+    """Découpe le modèle HTML en styles, contenu du body (sans scripts) et scripts
+    
+    Returns:
+        tuple: (styles, body, scripts)
+    """
+    styles = ''.join(_STYLE_RE.findall(html_content))
+    body_match = _BODY_RE.search(html_content)
+    body = body_match.group(1) if body_match else html_content
+    scripts = ''.join(_SCRIPT_RE.findall(body))
+    return styles, _SCRIPT_RE.sub('', body), scripts
+
+def get_tracker_template() -> TrackerTemplate:
+    """Retourne le modèle découpé, relu uniquement si le fichier a changé (mtime, taille)"""
+    global _template
+    stat = os.stat(TEMPLATE_PATH)
+    version = (stat.st_mtime, stat.st_size)
+    template = _template
+    if template is not None and template.version == version:
+        return template
+    with _template_lock:
+        if _template is not None and _template.version == version:
+            return _template
+        with open(TEMPLATE_PATH, 'r', encoding='utf-8') as file:
+            html_content = file.read()
+        styles, body, scripts = parse_tracker_html(html_content)
+        # Ajuster le HTML pour qu'il fonctionne correctement dans un iframe Streamlit
+        prefix = f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="UTF-8">
+        {styles}
+        <style>
+            body {{ margin: 0; padding: 0; overflow: hidden; }}
+            canvas {{ width: 100%; height: 100%; display: block; }}
+            .controls {{ max-width: 350px; }}
+        </style>
+    </head>
+    <body>
+        {body}
+        {scripts}"""
+        suffix = """
+    </body>
+    </html>
+    """
+        _template = TrackerTemplate(version=version, html=html_content, prefix=prefix, suffix=suffix)
+        _payloads.clear()
+        return _template
 
 def get_tracker_3d_html():
     """Récupère le contenu HTML du modèle 3D du tracker solaire
@@ -12,81 +88,13 @@ def get_tracker_3d_html():
     Returns:
         str: Contenu HTML du modèle 3D
     """
-    html_file_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'solar-tracker-3d-model.html')
-    
-    with open(html_file_path, 'r', encoding='utf-8') as file:
-        html_content = file.read()
-    
-    return html_content
+    return get_tracker_template().html
 
-def display_solar_tracker_3d(height=700, location=None, constraints=None):
-    """Affiche le modèle 3D du tracker solaire dans Streamlit avec options avancées
-    
-    Args:
-        height (int): Hauteur du composant HTML en pixels
-    """
-    html_content = get_tracker_3d_html()
-    
-    # Valeurs par défaut pour les paramètres, Corte
-    if location is None:
-        location = {
-            "latitude": 42.3,
-            "longitude": 9.15,
-            "timezone": 2
-        }
-    
-    if constraints is None:
-        constraints = {
-            "minTiltX": 15,
-            "maxTiltX": 75,
-            "maxCableDifference": 50,
-            "elasticity": 0.05
-        }
-    
-    # Convertir les paramètres en JSON pour l'injection dans le JavaScript
+def build_config_script(location: Dict, constraints: Dict) -> str:
+    """Script d'injection des paramètres de localisation et des contraintes mécaniques"""
     location_json = json.dumps(location)
     constraints_json = json.dumps(constraints)
-    
-    # Ajuster le HTML pour qu'il fonctionne correctement dans un iframe Streamlit
-    # - Supprimer les balises DOCTYPE, html, head et body
-    # - Conserver uniquement le contenu et les scripts
-    # - Ajuster la taille pour s'adapter à l'iframe
-    
-    # Extraire le contenu entre les balises body
-    body_start = html_content.find('<body>')
-    body_end = html_content.find('</body>')
-    
-    if body_start != -1 and body_end != -1:
-        body_content = html_content[body_start + len('<body>'):body_end]
-    else:
-        body_content = html_content
-    
-    # Extraire les styles
-    style_start = html_content.find('<style>')
-    style_end = html_content.find('</style>')
-    
-    if style_start != -1 and style_end != -1:
-        style_content = html_content[style_start:style_end + len('</style>')]
-    else:
-        style_content = ""
-    
-    # Extraire les scripts
-    script_tags = []
-    script_start = 0
-    while True:
-        script_start = html_content.find('<script', script_start)
-        if script_start == -1:
-            break
-        
-        script_end = html_content.find('</script>', script_start)
-        if script_end == -1:
-            break
-        
-        script_tags.append(html_content[script_start:script_end + len('</script>')])
-        script_start = script_end + len('</script>')
-    
-    # Préparer le script d'injection des paramètres
-    config_script = f"""
+    return f"""
     <script>
         // Configuration injectée par Streamlit
         document.addEventListener('DOMContentLoaded', function() {{
@@ -130,30 +138,167 @@ def display_solar_tracker_3d(height=700, location=None, constraints=None):
         }});
     </script>
     """
-    script_tags.append(config_script)
+
+def build_playback_script(trajectory: Dict) -> str:
+    """Script de lecture d'une trajectoire précalculée (tampon Float32 base64)
+
+    Le modèle 3D n'effectue plus aucun calcul solaire : il interpole entre deux
+    échantillons et positionne le soleil et le panneau.
+    """
+    trajectory_json = json.dumps(trajectory)
+    return f"""
+    <script>
+        // Trajectoire précalculée par Python (modules/tracker_kinematics.py)
+        (function() {{
+            if (typeof updatePanelPosition !== 'function' || typeof sun === 'undefined') return;
+            const trajectory = {trajectory_json};
+            const n = trajectory.count;
+            if (n < 2) return;
+            const bytes = Uint8Array.from(atob(trajectory.data), c => c.charCodeAt(0));
+            const values = new Float32Array(bytes.buffer);
+            const field = {{}};
+            trajectory.fields.forEach((name, i) => {{ field[name] = values.subarray(i * n, (i + 1) * n); }});
+            const radius = 250;
+            let position = 0;
+            let last = null;
+
+            function lerp(name, i, f) {{
+                const a = field[name];
+                return a[i] + (a[i + 1] - a[i]) * f;
+            }}
+            function lerpAngle(name, i, f) {{
+                const a = field[name];
+                const delta = ((a[i + 1] - a[i] + 540) % 360) - 180;
+                return (a[i] + delta * f + 360) % 360;
+            }}
+
+            function play(now) {{
+                if (last !== null) {{
+                    position = (position + (now - last) / 1000 * trajectory.speed / trajectory.step) % (n - 1);
+                }}
+                last = now;
+                const i = Math.floor(position);
+                const f = position - i;
+                const elevation = lerp('elevation', i, f);
+                const azimuth = lerpAngle('azimuth', i, f);
+                const horizontal = Math.cos(toRadians(elevation)) * radius;
+                const x = Math.sin(toRadians(azimuth)) * horizontal;
+                const y = Math.sin(toRadians(elevation)) * radius;
+                const z = Math.cos(toRadians(azimuth)) * horizontal;
+                sun.position.set(x, y, z);
+                sunLight.position.set(x, y, z);
+
+                const seLength = lerp('seCableLength', i, f);
+                const swLength = lerp('swCableLength', i, f);
+                updatePanelPosition(seLength, swLength);
+
+                const hour = lerp('hour', i, f);
+                const stat = document.getElementById('angleStat');
+                if (stat) {{
+                    stat.innerHTML = `
+                        Heure: ${{Math.floor(hour)}}h${{String(Math.floor((hour % 1) * 60)).padStart(2, '0')}}<br>
+                        Inclinaison optimale: ${{Math.round(lerp('tiltX', i, f))}}°<br>
+                        Orientation optimale: ${{Math.round(lerp('tiltZ', i, f))}}°<br>
+                        Élévation solaire: ${{Math.round(elevation)}}°<br>
+                        Azimut solaire: ${{Math.round(azimuth)}}°<br>
+                        Tension SE/SW: ${{lerp('seTension', i, f).toFixed(2)}} / ${{lerp('swTension', i, f).toFixed(2)}}
+                    `;
+                }}
+                requestAnimationFrame(play);
+            }}
+            requestAnimationFrame(play);
+        }})();
+    </script>
+    """
+
+def build_tracker_html(location: Dict, constraints: Dict, trajectory: Optional[Dict] = None) -> str:
+    """Document complet pour l'iframe, mis en cache par paramètres
     
-    # Construire le HTML adapté pour Streamlit
-    adapted_html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="UTF-8">
-        {style_content}
-        <style>
-            body {{ margin: 0; padding: 0; overflow: hidden; }}
-            canvas {{ width: 100%; height: 100%; display: block; }}
-            .controls {{ max-width: 350px; }}
-        </style>
-    </head>
-    <body>
-        {body_content}
-        {''.join(script_tags)}
-    </body>
-    </html>
+    Args:
+        location (dict): Latitude, longitude et fuseau horaire
+        constraints (dict): Contraintes mécaniques du tracker
+        trajectory (dict): Trajectoire encodée à rejouer (encode_trajectory), optionnelle
+        
+    Returns:
+        str: HTML adapté pour Streamlit
+    """
+    template = get_tracker_template()
+    key = json.dumps([location, constraints, trajectory], sort_keys=True)
+    with _template_lock:
+        html = _payloads.get(key)
+        if html is not None:
+            _payloads.move_to_end(key)
+            return html
+    html = template.prefix + build_config_script(location, constraints)
+    if trajectory is not None:
+        html += build_playback_script(trajectory)
+    html += template.suffix
+    with _template_lock:
+        if _template is template:
+            _payloads[key] = html
+            while len(_payloads) > PAYLOAD_CACHE_SIZE:
+                _payloads.popitem(last=False)
+    return html
+
+def display_solar_tracker_3d(height=700, location=None, constraints=None, trajectory=None):
+    """Affiche le modèle 3D du tracker solaire dans Streamlit avec options avancées
+    
+    Args:
+        height (int): Hauteur du composant HTML en pixels
+        trajectory (dict): Trajectoire précalculée à rejouer (voir demo_trajectory)
     """
+    # Valeurs par défaut pour les paramètres, Corte
+    if location is None:
+        location = {
+            "latitude": 42.3,
+            "longitude": 9.15,
+            "timezone": 2
+        }
+    
+    if constraints is None:
+        constraints = {
+            "minTiltX": 15,
+            "maxTiltX": 75,
+            "maxCableDifference": 50,
+            "elasticity": 0.05
+        }
     
     # Afficher le HTML dans un composant iframe
-    st.components.v1.html(adapted_html, height=height, scrolling=True)
+    st.components.v1.html(build_tracker_html(location, constraints, trajectory), height=height, scrolling=True)
+
+# Démonstrations rejouées à partir d'une trajectoire précalculée : (jour de l'année, vitesse)
+# None = aujourd'hui / vitesse par défaut (attribut demoSpeed), comme generateDemoConfig
+DEMO_TRAJECTORIES = {
+    "solsticeEte": (172, None),
+    "journee": (None, 2.0),
+    "optimisation": (172, 0.5),
+}
+
+def demo_trajectory(demo_mode: str, location: Dict, constraints: Dict, step_minutes: float = 5.0) -> Optional[Dict]:
+    """Précalcule la trajectoire d'une démonstration, None si le mode n'en a pas
+    
+    Returns:
+        dict: Trajectoire encodée, avec la vitesse de lecture (heures simulées par seconde)
+    """
+    if demo_mode not in DEMO_TRAJECTORIES:
+        return None
+    from datetime import datetime
+    from modules.tracker_kinematics import tracker_parameters, day_trajectory, encode_trajectory
+    from modules.state_manager import rhuma
+
+    day_of_year, speed = DEMO_TRAJECTORIES[demo_mode]
+    if day_of_year is None:
+        day_of_year = datetime.now().timetuple().tm_yday
+    params = tracker_parameters({
+        'minTiltX': constraints.get('minTiltX'),
+        'maxTiltX': constraints.get('maxTiltX'),
+        'maxDifference': constraints.get('maxCableDifference'),
+        'elasticity': constraints.get('elasticity')
+    })
+    payload = encode_trajectory(day_trajectory(day_of_year, step_minutes, location, params))
+    payload["day"] = day_of_year
+    payload["speed"] = float(speed if speed is not None else rhuma('demoSpeed'))
+    return payload
 
 def solar_tracker_3d_section():
     """Section complète pour la simulation 3D du tracker solaire avec options avancées"""
@@ -279,7 +424,8 @@ def solar_tracker_3d_section():
     display_solar_tracker_3d(
         height=700,
         location=location,
-        constraints=constraints
+        constraints=constraints,
+        trajectory=demo_trajectory(demo_mode, location, constraints)
     )
     
     # Informations complémentaires
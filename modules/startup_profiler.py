@@ -0,0 +1,109 @@
+# modules/startup_profiler.py
+# Profilage du démarrage : temps d'import par module et délai avant le premier rendu.
+# Activé par la variable d'environnement RHUMA_PROFILE_STARTUP=1
+
+import builtins
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+_TRUE_VALUES = ('1', 'true', 'yes', 'oui', 'on')
+
+def is_enabled() -> bool:
+    """Indique si le profilage du démarrage est activé"""
+    return os.environ.get('RHUMA_PROFILE_STARTUP', '').strip().lower() in _TRUE_VALUES
+
+class StartupProfiler:
+    """Mesure le démarrage à froid (imports) et chaque exécution du script Streamlit"""
+
+    def __init__(self):
+        self.process_start = time.perf_counter()
+        self.enabled = is_enabled()
+        self.imports: List[Tuple[str, float, int]] = []  # (module, durée en ms, profondeur)
+        self.sections: Dict[str, float] = {}
+        self.marks: Dict[str, float] = {}
+        self.runs = 0
+        self.run_start = self.process_start
+        self._depth = 0
+        self._original_import = None
+        self._reported = False
+        if self.enabled:
+            self._install_import_hook()
+
+    def _install_import_hook(self) -> None:
+        """Chronomètre chaque module réellement chargé (absent de sys.modules)"""
+        original = builtins.__import__
+        self._original_import = original
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level or name in sys.modules:
+                return original(name, globals, locals, fromlist, level)
+            self._depth += 1
+            start = time.perf_counter()
+            try:
+                return original(name, globals, locals, fromlist, level)
+            finally:
+                self._depth -= 1
+                self.imports.append((name, (time.perf_counter() - start) * 1000, self._depth))
+
+        builtins.__import__ = timed_import
+
+    def stop_import_hook(self) -> None:
+        """Retire le chronométrage des imports (après le démarrage à froid)"""
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def begin_run(self) -> None:
+        """Début d'une exécution du script (Streamlit le réexécute à chaque interaction)"""
+        self.runs += 1
+        self.run_start = self.process_start if self.runs == 1 else time.perf_counter()
+        self.sections = {}
+        self.marks = {}
+
+    @contextmanager
+    def section(self, name: str):
+        """Chronomètre un bloc du script"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sections[name] = self.sections.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+    def mark(self, name: str) -> None:
+        """Enregistre le temps écoulé depuis le début de l'exécution (ex. premier rendu)"""
+        self.marks[name] = (time.perf_counter() - self.run_start) * 1000
+
+    def report(self, top: int = 15) -> Dict:
+        """Résumé : imports les plus coûteux, sections, jalons et chargement de la configuration"""
+        top_level = sorted((entry for entry in self.imports if entry[2] == 0), key=lambda e: -e[1])
+        report = {
+            "run": self.runs,
+            "cold_start": self.runs == 1,
+            "imports_ms": {name: round(ms, 1) for name, ms, _ in top_level[:top]},
+            "imports_total_ms": round(sum(ms for _, ms, _ in top_level), 1),
+            "sections_ms": {name: round(ms, 1) for name, ms in self.sections.items()},
+            "marks_ms": {name: round(ms, 1) for name, ms in self.marks.items()},
+        }
+        loader = sys.modules.get('modules.config_loader')
+        if loader is not None and loader._defaults is not None:
+            report["config_loader_ms"] = {k: round(v, 2) for k, v in loader._defaults.timings.items()}
+        return report
+
+    def render(self) -> None:
+        """Affiche le rapport dans la barre latérale et l'écrit sur stderr au premier rendu"""
+        if not self.enabled:
+            return
+        import streamlit as st
+        report = self.report()
+        with st.sidebar.expander("⏱️ Profil de démarrage"):
+            st.json(report)
+        if not self._reported:
+            self._reported = True
+            self.stop_import_hook()
+            print(f"[rhuma] profil de démarrage : {report}", file=sys.stderr)
+
+# Instance unique, créée au premier import (démarrage du processus)
+profiler = StartupProfiler()
@@ -0,0 +1,79 @@
+from typing import Dict, Any, Optional, Iterable
+from hashlib import blake2b
+import json
+
+# Les empreintes sont des sommes modulo 2^128 des hachés de chaque (clé, valeur) :
+# l'ordre des clés n'importe pas et une mise à jour coûte O(1).
+_MODULUS = 1 << 128
+
+def _canonical(value: Any) -> Any:
+    """Normalise une valeur pour que 300 et 300.0 aient la même empreinte"""
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    return value
+
+def entry_hash(key: str, value: Any) -> int:
+    """Haché stable (128 bits) d'un couple clé/valeur"""
+    payload = json.dumps([key, _canonical(value)], sort_keys=True, default=str, separators=(',', ':'))
+    return int.from_bytes(blake2b(payload.encode('utf-8'), digest_size=16).digest(), 'big')
+
+def _hex(total: int) -> str:
+    return f"{total:032x}"
+
+class StateFingerprint:
+    """Empreinte incrémentale des valeurs de configuration, globale et par catégorie"""
+
+    def __init__(self, values: Dict[str, Any], categories: Dict[str, str]):
+        self.categories = categories
+        self.hashes: Dict[str, int] = {}
+        self.total = 0
+        self.by_category: Dict[str, int] = {}
+        for key, value in values.items():
+            self.update(key, value)
+
+    def copy(self) -> "StateFingerprint":
+        """Copie indépendante, sans recalculer les hachés"""
+        clone = StateFingerprint.__new__(StateFingerprint)
+        clone.categories = self.categories
+        clone.hashes = dict(self.hashes)
+        clone.total = self.total
+        clone.by_category = dict(self.by_category)
+        return clone
+
+    def update(self, key: str, value: Any) -> None:
+        """Remplace la contribution d'une clé (O(1))"""
+        new = entry_hash(key, value)
+        old = self.hashes.get(key, 0)
+        self.hashes[key] = new
+        self.total = (self.total - old + new) % _MODULUS
+        category = self.categories.get(key, "")
+        self.by_category[category] = (self.by_category.get(category, 0) - old + new) % _MODULUS
+
+    def remove(self, key: str) -> None:
+        """Retire la contribution d'une clé"""
+        old = self.hashes.pop(key, 0)
+        self.total = (self.total - old) % _MODULUS
+        category = self.categories.get(key, "")
+        self.by_category[category] = (self.by_category.get(category, 0) - old) % _MODULUS
+
+    def digest(self, keys: Optional[Iterable[str]] = None, category: Optional[str] = None) -> str:
+        """Empreinte hexadécimale de toute la configuration, d'une catégorie ou d'un sous-ensemble de clés
+
+        Args:
+            keys: Clés lues par l'appelant (une clé absente compte comme None)
+            category (str): Catégorie d'attributs (ex. "Coûts")
+        """
+        if keys is not None:
+            total = 0
+            for key in set(keys):
+                total += self.hashes[key] if key in self.hashes else entry_hash(key, None)
+            return _hex(total % _MODULUS)
+        if category is not None:
+            return _hex(self.by_category.get(category, 0))
+        return _hex(self.total)
@@ -0,0 +1,215 @@
+from typing import Dict, Any, Optional, List, Tuple, Iterable
+from dataclasses import dataclass, field
+from datetime import datetime
+import copy
+
+# Clé d'une valeur de l'état : (section, attribut), ex. ("configuration", "pv_serre")
+StateKey = Tuple[str, str]
+
+class _Missing:
+    """Marqueur d'une clé absente d'un snapshot (jamais définie à ce moment-là)"""
+    def __repr__(self) -> str:
+        return "MISSING"
+
+MISSING = _Missing()
+
+@dataclass(frozen=True)
+class StateSnapshot:
+    """Version immuable de l'état, stockée comme delta par rapport à son parent
+
+    Seules les clés modifiées depuis le parent sont conservées (partage structurel),
+    un snapshot coûte donc O(clés modifiées). Un point de contrôle complet est
+    matérialisé tous les `checkpoint_interval` niveaux pour borner les lectures.
+    """
+    id: int
+    parent: Optional["StateSnapshot"]
+    changes: Dict[StateKey, Any]
+    depth: int
+    label: Optional[str] = None
+    timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
+    checkpoint: Optional[Dict[StateKey, Any]] = None
+
+def flatten_state(state: Dict[str, Dict[str, Any]]) -> Dict[StateKey, Any]:
+    """Aplatit l'état {section: {clé: valeur}} en {(section, clé): valeur}"""
+    return {(section, key): value for section, values in state.items() for key, value in values.items()}
+
+def _freeze(value: Any) -> Any:
+    """Copie les conteneurs mutables pour que le snapshot ne bouge plus"""
+    if isinstance(value, (dict, list, set)):
+        return copy.deepcopy(value)
+    return value
+
+class StateHistory:
+    """Historique versionné de l'état : snapshots, diff, undo/redo et branches nommées"""
+
+    def __init__(self, state: Dict[str, Dict[str, Any]], checkpoint_interval: int = 32):
+        self.checkpoint_interval = checkpoint_interval
+        initial = {key: _freeze(value) for key, value in flatten_state(state).items()}
+        root = StateSnapshot(id=0, parent=None, changes=initial, depth=0, label="initial", checkpoint=initial)
+        self.snapshots: Dict[int, StateSnapshot] = {0: root}
+        self.branches: Dict[str, int] = {"main": 0}
+        self.current_branch = "main"
+        self.dirty: set = set()
+        self._redo: Dict[str, List[int]] = {"main": []}
+
+    @property
+    def head(self) -> StateSnapshot:
+        """Snapshot de tête de la branche courante"""
+        return self.snapshots[self.branches[self.current_branch]]
+
+    def record(self, section: str, key: str) -> None:
+        """Marque une clé comme modifiée depuis le dernier snapshot"""
+        self.dirty.add((section, key))
+
+    def get_snapshot(self, snapshot_id: int) -> StateSnapshot:
+        """Obtient un snapshot par son identifiant"""
+        try:
+            return self.snapshots[snapshot_id]
+        except KeyError:
+            raise KeyError(f"Snapshot inconnu : {snapshot_id}")
+
+    def commit(self, state: Dict[str, Dict[str, Any]], label: Optional[str] = None) -> int:
+        """Enregistre les clés modifiées de l'état dans un nouveau snapshot"""
+        parent = self.head
+        changes = {}
+        for section, key in self.dirty:
+            values = state.get(section, {})
+            changes[(section, key)] = _freeze(values[key]) if key in values else MISSING
+        depth = parent.depth + 1
+        checkpoint = None
+        if depth % self.checkpoint_interval == 0:
+            checkpoint = self.materialize(parent.id, flat=True)
+            checkpoint.update(changes)
+        snapshot = StateSnapshot(
+            id=len(self.snapshots),
+            parent=parent,
+            changes=changes,
+            depth=depth,
+            label=label,
+            checkpoint=checkpoint
+        )
+        self.snapshots[snapshot.id] = snapshot
+        self.branches[self.current_branch] = snapshot.id
+        self._redo[self.current_branch] = []
+        self.dirty = set()
+        return snapshot.id
+
+    def value_at(self, snapshot_id: int, key: StateKey) -> Any:
+        """Valeur d'une clé dans un snapshot (MISSING si absente)"""
+        snapshot = self.get_snapshot(snapshot_id)
+        while snapshot is not None:
+            if key in snapshot.changes:
+                return snapshot.changes[key]
+            if snapshot.checkpoint is not None:
+                return snapshot.checkpoint.get(key, MISSING)
+            snapshot = snapshot.parent
+        return MISSING
+
+    def materialize(self, snapshot_id: int, flat: bool = False) -> Dict:
+        """Reconstruit l'état complet d'un snapshot
+
+        Args:
+            snapshot_id (int): Identifiant du snapshot
+            flat (bool): Retourner {(section, clé): valeur} plutôt que {section: {clé: valeur}}
+        """
+        chain = []
+        snapshot = self.get_snapshot(snapshot_id)
+        while snapshot.checkpoint is None:
+            chain.append(snapshot)
+            snapshot = snapshot.parent
+        values = dict(snapshot.checkpoint)
+        for snapshot in reversed(chain):
+            values.update(snapshot.changes)
+        values = {key: value for key, value in values.items() if value is not MISSING}
+        if flat:
+            return values
+        state = {}
+        for (section, key), value in values.items():
+            state.setdefault(section, {})[key] = copy.deepcopy(value)
+        return state
+
+    def _common_ancestor(self, a: StateSnapshot, b: StateSnapshot) -> StateSnapshot:
+        while a.depth > b.depth:
+            a = a.parent
+        while b.depth > a.depth:
+            b = b.parent
+        while a is not b:
+            a, b = a.parent, b.parent
+        return a
+
+    def _changed_keys(self, snapshot: StateSnapshot, ancestor: StateSnapshot) -> set:
+        keys = set()
+        while snapshot is not ancestor:
+            keys.update(snapshot.changes)
+            snapshot = snapshot.parent
+        return keys
+
+    def diff(self, a: int, b: int) -> Dict[StateKey, Tuple[Any, Any]]:
+        """Différences entre deux snapshots : {(section, clé): (valeur dans a, valeur dans b)}
+
+        Seules les clés modifiées depuis l'ancêtre commun sont examinées.
+        """
+        snapshot_a, snapshot_b = self.get_snapshot(a), self.get_snapshot(b)
+        ancestor = self._common_ancestor(snapshot_a, snapshot_b)
+        keys = self._changed_keys(snapshot_a, ancestor) | self._changed_keys(snapshot_b, ancestor)
+        changes = {}
+        for key in keys:
+            value_a, value_b = self.value_at(a, key), self.value_at(b, key)
+            if value_a is not value_b and value_a != value_b:
+                changes[key] = (value_a, value_b)
+        return changes
+
+    def compare(self, snapshot_ids: Iterable[int]) -> Dict[StateKey, List[Any]]:
+        """Compare plusieurs variantes côte à côte : {(section, clé): [valeur par snapshot]}
+
+        Seules les clés qui diffèrent entre au moins deux snapshots sont retournées.
+        """
+        snapshot_ids = list(snapshot_ids)
+        if not snapshot_ids:
+            return {}
+        reference = snapshot_ids[0]
+        keys = set()
+        for other in snapshot_ids[1:]:
+            keys.update(self.diff(reference, other))
+        return {key: [self.value_at(snapshot_id, key) for snapshot_id in snapshot_ids] for key in keys}
+
+    def undo(self) -> Optional[int]:
+        """Recule la tête de la branche courante d'un snapshot, retourne la nouvelle tête"""
+        head = self.head
+        if head.parent is None:
+            return None
+        self._redo[self.current_branch].append(head.id)
+        self.branches[self.current_branch] = head.parent.id
+        return head.parent.id
+
+    def redo(self) -> Optional[int]:
+        """Rejoue le dernier snapshot annulé de la branche courante"""
+        stack = self._redo[self.current_branch]
+        if not stack:
+            return None
+        snapshot_id = stack.pop()
+        self.branches[self.current_branch] = snapshot_id
+        return snapshot_id
+
+    def create_branch(self, name: str, snapshot_id: Optional[int] = None) -> None:
+        """Crée une branche nommée à partir d'un snapshot (la tête courante par défaut)"""
+        if name in self.branches:
+            raise ValueError(f"La branche {name} existe déjà")
+        self.branches[name] = self.head.id if snapshot_id is None else self.get_snapshot(snapshot_id).id
+        self._redo[name] = []
+
+    def switch_branch(self, name: str) -> int:
+        """Change de branche courante, retourne le snapshot de tête"""
+        if name not in self.branches:
+            raise KeyError(f"Branche inconnue : {name}")
+        self.current_branch = name
+        return self.branches[name]
+
+    def log(self, branch: Optional[str] = None) -> List[StateSnapshot]:
+        """Snapshots d'une branche, de la tête jusqu'à l'état initial"""
+        snapshot = self.snapshots[self.branches[branch or self.current_branch]]
+        snapshots = []
+        while snapshot is not None:
+            snapshots.append(snapshot)
+            snapshot = snapshot.parent
+        return snapshots
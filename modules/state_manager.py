@@ -1,9 +1,10 @@
 from typing import Dict, Any, Optional
 from dataclasses import dataclass
-from modules.attributes import ATTRIBUTE_CONFIGS, AttributeConfig
-import os
-from dotenv import load_dotenv
+from modules.attributes import ATTRIBUTE_CONFIGS, RESULT_CONFIGS, AttributeConfig
+from modules.state_history import StateHistory, StateKey, MISSING
+from modules.config_loader import get_defaults
 from datetime import datetime
+import copy
 
 @dataclass
 class StateManager:
@@ -14,23 +15,26 @@ class StateManager:
         self.initialize_state()
     
     def load_environment(self) -> None:
-        """Charge les variables d'environnement"""
-        load_dotenv()
+        """Charge les variables d'environnement (lues une seule fois par processus)"""
+        self.defaults = get_defaults()
         
     def initialize_state(self) -> None:
         """Initialise l'état global avec les valeurs par défaut"""
         self.state = {
             "metadata": {
                 "timestamp": datetime.now().isoformat(),
-                "language": os.getenv('RHUMA_LANGUAGE', 'fr')
+                **self.defaults.metadata
             },
-            "configuration": {},
+            # Copie de la couche par défaut (attributs résolus contre l'environnement)
+            "configuration": dict(self.defaults.configuration),
             "results": {}
         }
         
-        # Initialise les attributs avec leurs valeurs par défaut
-        for attr_name, config in ATTRIBUTE_CONFIGS.items():
-            self.state["configuration"][attr_name] = config.default
+        # Historique versionné (snapshots, undo/redo, branches)
+        self.history = StateHistory(self.state)
+        
+        # Empreinte des valeurs de configuration, pour les clés de cache
+        self.fingerprints = self.defaults.fingerprint.copy()
     
     def get(self, key: str, default: Any = None) -> Any:
         """Obtient une valeur de l'état"""
@@ -66,23 +70,85 @@ class StateManager:
             if config.max is not None and value > config.max:
                 raise ValueError(f"La valeur pour {key} ne peut pas être supérieure à {config.max}")
             
-            self.state["configuration"][key] = value
+            self._write("configuration", key, value)
         else:
             # Déterminer si c'est un résultat ou une métadonnée
-            # Liste des clés de résultats connues
-            result_keys = [
-                "production_pv", "production_au_sol", "autoconsommation", "revente",
-                "revenu_pv", "revenu_rhum", "cout_pv", "cout_serre", "cout_total",
-                "benefice_net", "roi", "temps_retour", "monthly_production", "scenarios",
-                "couts_annuels"
-            ]
-            
-            if key in result_keys:
+            if key in RESULT_CONFIGS:
                 # Pour les résultats, on ne fait pas de validation
-                self.state["results"][key] = value
+                self._write("results", key, value)
             else:
                 # Pour les métadonnées, on ne fait pas de validation
-                self.state["metadata"][key] = value
+                self._write("metadata", key, value)
+    
+    def _write(self, section: str, key: str, value: Any) -> None:
+        """Écrit une valeur dans une section de l'état et la marque comme modifiée"""
+        self.state[section][key] = value
+        self.history.record(section, key)
+        if section == "configuration":
+            self.fingerprints.update(key, value)
+    
+    def _restore(self, keys, snapshot_id: int) -> None:
+        """Ramène les clés données à leur valeur dans un snapshot"""
+        for section, key in keys:
+            value = self.history.value_at(snapshot_id, (section, key))
+            if value is MISSING:
+                self.state[section].pop(key, None)
+                if section == "configuration":
+                    self.fingerprints.remove(key)
+            else:
+                self.state.setdefault(section, {})[key] = copy.deepcopy(value)
+                if section == "configuration":
+                    self.fingerprints.update(key, value)
+        self.history.dirty = set()
+    
+    def snapshot(self, label: Optional[str] = None) -> int:
+        """Enregistre une version de l'état, retourne son identifiant"""
+        return self.history.commit(self.state, label)
+    
+    def undo(self) -> Optional[int]:
+        """Revient au snapshot précédent (les modifications non enregistrées sont abandonnées)"""
+        head = self.history.head.id
+        target = self.history.undo()
+        if target is None:
+            target = head
+        self._restore(set(self.history.diff(head, target)) | self.history.dirty, target)
+        return target
+    
+    def redo(self) -> Optional[int]:
+        """Rejoue le dernier snapshot annulé"""
+        head = self.history.head.id
+        target = self.history.redo()
+        if target is None:
+            return None
+        self._restore(set(self.history.diff(head, target)) | self.history.dirty, target)
+        return target
+    
+    def branch(self, name: str, snapshot_id: Optional[int] = None) -> None:
+        """Crée une branche nommée (variante) à partir d'un snapshot"""
+        self.history.create_branch(name, snapshot_id)
+    
+    def checkout(self, name: str) -> int:
+        """Bascule sur une branche et charge son état"""
+        head = self.history.head.id
+        target = self.history.switch_branch(name)
+        self._restore(set(self.history.diff(head, target)) | self.history.dirty, target)
+        return target
+    
+    def fingerprint(self, keys=None, category: Optional[str] = None) -> str:
+        """Empreinte stable de la configuration, indépendante de l'horodatage
+
+        Args:
+            keys: Sous-ensemble des attributs lus par l'appelant (toute la configuration par défaut)
+            category (str): Catégorie d'attributs (ex. "Énergie PV")
+            
+        Returns:
+            str: Empreinte hexadécimale utilisable comme clé de cache
+        """
+        return self.fingerprints.digest(keys, category)
+    
+    def diff(self, a: int, b: Optional[int] = None) -> Dict[StateKey, Any]:
+        """Différences entre deux snapshots (b = tête de la branche courante par défaut)"""
+        return self.history.diff(a, self.history.head.id if b is None else b)
     
     def get_config(self, key: str) -> Optional[AttributeConfig]:
         """Obtient la configuration d'un attribut"""
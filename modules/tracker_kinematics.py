@@ -0,0 +1,334 @@
+# modules/tracker_kinematics.py
+# Cinématique vectorisée du tracker à trois mâts : position du soleil, angles optimaux,
+# longueurs et tensions des câbles. Mêmes formules que le modèle 3D et
+# solar_calculations_enhanced.js, calculées en un seul passage numpy.
+
+import base64
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+import numpy as np
+from modules.state_manager import rhuma
+
+# Corte, comme les valeurs par défaut du modèle 3D
+DEFAULT_LOCATION = {
+    "latitude": 42.3,
+    "longitude": 9.15,
+    "timezone": 2
+}
+
+# Attributs du tracker (catégorie "Tracker Solaire 3D")
+TRACKER_KEYS = (
+    'minTiltX', 'maxTiltX', 'baseCableLength', 'tiltXFactor', 'tiltZFactor',
+    'minLength', 'maxLength', 'maxDifference', 'elasticity'
+)
+
+# Champs transmis au modèle 3D, dans l'ordre du tampon Float32
+TRAJECTORY_FIELDS = (
+    'hour', 'elevation', 'azimuth', 'tiltX', 'tiltZ',
+    'seCableLength', 'swCableLength', 'seTension', 'swTension'
+)
+
+def tracker_parameters(overrides: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """Paramètres mécaniques du tracker depuis l'état, éventuellement surchargés"""
+    params = {key: float(rhuma(key)) for key in TRACKER_KEYS}
+    if overrides:
+        params.update({key: float(value) for key, value in overrides.items() if value is not None})
+    return params
+
+def sun_position(day_of_year, hour, latitude: float, longitude: float, timezone: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Élévation et azimut du soleil (degrés), azimut 0° = Sud comme dans le modèle 3D
+
+    Args:
+        day_of_year: Jour(s) de l'année (1-365), diffusable avec hour
+        hour: Heure(s) légale(s) décimale(s)
+        latitude (float): Latitude en degrés
+        longitude (float): Longitude en degrés
+        timezone (float): Décalage UTC en heures
+
+    Returns:
+        tuple: (élévation, azimut) en degrés
+    """
+    day = np.asarray(day_of_year, dtype=np.float64)
+    hour = np.asarray(hour, dtype=np.float64)
+    # Déclinaison (Cooper, 1969) et équation du temps (Spencer simplifiée)
+    declination = np.radians(23.45 * np.sin(np.radians(360.0 * (284.0 + day) / 365.0)))
+    b = np.radians(360.0 * (day - 81.0) / 365.0)
+    eot = 9.87 * np.sin(2 * b) - 7.53 * np.cos(b) - 1.5 * np.sin(b)
+    true_solar_time = hour + (4.0 * (longitude - 15.0 * timezone) + eot) / 60.0
+    hour_angle = np.radians(15.0 * (true_solar_time - 12.0))
+    lat = np.radians(latitude)
+
+    sin_elevation = np.sin(lat) * np.sin(declination) + np.cos(lat) * np.cos(declination) * np.cos(hour_angle)
+    elevation = np.arcsin(np.clip(sin_elevation, -1.0, 1.0))
+    cos_elevation = np.cos(elevation)
+    sin_azimuth = np.cos(declination) * np.sin(hour_angle) / cos_elevation
+    cos_azimuth = (np.sin(declination) - np.sin(lat) * sin_elevation) / (np.cos(lat) * cos_elevation)
+    azimuth = np.mod(np.degrees(np.arctan2(sin_azimuth, cos_azimuth)) + 180.0, 360.0)
+    return np.degrees(elevation), azimuth
+
+def optimal_panel_angles(elevation, azimuth, params: Dict[str, float]) -> Tuple[np.ndarray, np.ndarray]:
+    """Angles optimaux (tiltX, tiltZ) du panneau, tiltX borné par minTiltX/maxTiltX"""
+    elevation = np.asarray(elevation, dtype=np.float64)
+    azimuth = np.asarray(azimuth, dtype=np.float64)
+    tilt_x = np.clip(90.0 - elevation, params['minTiltX'], params['maxTiltX'])
+    tilt_z = -np.where(azimuth > 180.0, azimuth - 360.0, azimuth)
+    return tilt_x, tilt_z
+
+def cable_lengths(tilt_x, tilt_z, params: Dict[str, float]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Longueurs des câbles SE/SW pour une orientation, avec les contraintes mécaniques
+
+    Returns:
+        tuple: (longueur SE, longueur SW, masque des points où une contrainte a été appliquée)
+    """
+    tilt_x = np.asarray(tilt_x, dtype=np.float64)
+    tilt_z = np.asarray(tilt_z, dtype=np.float64)
+    min_length, max_length = params['minLength'], params['maxLength']
+    max_difference = params['maxDifference']
+
+    base = params['baseCableLength'] + tilt_x * params['tiltXFactor']
+    se_raw = base - tilt_z * params['tiltZFactor']
+    sw_raw = base + tilt_z * params['tiltZFactor']
+    se = np.clip(se_raw, min_length, max_length)
+    sw = np.clip(sw_raw, min_length, max_length)
+
+    # Différence maximale : on recentre autour de la moyenne puis on reborne
+    over = np.abs(se - sw) > max_difference
+    average = (se + sw) / 2
+    sign = np.sign(se - sw)
+    se = np.where(over, average + sign * max_difference / 2, se)
+    sw = np.where(over, average - sign * max_difference / 2, sw)
+    se_low, se_high = over & (se < min_length), over & (se > max_length)
+    se = np.where(se_low, min_length, np.where(se_high, max_length, se))
+    sw = np.where(se_low, min_length + max_difference, np.where(se_high, max_length - max_difference, sw))
+    sw_low, sw_high = over & (sw < min_length), over & (sw > max_length)
+    sw = np.where(sw_low, min_length, np.where(sw_high, max_length, sw))
+    se = np.where(sw_low, min_length + max_difference, np.where(sw_high, max_length - max_difference, se))
+
+    constrained = over | (se_raw != np.clip(se_raw, min_length, max_length)) | (sw_raw != np.clip(sw_raw, min_length, max_length))
+    return se, sw, constrained
+
+def cable_tension(length, params: Dict[str, float]) -> np.ndarray:
+    """Tension relative (0-1) d'un câble, plus élevée près des longueurs extrêmes"""
+    normalized = (np.asarray(length, dtype=np.float64) - params['minLength']) / (params['maxLength'] - params['minLength'])
+    return (1.0 - 4.0 * (normalized - 0.5) ** 2) * (1.0 - params['elasticity'])
+
+def day_trajectory(day_of_year: int, step_minutes: float = 5.0, location: Optional[Dict[str, float]] = None,
+                   params: Optional[Dict[str, float]] = None) -> Dict[str, np.ndarray]:
+    """Trajectoire complète d'une journée, du lever au coucher du soleil
+
+    Args:
+        day_of_year (int): Jour de l'année (1-365)
+        step_minutes (float): Pas de temps en minutes
+        location (dict): Latitude, longitude et fuseau horaire (Corte par défaut)
+        params (dict): Paramètres du tracker (tracker_parameters() par défaut)
+
+    Returns:
+        dict: Un tableau numpy par champ de TRAJECTORY_FIELDS, sur une grille horaire régulière
+    """
+    location = location or DEFAULT_LOCATION
+    params = params or tracker_parameters()
+    hour = np.arange(0.0, 24.0, step_minutes / 60.0)
+    elevation, azimuth = sun_position(day_of_year, hour, location['latitude'], location['longitude'], location['timezone'])
+
+    # Garder la plage contiguë où le soleil est levé (plus un point de chaque côté)
+    daylight = np.flatnonzero(elevation > 0)
+    if daylight.size:
+        window = slice(max(daylight[0] - 1, 0), min(daylight[-1] + 2, hour.size))
+        hour, elevation, azimuth = hour[window], elevation[window], azimuth[window]
+
+    tilt_x, tilt_z = optimal_panel_angles(elevation, azimuth, params)
+    se, sw, _ = cable_lengths(tilt_x, tilt_z, params)
+    return {
+        'hour': hour,
+        'elevation': elevation,
+        'azimuth': azimuth,
+        'tiltX': tilt_x,
+        'tiltZ': tilt_z,
+        'seCableLength': se,
+        'swCableLength': sw,
+        'seTension': cable_tension(se, params),
+        'swTension': cable_tension(sw, params)
+    }
+
+def encode_trajectory(trajectory: Dict[str, np.ndarray], fields: Sequence[str] = TRAJECTORY_FIELDS) -> Dict:
+    """Encode une trajectoire en tampon Float32 base64 (un bloc contigu par champ)
+
+    Returns:
+        dict: {"fields", "count", "start", "step", "data"} sérialisable en JSON
+    """
+    hour = trajectory['hour']
+    block = np.stack([np.asarray(trajectory[field], dtype=np.float32) for field in fields])
+    return {
+        "fields": list(fields),
+        "count": int(block.shape[1]),
+        "start": float(hour[0]) if hour.size else 0.0,
+        "step": float(hour[1] - hour[0]) if hour.size > 1 else 0.0,
+        "data": base64.b64encode(np.ascontiguousarray(block).astype('<f4').tobytes()).decode('ascii')
+    }
+
+@dataclass(frozen=True)
+class WinchModel:
+    """Modèle simplifié d'un treuil motorisé (un par câble Sud-Est / Sud-Ouest)"""
+    force: float = 800.0             # Effort moyen sur le câble (N)
+    efficiency: float = 0.6          # Rendement moteur + réducteur
+    actuation_overhead: float = 0.05 # Énergie par démarrage (Wh)
+    standby_power: float = 0.5       # Consommation de veille (W)
+    length_unit: float = 0.01        # Unité des longueurs de câble du modèle (m), ici des cm
+
+def year_grid(step_minutes: float, days: int = 365) -> Tuple[np.ndarray, np.ndarray]:
+    """Grille (jour, heure) d'une année, diffusable en tableaux (jours, pas par jour)"""
+    day = np.arange(1, days + 1, dtype=np.float64)[:, None]
+    hour = np.arange(0.0, 24.0, step_minutes / 60.0)[None, :]
+    return day, hour
+
+def hold_at_night(values: np.ndarray, daylight: np.ndarray) -> np.ndarray:
+    """Maintient la dernière consigne de jour pendant la nuit (dernier axe = temps aplati)"""
+    index = np.where(daylight, np.arange(daylight.size), 0)
+    np.maximum.accumulate(index, out=index)
+    first = np.argmax(daylight) if daylight.any() else 0
+    index[:first] = first
+    return values[..., index]
+
+def _hold_moves(target_x: np.ndarray, target_z: np.ndarray, band: float) -> np.ndarray:
+    """Indices des mouvements d'une zone morte (le premier pas compris)
+
+    L'écart à la consigne ne peut croître plus vite que le chemin parcouru par la cible
+    (somme des variations, axe par axe) : depuis un pas examiné, on saute par recherche
+    dichotomique au premier pas où ce chemin dépasse la marge restante. Seuls quelques
+    pas par mouvement sont examinés en Python.
+    """
+    steps = np.maximum(np.abs(np.diff(target_x)), np.abs(np.diff(target_z)))
+    path = np.concatenate(([0.0], np.cumsum(steps))).tolist()
+    xs, zs = target_x.tolist(), target_z.tolist()
+    size = len(xs)
+    moves = [0]
+    set_x, set_z = xs[0], zs[0]
+    index, margin = 0, band
+    while True:
+        # Tolérance sur la somme cumulée : un pas de trop examiné, jamais un de moins
+        index = bisect_right(path, path[index] + margin - 1e-9, lo=index + 1)
+        if index >= size:
+            return np.array(moves, dtype=np.int64)
+        deviation = max(abs(xs[index] - set_x), abs(zs[index] - set_z))
+        if deviation > band:
+            moves.append(index)
+            set_x, set_z = xs[index], zs[index]
+            margin = band
+        else:
+            margin = band - deviation
+
+def deadband_hold(target_x: np.ndarray, target_z: np.ndarray, deadband,
+                  daylight: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Zone morte : la consigne est conservée tant que la cible s'en écarte de moins de
+    deadband sur les deux axes, puis rejoint la cible (un mouvement)
+
+    Le coût d'une ligne dépend de son nombre de mouvements plutôt que du nombre de
+    pas (voir _hold_moves). Avec daylight, seuls les pas de jour sont pilotés : le
+    matin, la cible est comparée à la consigne de la veille au soir, et les pas de
+    nuit restent à remplacer par hold_at_night.
+
+    Args:
+        target_x, target_z (np.ndarray): Cibles (temps) ou (stratégies, temps)
+        deadband (float ou np.ndarray): Zone morte en degrés, une par ligne (0 = suivi continu)
+        daylight (np.ndarray): Pas de jour (booléens, temps)
+    """
+    tilt_x, tilt_z = np.array(target_x, dtype=np.float64), np.array(target_z, dtype=np.float64)
+    active = np.arange(tilt_x.shape[-1]) if daylight is None else np.flatnonzero(daylight)
+    if not active.size:
+        return tilt_x, tilt_z
+    rows_x, rows_z = tilt_x.reshape(-1, tilt_x.shape[-1]), tilt_z.reshape(-1, tilt_z.shape[-1])
+    bands = np.broadcast_to(np.asarray(deadband, dtype=np.float64).ravel(), (rows_x.shape[0],))
+    for row, band in enumerate(bands):
+        if band <= 0:
+            continue
+        # Chaque pas reprend la cible du dernier mouvement
+        active_x, active_z = rows_x[row, active], rows_z[row, active]
+        moves = _hold_moves(active_x, active_z, float(band))
+        index = np.zeros(active.size, dtype=np.int64)
+        index[moves] = moves
+        np.maximum.accumulate(index, out=index)
+        rows_x[row, active], rows_z[row, active] = active_x[index], active_z[index]
+    return tilt_x, tilt_z
+
+def winch_usage(length: np.ndarray, step_minutes: float, winch: WinchModel) -> Dict[str, np.ndarray]:
+    """Course, actionnements et énergie d'un treuil sur une année (dernier axe = temps)
+
+    Returns:
+        dict: Un tableau par mesure (un scalaire pour une série 1-D, une valeur par ligne sinon)
+    """
+    moves = np.abs(np.diff(length, axis=-1)) * winch.length_unit
+    moving = moves > 1e-9
+    starts = moving.copy()
+    starts[..., 1:] &= ~moving[..., :-1]
+    travel = moves.sum(axis=-1)
+    actuations = starts.sum(axis=-1)
+    hours = length.shape[-1] * step_minutes / 60.0
+    energy_wh = (winch.force * travel / winch.efficiency / 3600.0
+                 + actuations * winch.actuation_overhead
+                 + winch.standby_power * hours)
+    return {
+        "travel_m": travel,
+        "moves": moving.sum(axis=-1),
+        "actuations": actuations,
+        "moving_hours": moving.sum(axis=-1) * step_minutes / 60.0,
+        "peak_rate_m_per_min": (moves.max(axis=-1) if moves.shape[-1] else np.zeros(moves.shape[:-1])) / step_minutes,
+        "energy_wh": energy_wh
+    }
+
+def annual_kinematics(step_minutes: float = 5.0, location: Optional[Dict[str, float]] = None,
+                      params: Optional[Dict[str, float]] = None, precision: Optional[float] = None,
+                      winch: Optional[WinchModel] = None) -> Dict[str, float]:
+    """Simule une année de consignes du tracker et mesure le travail des treuils
+
+    Les consignes (tiltX, tiltZ) suivent la cible avec une zone morte de
+    precision_tracking (deadband_hold), puis sont converties en longueurs de câble
+    bornées (minTiltX/maxTiltX, maxDifference).
+    La nuit, le panneau garde sa dernière position ; le retour du matin est compté.
+
+    Args:
+        step_minutes (float): Pas de simulation (1 à 15 minutes)
+        location (dict): Latitude, longitude et fuseau horaire (Corte par défaut)
+        params (dict): Paramètres du tracker (tracker_parameters() par défaut)
+        precision (float): Précision du tracking en degrés (attribut precision_tracking par défaut)
+        winch (WinchModel): Modèle des treuils
+
+    Returns:
+        dict: Course cumulée (m), actionnements, vitesses de pointe (m/min) et énergie (kWh) par treuil
+    """
+    if not 1 <= step_minutes <= 15:
+        raise ValueError(f"Pas de simulation hors limites (1-15 min) : {step_minutes}")
+    location = location or DEFAULT_LOCATION
+    params = params or tracker_parameters()
+    precision = float(rhuma('precision_tracking')) if precision is None else float(precision)
+    winch = winch or WinchModel()
+
+    day, hour = year_grid(step_minutes)
+    elevation, azimuth = sun_position(day, hour, location['latitude'], location['longitude'], location['timezone'])
+    elevation, azimuth = elevation.ravel(), azimuth.ravel()
+    daylight = elevation > 0
+
+    tilt_x, tilt_z = optimal_panel_angles(elevation, azimuth, params)
+    tilt_x, tilt_z = deadband_hold(tilt_x, tilt_z, precision, daylight)
+    tilt_x, tilt_z = hold_at_night(tilt_x, daylight), hold_at_night(tilt_z, daylight)
+    se, sw, constrained = cable_lengths(tilt_x, tilt_z, params)
+
+    report: Dict[str, float] = {
+        "step_minutes": float(step_minutes),
+        "precision_tracking": precision,
+        "samples": int(elevation.size),
+        "daylight_hours": float(daylight.sum() * step_minutes / 60.0),
+        "constrained_share": float(constrained[daylight].mean()) if daylight.any() else 0.0,
+    }
+    total_energy_wh = 0.0
+    for name, length in (("se", se), ("sw", sw)):
+        usage = winch_usage(length, step_minutes, winch)
+        report[f"{name}_travel_m"] = float(usage["travel_m"])
+        report[f"{name}_actuations"] = int(usage["actuations"])
+        report[f"{name}_moving_hours"] = float(usage["moving_hours"])
+        report[f"{name}_peak_rate_m_per_min"] = float(usage["peak_rate_m_per_min"])
+        report[f"{name}_energy_kwh"] = float(usage["energy_wh"]) / 1000.0
+        total_energy_wh += float(usage["energy_wh"])
+    report["motor_energy_kwh"] = total_energy_wh / 1000.0
+    return report
@@ -1,10 +1,11 @@
-from datetime import datetime
-import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
+import json
+from functools import lru_cache
+from typing import Dict, Optional
 from modules.state_manager import rhuma  # To access configuration values
 
+# Number of annual kinematics reports kept (one per set of inputs)
+KINEMATICS_CACHE_SIZE = 32
+
 class TrackingSystemSimulation:
     """A minimal stub for TrackingSystemSimulation using a configurable bonus."""
     def __init__(self, pv_value):
@@ -37,6 +38,32 @@ def simulate_tracking_production(pv_with_tracking):
     production_without_tracking = pv_with_tracking / (1 + bonus/100)
     return production_without_tracking
 
+def tracking_kinematics_report(step_minutes: float = 5.0, location: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """
+    Annual winch report (travel, actuations, peak rates, motor energy) for the
+    current tracker attributes, computed once per set of inputs.
+    """
+    from modules.tracker_kinematics import DEFAULT_LOCATION, tracker_parameters
+    location = location or DEFAULT_LOCATION
+    params = tracker_parameters()
+    precision = float(rhuma("precision_tracking"))
+    key = json.dumps([params, location, precision, step_minutes], sort_keys=True)
+    return dict(_kinematics_report(key))
+
+@lru_cache(maxsize=KINEMATICS_CACHE_SIZE)
+def _kinematics_report(key: str) -> Dict[str, float]:
+    """Annual kinematics report for a JSON key [params, location, precision, step_minutes]"""
+    from modules.tracker_kinematics import annual_kinematics
+    params, location, precision, step_minutes = json.loads(key)
+    return annual_kinematics(step_minutes, location, params, precision)
+
+def tracking_motor_energy(step_minutes: float = 5.0) -> float:
+    """
+    Energy drawn each year by the SE/SW winch motors (kWh/year), to be taken
+    out of the tracking production before it is sold or self-consumed.
+    """
+    return float(tracking_kinematics_report(step_minutes)["motor_energy_kwh"])
+
 # Example usage if needed
 if __name__ == "__main__":
     best_production = 300  # Example best production with tracking.
@@ -0,0 +1,241 @@
+# modules/tracking_strategies.py
+# Simulateur de stratégies de pilotage du tracker : suivi continu, pas à pas (zone morte
+# de precision_tracking), backtracking contre l'ombrage entre rangées et mise en sécurité
+# vent/neige. Toutes les stratégies sont évaluées ensemble, en tableaux (stratégie, temps),
+# sauf la zone morte, séquentielle : elle est suivie ligne par ligne, de mouvement en
+# mouvement (deadband_hold), pour un coût proportionnel au nombre de mouvements.
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from modules.state_manager import rhuma
+from modules.tracker_kinematics import (
+    DEFAULT_LOCATION, WinchModel, tracker_parameters, year_grid, sun_position,
+    optimal_panel_angles, cable_lengths, deadband_hold, hold_at_night, winch_usage
+)
+
+SOLAR_CONSTANT = 1353.0  # W/m²
+
+# Nombre maximal d'éléments (stratégies x pas de temps) traités d'un coup
+CHUNK_ELEMENTS = 4_000_000
+
+HOURS_PER_YEAR = 365 * 24
+
+@dataclass(frozen=True)
+class TrackingStrategy:
+    """Stratégie de pilotage ; les options se combinent (ex. zone morte + backtracking + sécurité)"""
+    name: str
+    deadband: float = 0.0        # Écart toléré (degrés) avant un nouveau mouvement (0 = suivi continu)
+    backtracking: bool = False   # Éviter l'ombrage des rangées voisines (axe est-ouest)
+    stow: bool = False           # Mise en sécurité par vent fort ou neige
+
+@dataclass(frozen=True)
+class StowPolicy:
+    """Seuils et position de mise en sécurité"""
+    wind_speed: float = 15.0          # Vitesse de vent déclenchant la sécurité (m/s)
+    tilt_x: Optional[float] = None    # Inclinaison de sécurité (minTiltX par défaut, comme la démo "vent")
+    tilt_z: float = 0.0               # Orientation de sécurité
+
+def default_strategies(precision: Optional[float] = None) -> List[TrackingStrategy]:
+    """Stratégies de référence, la zone morte valant precision_tracking"""
+    precision = float(rhuma('precision_tracking')) if precision is None else float(precision)
+    return [
+        TrackingStrategy("continu"),
+        TrackingStrategy(f"zone morte {precision:g}°", deadband=precision),
+        TrackingStrategy("backtracking", backtracking=True),
+        TrackingStrategy("sécurité vent/neige", deadband=precision, stow=True),
+    ]
+
+def deadband_strategies(values: Sequence[float], backtracking: bool = False, stow: bool = False) -> List[TrackingStrategy]:
+    """Grille de zones mortes, évaluée en un seul appel de simulate_strategies"""
+    return [TrackingStrategy(f"zone morte {value:g}°", float(value), backtracking, stow) for value in values]
+
+def clear_sky_dni(elevation: np.ndarray) -> np.ndarray:
+    """Rayonnement direct normal par ciel clair (Meinel, masse d'air de Kasten-Young), W/m²"""
+    zenith = 90.0 - elevation
+    up = elevation > 0
+    safe_zenith = np.where(up, zenith, 0.0)
+    air_mass = 1.0 / (np.cos(np.radians(safe_zenith)) + 0.50572 * (96.07995 - safe_zenith) ** -1.6364)
+    return np.where(up, SOLAR_CONSTANT * 0.7 ** (air_mass ** 0.678), 0.0)
+
+def synthetic_weather(step_minutes: float, seed: int = 0) -> Dict[str, np.ndarray]:
+    """Série météo synthétique d'une année (vent de Weibull, épisodes de neige en hiver, nébulosité)
+
+    Returns:
+        dict: "wind" (m/s), "snow" (bool) et "clearness" (0-1), alignés sur la grille de simulation
+    """
+    rng = np.random.default_rng(seed)
+    day, hour = year_grid(step_minutes)
+    hours = _grid_hours(day, hour)
+    hourly_wind = 6.0 * rng.weibull(2.0, size=HOURS_PER_YEAR)
+    gust = 1.0 + 0.3 * np.sin(np.pi * (np.arange(HOURS_PER_YEAR) % 24 - 6) / 12)
+    daily_clearness = np.clip(rng.beta(5.0, 2.0, size=365), 0.05, 1.0)
+    winter = (day[:, 0] < 60) | (day[:, 0] > 334)
+    snow_days = winter & (rng.random(365) < 0.08)
+    return {
+        "wind": _align(hourly_wind * gust, hours, 0.0),
+        "snow": _align(snow_days, hours, 0.0),
+        "clearness": _align(daily_clearness, hours, 1.0)
+    }
+
+def _grid_hours(day: np.ndarray, hour: np.ndarray) -> np.ndarray:
+    """Heures écoulées depuis le début de l'année à chaque pas de la grille (aplatie)"""
+    return ((day - 1.0) * 24.0 + hour).ravel()
+
+def _align(series: Optional[np.ndarray], hours: np.ndarray, default: float) -> np.ndarray:
+    """
+    Rééchantillonne une série météo sur la grille de simulation
+
+    La série couvre l'année à pas réguliers (8760 valeurs horaires, 365 journalières, ou
+    déjà au pas de simulation) ; chaque pas de la grille prend la valeur de l'intervalle
+    qui contient son horodatage, quel que soit le pas.
+    """
+    if series is None:
+        return np.full(hours.size, default)
+    series = np.asarray(series)
+    if series.size == hours.size:
+        return series
+    if series.size == 0:
+        raise ValueError("Série météo vide")
+    index = (hours * (series.size / HOURS_PER_YEAR)).astype(np.int64)
+    return series[np.minimum(index, series.size - 1)]
+
+def _incidence(tilt_x: np.ndarray, tilt_z: np.ndarray, elevation: np.ndarray, azimuth: np.ndarray) -> np.ndarray:
+    """Cosinus de l'angle d'incidence ; tiltX = angle zénithal de la normale, -tiltZ = son azimut"""
+    beta, zenith = np.radians(tilt_x), np.radians(90.0 - elevation)
+    cos_incidence = (np.cos(beta) * np.cos(zenith)
+                     + np.sin(beta) * np.sin(zenith) * np.cos(np.radians(azimuth + tilt_z)))
+    return np.clip(cos_incidence, 0.0, 1.0)
+
+def _east_west_rotation(tilt_x: np.ndarray, tilt_z: np.ndarray) -> np.ndarray:
+    """Rotation de la normale dans le plan vertical est-ouest (rangées orientées nord-sud)"""
+    beta, gamma = np.radians(tilt_x), np.radians(-tilt_z)
+    return np.arctan2(np.sin(beta) * np.sin(gamma), np.cos(beta))
+
+def _backtrack(elevation: np.ndarray, azimuth: np.ndarray, gcr: float):
+    """Orientation de backtracking (formule de pvlib sur l'axe est-ouest), en (tiltX, tiltZ)"""
+    zenith, gamma = np.radians(90.0 - elevation), np.radians(azimuth)
+    x, y, u = np.sin(zenith) * np.sin(gamma), np.sin(zenith) * np.cos(gamma), np.cos(zenith)
+    true_tracking = np.arctan2(x, u)
+    radius = np.hypot(x, u)
+    correction = np.abs(np.cos(true_tracking)) / gcr
+    backtracked = np.where(
+        correction < 1.0,
+        true_tracking - np.sign(true_tracking) * np.arccos(np.clip(correction, 0.0, 1.0)),
+        true_tracking
+    )
+    nx, nu = radius * np.sin(backtracked), radius * np.cos(backtracked)
+    tilt_x = np.degrees(np.arccos(np.clip(nu, -1.0, 1.0)))
+    panel_azimuth = np.degrees(np.arctan2(nx, y))
+    return tilt_x, -panel_azimuth
+
+def _shaded_fraction(tilt_x: np.ndarray, tilt_z: np.ndarray, elevation: np.ndarray, azimuth: np.ndarray,
+                     gcr: float) -> np.ndarray:
+    """Part du rayonnement direct masquée par la rangée voisine"""
+    zenith, gamma = np.radians(90.0 - elevation), np.radians(azimuth)
+    sun_rotation = np.arctan2(np.sin(zenith) * np.sin(gamma), np.cos(zenith))
+    panel_rotation = _east_west_rotation(tilt_x, tilt_z)
+    projected = gcr * np.cos(panel_rotation - sun_rotation)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shaded = 1.0 - np.cos(sun_rotation) / projected
+    return np.clip(np.where(projected > 0, shaded, 0.0), 0.0, 1.0)
+
+def simulate_strategies(strategies: Optional[Sequence[TrackingStrategy]] = None, step_minutes: float = 5.0,
+                        location: Optional[Dict[str, float]] = None, params: Optional[Dict[str, float]] = None,
+                        weather: Optional[Dict[str, np.ndarray]] = None, gcr: float = 0.4,
+                        stow_policy: Optional[StowPolicy] = None,
+                        winch: Optional[WinchModel] = None) -> List[Dict[str, float]]:
+    """Rejoue une année de positions du soleil à travers plusieurs stratégies de pilotage
+
+    Le rayonnement direct (ciel clair de Meinel, pondéré par la nébulosité) est projeté
+    sur le panneau puis réduit de l'ombrage entre rangées ; sous la neige la production
+    est nulle. Le rayonnement diffus n'est pas modélisé.
+
+    Args:
+        strategies (list): Stratégies à comparer (default_strategies() par défaut)
+        step_minutes (float): Pas de simulation (1 à 15 minutes)
+        location (dict): Latitude, longitude et fuseau horaire (Corte par défaut)
+        params (dict): Paramètres du tracker (tracker_parameters() par défaut)
+        weather (dict): "wind" (m/s), "snow" (bool), "clearness" (0-1), horaires ou au pas de simulation
+        gcr (float): Taux de couverture au sol des rangées (largeur des panneaux / entraxe)
+        stow_policy (StowPolicy): Seuils et position de mise en sécurité
+        winch (WinchModel): Modèle des treuils
+
+    Returns:
+        list: Un rapport par stratégie (énergie, pertes, actionnements, course, énergie moteur)
+    """
+    if not 1 <= step_minutes <= 15:
+        raise ValueError(f"Pas de simulation hors limites (1-15 min) : {step_minutes}")
+    if not 0 < gcr <= 1:
+        raise ValueError(f"Taux de couverture au sol invalide : {gcr}")
+    strategies = list(strategies) if strategies is not None else default_strategies()
+    location = location or DEFAULT_LOCATION
+    params = params or tracker_parameters()
+    stow_policy = stow_policy or StowPolicy()
+    winch = winch or WinchModel()
+    weather = weather or {}
+
+    day, hour = year_grid(step_minutes)
+    elevation, azimuth = sun_position(day, hour, location['latitude'], location['longitude'], location['timezone'])
+    elevation, azimuth = elevation.ravel(), azimuth.ravel()
+    size = elevation.size
+    daylight = elevation > 0
+    hours_per_step = step_minutes / 60.0
+
+    hours = _grid_hours(day, hour)
+    wind = _align(weather.get("wind"), hours, 0.0)
+    snow = _align(weather.get("snow"), hours, 0.0).astype(bool)
+    clearness = _align(weather.get("clearness"), hours, 1.0)
+    dni = clear_sky_dni(elevation) * clearness
+    stow_needed = (wind >= stow_policy.wind_speed) | snow
+    stow_x = params['minTiltX'] if stow_policy.tilt_x is None else stow_policy.tilt_x
+
+    optimal_x, optimal_z = optimal_panel_angles(elevation, azimuth, params)
+    backtrack_x, backtrack_z = _backtrack(elevation, azimuth, gcr)
+    ideal_kwh = float((dni * (~snow)).sum() * hours_per_step / 1000.0)
+
+    deadband = np.array([s.deadband for s in strategies], dtype=np.float64)[:, None]
+    backtracking = np.array([s.backtracking for s in strategies])[:, None]
+    stow = np.array([s.stow for s in strategies])[:, None]
+
+    reports: List[Dict[str, float]] = []
+    rows = max(1, CHUNK_ELEMENTS // size)
+    for start in range(0, len(strategies), rows):
+        chunk = slice(start, start + rows)
+        target_x = np.where(backtracking[chunk], backtrack_x, optimal_x)
+        target_z = np.where(backtracking[chunk], backtrack_z, optimal_z)
+
+        tilt_x, tilt_z = deadband_hold(target_x, target_z, deadband[chunk], daylight)
+        tilt_x = np.clip(tilt_x, params['minTiltX'], params['maxTiltX'])
+
+        stowed = stow[chunk] & stow_needed
+        tilt_x = np.where(stowed, stow_x, tilt_x)
+        tilt_z = np.where(stowed, stow_policy.tilt_z, tilt_z)
+        tilt_x, tilt_z = hold_at_night(tilt_x, daylight), hold_at_night(tilt_z, daylight)
+
+        beam = dni * _incidence(tilt_x, tilt_z, elevation, azimuth)
+        shading = _shaded_fraction(tilt_x, tilt_z, elevation, azimuth, gcr)
+        energy = (beam * (1.0 - shading) * (~snow)).sum(axis=1) * hours_per_step / 1000.0
+        shading_loss = (beam * shading * (~snow)).sum(axis=1) * hours_per_step / 1000.0
+
+        se, sw, _ = cable_lengths(tilt_x, tilt_z, params)
+        usage = {name: winch_usage(length, step_minutes, winch) for name, length in (("se", se), ("sw", sw))}
+        stow_hours = (stowed & daylight).sum(axis=1) * hours_per_step
+
+        for row, strategy in enumerate(strategies[chunk]):
+            motor_wh = float(usage["se"]["energy_wh"][row] + usage["sw"]["energy_wh"][row])
+            reports.append({
+                "strategy": strategy.name,
+                "deadband": strategy.deadband,
+                "backtracking": strategy.backtracking,
+                "stow": strategy.stow,
+                "energy_kwh_m2": float(energy[row]),
+                "energy_ratio": float(energy[row]) / ideal_kwh if ideal_kwh else 0.0,
+                "shading_loss_kwh_m2": float(shading_loss[row]),
+                "stow_hours": float(stow_hours[row]),
+                "moves": int(usage["se"]["moves"][row] + usage["sw"]["moves"][row]),
+                "actuations": int(usage["se"]["actuations"][row] + usage["sw"]["actuations"][row]),
+                "travel_m": float(usage["se"]["travel_m"][row] + usage["sw"]["travel_m"][row]),
+                "motor_energy_kwh": motor_wh / 1000.0,
+            })
+    return reports
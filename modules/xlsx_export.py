@@ -0,0 +1,185 @@
+# modules/xlsx_export.py
+# Classeurs Excel en écriture seule : les lignes sont écrites en flux (mémoire quasi
+# constante), les styles sont des styles nommés partagés et les tableaux NumPy/pandas
+# sont ajoutés par blocs, sans passer par des cellules stylées une à une.
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from modules.export_schema import CONFIGURATION_FIELDS, RESULT_FIELDS, result_value
+from modules.state_manager import rhuma, rhuma_label
+
+SHEET_TITLE_MAX = 31
+_INVALID_TITLE_CHARS = re.compile(r"[\[\]:*?/\\]")
+
+# Au-delà, les scénarios sont regroupés dans une seule feuille tabulaire
+MAX_SCENARIO_SHEETS = 50
+
+TITLE_STYLE = "rhuma_title"
+HEADER_STYLE = "rhuma_header"
+LABEL_STYLE = "rhuma_label"
+
+def _named_styles() -> list:
+    """Styles nommés du classeur (déclarés une fois, référencés par nom dans les cellules)"""
+    from openpyxl.styles import Alignment, Font, NamedStyle, PatternFill
+    grey = PatternFill(start_color="D9D9D9", end_color="D9D9D9", fill_type="solid")
+    return [
+        NamedStyle(name=TITLE_STYLE, font=Font(bold=True, size=14)),
+        NamedStyle(name=HEADER_STYLE, font=Font(bold=True), fill=grey),
+        NamedStyle(name=LABEL_STYLE, fill=grey, alignment=Alignment(horizontal="right")),
+    ]
+
+def _cell_value(value: Any) -> Any:
+    """Valeur acceptée par une cellule (scalaires NumPy convertis, structures en texte)"""
+    if hasattr(value, "item"):
+        value = value.item()
+    return value if value is None or isinstance(value, (bool, int, float, str)) else str(value)
+
+def _flatten(record: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """Aplatit un enregistrement imbriqué ({'fixe': {'roi': 1}} -> {'fixe.roi': 1})"""
+    flat = {}
+    for key, value in record.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{name}."))
+        else:
+            flat[name] = value
+    return flat
+
+class StreamingWorkbook:
+    """Classeur openpyxl en mode écriture seule (write_only) avec styles nommés partagés"""
+
+    def __init__(self):
+        from openpyxl import Workbook
+        self.workbook = Workbook(write_only=True)
+        for style in _named_styles():
+            self.workbook.add_named_style(style)
+        self._titles: set = set()
+
+    def sheet(self, title: str):
+        """Crée une feuille (titre nettoyé, tronqué à 31 caractères et rendu unique)"""
+        base = _INVALID_TITLE_CHARS.sub("_", str(title)).strip() or "Feuille"
+        base = base[:SHEET_TITLE_MAX]
+        candidate, index = base, 2
+        while candidate.lower() in self._titles:
+            suffix = f" ({index})"
+            candidate = base[:SHEET_TITLE_MAX - len(suffix)] + suffix
+            index += 1
+        self._titles.add(candidate.lower())
+        return self.workbook.create_sheet(candidate)
+
+    def styled(self, ws, value: Any, style: str):
+        """Cellule portant un style nommé"""
+        from openpyxl.cell import WriteOnlyCell
+        cell = WriteOnlyCell(ws, value=_cell_value(value))
+        cell.style = style
+        return cell
+
+    def append_title(self, ws, title: str) -> None:
+        ws.append([self.styled(ws, title, TITLE_STYLE)])
+
+    def append_header(self, ws, headers: Sequence[str]) -> None:
+        ws.append([self.styled(ws, header, HEADER_STYLE) for header in headers])
+
+    def append_pairs(self, ws, pairs: Iterable[Tuple[Any, Any]]) -> None:
+        """Lignes libellé / valeur, libellé stylé"""
+        for label, value in pairs:
+            ws.append([self.styled(ws, label, LABEL_STYLE), _cell_value(value)])
+
+    def append_rows(self, ws, rows: Iterable[Sequence[Any]]) -> None:
+        """Ajout en bloc de lignes brutes (valeurs Python natives, sans style)"""
+        for row in rows:
+            ws.append(row)
+
+    def append_columns(self, ws, columns: Dict[str, Any]) -> None:
+        """Ajoute des colonnes (tableaux NumPy, listes) : en-tête puis lignes converties en bloc"""
+        import numpy as np
+        self.append_header(ws, list(columns))
+        values = [np.asarray(column).tolist() for column in columns.values()]
+        self.append_rows(ws, zip(*values))
+
+    def append_frame(self, ws, frame) -> None:
+        """Ajoute un DataFrame pandas (en-tête puis lignes)"""
+        self.append_columns(ws, {str(name): frame[name].to_numpy() for name in frame.columns})
+
+    def save(self, target) -> None:
+        """Enregistre le classeur (chemin ou fichier binaire ouvert)"""
+        self.workbook.save(target)
+
+def _scenario_sheets(book: StreamingWorkbook, scenarios: Any) -> None:
+    """Une feuille par scénario, ou une feuille tabulaire pour les grands ensembles"""
+    if hasattr(scenarios, "columns") and hasattr(scenarios, "to_numpy"):
+        book.append_frame(book.sheet("Scénarios"), scenarios)
+        return
+    if isinstance(scenarios, dict):
+        book.append_columns(book.sheet("Scénarios"), scenarios)
+        return
+    scenarios = list(scenarios)
+    if len(scenarios) > MAX_SCENARIO_SHEETS:
+        records = [_flatten(scenario) for scenario in scenarios]
+        fields: List[str] = list(dict.fromkeys(key for record in records for key in record))
+        ws = book.sheet("Scénarios")
+        book.append_header(ws, fields)
+        book.append_rows(ws, ([_cell_value(record.get(field)) for field in fields] for record in records))
+        return
+    for idx, scenario in enumerate(scenarios, start=1):
+        ws = book.sheet(scenario.get("nom") or f"Scénario {idx}")
+        book.append_title(ws, scenario.get("nom") or f"Scénario {idx}")
+        if scenario.get("description"):
+            ws.append([scenario["description"]])
+        systems = [key for key, value in scenario.items() if isinstance(value, dict)]
+        if systems:
+            # Indicateurs en lignes, systèmes (fixe, tracking...) en colonnes
+            book.append_header(ws, ["Indicateur"] + systems)
+            indicators = list(dict.fromkeys(k for system in systems for k in scenario[system]))
+            for indicator in indicators:
+                ws.append([book.styled(ws, indicator, LABEL_STYLE)]
+                          + [_cell_value(scenario[system].get(indicator)) for system in systems])
+        book.append_pairs(ws, ((key, value) for key, value in scenario.items()
+                               if key not in ("nom", "description") and not isinstance(value, dict)))
+
+def write_results_workbook(data: Dict[str, Any], target, configuration: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Écrit le classeur des résultats : configuration, résultats, production mensuelle et scénarios
+
+    Args:
+        data (dict): Résultats de la simulation
+        target: Chemin du fichier ou fichier binaire ouvert (BytesIO...)
+        configuration (dict): Paramètres à exporter (par défaut, les paramètres de simulation)
+    """
+    from datetime import datetime
+    book = StreamingWorkbook()
+
+    # 1. Configuration
+    ws = book.sheet("Configuration")
+    book.append_title(ws, "Configuration Générale")
+    book.append_pairs(ws, [
+        (rhuma_label("id"), rhuma("id")),
+        (rhuma_label("label"), rhuma("label")),
+        (rhuma_label("version"), rhuma("version")),
+        ("Timestamp", datetime.now().isoformat()),
+    ])
+    ws.append([])
+    book.append_title(ws, "Paramètres de Simulation")
+    if configuration is None:
+        book.append_pairs(ws, ((field.label, rhuma(field.key)) for field in CONFIGURATION_FIELDS))
+    else:
+        book.append_pairs(ws, configuration.items())
+
+    # 2. Résultats
+    ws = book.sheet("Résultats")
+    book.append_title(ws, "Résultats de la Simulation")
+    book.append_pairs(ws, ((field.label, result_value(data, field.key)) for field in RESULT_FIELDS))
+
+    # 3. Production mensuelle
+    ws = book.sheet("Production Mensuelle")
+    book.append_header(ws, ["Mois", "Production (kWh)"])
+    book.append_rows(ws, ([month, _cell_value(production)]
+                          for month, production in data.get("monthly_production", {}).items()))
+
+    # 4. Scénarios
+    scenarios = data.get("scenarios")
+    if scenarios is not None and len(scenarios):
+        _scenario_sheets(book, scenarios)
+
+    book.save(target)
@@ -4,46 +4,32 @@
 # (c) Jean Hugues Robert, 03/2025
 # MIT License
 
+# Le profileur est importé en premier pour chronométrer les imports (RHUMA_PROFILE_STARTUP=1)
+from modules.startup_profiler import profiler
+profiler.begin_run()
+
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import os
-import json
-from datetime import datetime
-import numpy as np
-from dotenv import load_dotenv
-
-from modules.exports import export_to_google_sheets, get_google_sheet_client
-from modules.pvgis_analysis import pvgis_analysis_section
-from modules.state_manager import rhuma, StateManager
-from modules.solar_tracker_3d import solar_tracker_3d_section
-from modules.financial import financial_simulation_section, simulate_financial_scenarios, calculate_total_costs
-from modules.exports import export_to_json, export_to_csv, export_to_excel, export_all_formats
-from modules.tracking import tracking_optimization_section, tracking_comparison_section  # <-- new import
-
-# Charger les variables d'environnement
-load_dotenv()
+
+# Modules légers uniquement : pandas, matplotlib et openpyxl sont importés par les
+# fonctions qui s'en servent, au premier rendu qui en a besoin.
+with profiler.section("imports"):
+    from modules.state_manager import rhuma, StateManager
+    from modules.pvgis_analysis import pvgis_analysis_section
+    from modules.documentation import documentation_section
+    from modules.financial import financial_simulation_section, financial_parameters_sidebar
+    from modules.exports import export_all_formats, export_buttons_section, project_settings_sidebar, monthly_production_download
 
 # Initialiser le gestionnaire d'état
-state_manager = StateManager()
+with profiler.section("state"):
+    state_manager = StateManager()
 
-# Initialiser l'état avec les valeurs par défaut
-state_manager.get_state()
+    # Initialiser l'état avec les valeurs par défaut
+    state_manager.get_state()
 
 # Configuration de la page
 st.set_page_config(page_title="Simulateur Rhuma, rhum solaire en Corse", layout="wide")
 st.title(f"{rhuma('label')}")  # using rhuma("label") inline
-
-# Lecture et affichage des documents Markdown
-DOCS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "docs")
-
-def read_markdown_file(markdown_file):
-    """Lire et retourner le contenu d'un fichier Markdown."""
-    try:
-        with open(markdown_file, 'r', encoding='utf-8') as f:
-            return f.read()
-    except Exception as e:
-        return f"Erreur lors de la lecture du fichier: {str(e)}"
+profiler.mark("first_render")
 
 st.markdown("""
 ## 📚 Documentation
@@ -57,28 +43,20 @@ st.markdown("""
 [GitHub Repository](https://github.com/JeanHuguesRobert/Rhuma)
 """)
 
-# Créer des onglets pour la documentation et les simulations
-doc_tabs = st.tabs(["Crowdfunding", "Documentation technique", "Guide utilisateur", "Simulation 3D du Tracker"])
-
-with doc_tabs[0]:
-    crowdfunding_content = read_markdown_file(os.path.join(DOCS_DIR, "crowdfunding.md"))
-    st.markdown(crowdfunding_content)
+# Documentation et simulation 3D, rendues uniquement à l'ouverture
+with profiler.section("documentation"):
+    documentation_section()
 
-with doc_tabs[1]:
-    technical_content = read_markdown_file(os.path.join(DOCS_DIR, "ARCHITECTURE.md"))
-    st.markdown(technical_content)
-
-with doc_tabs[2]:
-    guide_content = read_markdown_file(os.path.join(DOCS_DIR, "user_guide.md"))
-    st.markdown(guide_content)
-    
-with doc_tabs[3]:
-    # Afficher la simulation 3D du tracker solaire
-    solar_tracker_3d_section()
+# Paramètres de la barre latérale
+with profiler.section("sidebar"):
+    financial_parameters_sidebar()
+    project_settings_sidebar()
 
 # Dans votre script Streamlit principal, ajoutez ceci après vos sections existantes
-financial_simulation_section()
-pvgis_analysis_section()
+with profiler.section("financial"):
+    financial_simulation_section()
+with profiler.section("pvgis"):
+    pvgis_analysis_section()
 
 # Section de simulation du tracking présentant les deux résultats avec delta
 st.header("Simulation du Tracking")
@@ -122,5 +100,11 @@ if st.button("💾 Exporter tout"):
     # Utiliser directement les résultats du gestionnaire d'état
     export_all_formats(state_manager.get_results())
 
+export_buttons_section()
+monthly_production_download()
+
 # Lien vers le dépôt GitHub
 st.markdown("[GitHub Repository](https://github.com/JeanHuguesRobert/Rhuma)")
+
+profiler.mark("script_end")
+profiler.render()